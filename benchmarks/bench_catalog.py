@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComfyDash catalog query benchmark
+- Builds a synthetic catalog (default 50k items) and times GET /catalog style
+  queries against mini_server.CatalogIndex (index build + per-query latency).
+- Compares catalog storage formats (catalog.json vs catalog.json.gz): bytes on
+  disk, write/load time and bytes over the wire with and without gzip.
+- Output: JSON on stdout, so runs can be compared over time.
+
+    python benchmarks/bench_catalog.py --items 50000 --repeat 50
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import mini_server  # noqa: E402
+
+WORDS = ["anime", "realistic", "portrait", "style", "detail", "pony", "cyber", "dream", "shaper",
+         "juggernaut", "epic", "photo", "sketch", "ink", "neon", "fantasy", "castle", "girl", "armor", "lineart"]
+TAGS = ["1girl", "solo", "smile", "long hair", "blue eyes", "outdoors", "night", "city", "sword", "hat",
+        "red hair", "masterpiece", "best quality", "dress", "flower", "sky", "cloud", "tree", "water", "cat"]
+BASES = ["sd15", "sdxl", "pony", "flux", "cascade", "sd20"]
+
+QUERIES = [
+    {"label": "page 1, no filter", "params": {}},
+    {"label": "type=lora", "params": {"type": "lora"}},
+    {"label": "type=lora&base=sdxl, sort=-size", "params": {"type": "lora", "base": "sdxl", "sort": "-size"}},
+    {"label": "q=anime (name substring)", "params": {"q": "anime"}},
+    {"label": "q=juggernaut epic", "params": {"q": "juggernaut epic"}},
+    {"label": "q=smile (tag token)", "params": {"q": "smile", "type": "lora"}},
+    {"label": "q=xl (short token)", "params": {"q": "xl"}},
+    {"label": "deep page, sort=mtime", "params": {"sort": "mtime", "offset": 20000}},
+]
+
+
+def synthetic_items(count: int, seed: int = 42) -> list[dict]:
+    rnd = random.Random(seed)
+    items = []
+    for i in range(count):
+        kind = rnd.choices(["lora", "checkpoint", "embedding"], weights=[80, 12, 8])[0]
+        name = "_".join(rnd.sample(WORDS, 2)) + f"_v{rnd.randint(1, 30)}" + ("XL" if rnd.random() < 0.3 else "")
+        item = {
+            "id": f"{i:032x}",
+            "type": kind,
+            "name": f"{name}_{i}",
+            "path": f"/models/{kind}s/{rnd.choice(WORDS)}/{name}_{i}.safetensors",
+            "size": rnd.randint(10_000, 7_000_000_000),
+            "base": rnd.choice(BASES),
+            "mtime": 1_700_000_000 + rnd.randint(0, 50_000_000),
+        }
+        if kind == "lora":
+            item["trigger"] = rnd.choice(WORDS) + "_trg"
+            item["tags"] = ", ".join(rnd.sample(TAGS, 10))
+        items.append(item)
+    return items
+
+
+def _best_ms(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return round(best * 1000, 1)
+
+
+def storage(items: list[dict]) -> dict:
+    catalog = {
+        "schema": "comfydash/catalog@1",
+        "generated_at": "2025-01-01T00:00:00+00:00",
+        "comfyui_root": "/models",
+        "count": len(items),
+        "items": items,
+    }
+    scanner, _ = mini_server._load_scanner_module()
+    formats = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("catalog.json", "catalog.json.gz"):
+            path = Path(tmp) / name
+            formats[name] = {
+                "write_ms": _best_ms(lambda: scanner.write_catalog(path, catalog)),
+                "bytes_on_disk": path.stat().st_size,
+                "load_ms": _best_ms(lambda: scanner.read_catalog(path)),
+            }
+    wire = mini_server.json_bytes({"ok": True, "data": catalog})
+    return {
+        "formats": formats,
+        "wire": {
+            "identity_bytes": len(wire),
+            "gzip_bytes": len(gzip.compress(wire, compresslevel=5)),
+            "gzip_ms": _best_ms(lambda: gzip.compress(wire, compresslevel=5)),
+        },
+    }
+
+
+def run(count: int, repeat: int) -> dict:
+    items = synthetic_items(count)
+    t0 = time.perf_counter()
+    index = mini_server.CatalogIndex(items, version=1)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    results = []
+    for q in QUERIES:
+        params = dict(q["params"])
+        timings = []
+        total = 0
+        for _ in range(repeat):
+            t = time.perf_counter()
+            total, _page = index.query(
+                q=params.get("q", ""), type_=params.get("type", ""), base=params.get("base", ""),
+                sort=params.get("sort", "name"), offset=params.get("offset", 0), limit=100,
+            )
+            timings.append((time.perf_counter() - t) * 1000)
+        timings.sort()
+        results.append({
+            "query": q["label"],
+            "total": total,
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+            "max_ms": round(timings[-1], 3),
+        })
+    return {
+        "benchmark": "catalog_query",
+        "items": count,
+        "repeat": repeat,
+        "index_build_ms": round(build_ms, 1),
+        "queries": results,
+        "storage": storage(items),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ComfyDash catalog query benchmark")
+    ap.add_argument("--items", type=int, default=50_000, help="Synthetic catalog size (default 50000)")
+    ap.add_argument("--repeat", type=int, default=50, help="Runs per query (default 50)")
+    args = ap.parse_args(argv)
+    print(json.dumps(run(args.items, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
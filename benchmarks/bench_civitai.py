@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComfyDash CivitAI lookup check
+- Starts a local stand-in for CivitAI's model-versions/by-hash API (http.server,
+  HTTP/1.1 keep-alive; known hashes answer 200, others 404, one hash answers slowly)
+  and mini_server.py with --civitai-api pointing at it and its catalog, hash cache
+  and CivitAI cache in a temp folder.
+- POST /enrich-civitai/batch over a folder of small test files: results must stream
+  as they finish (the slow lookup last, the first line before it is answered), a
+  missing path must come back as an ok: false record, the summary must come last,
+  and the lookups must share keep-alive connections (fewer connections than requests).
+  --max-heavy-jobs 1 with several workers also shows the per-file heavy slots don't
+  block each other.
+- POST /enrich-civitai one file at a time against short --civitai-cache-ttl /
+  --civitai-negative-ttl values: a found version is reused until its TTL runs out, a
+  "not found" until the (shorter) negative TTL does, an expired entry is served with
+  stale: true while the stand-in answers 503, a newer fetched_at wins on
+  /civitai-cache/import whatever the entry order, and after a restart with
+  --civitai-offline cached hashes still answer while unknown ones come back as
+  offline misses without a request.
+- Output: JSON on stdout; exit code 1 if a check fails.
+
+    python benchmarks/bench_civitai.py --files 12 --workers 4 --ttl 1
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BY_HASH = "/api/v1/model-versions/by-hash/"
+
+
+class FakeCivitai(ThreadingHTTPServer):
+    """by-hash stand-in: ``versions`` maps SHA-256 -> response, ``delays`` hash -> seconds;
+    ``status`` set answers every request with that error (CivitAI down)."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeCivitaiHandler)
+        self.versions: dict[str, dict] = {}
+        self.delays: dict[str, float] = {}
+        self.status: int | None = None
+        self.connections = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def api_base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v1"
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeCivitaiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+        if self.server.status is not None:
+            return self._reply(self.server.status, {"error": "Service unavailable"})
+        if not self.path.startswith(BY_HASH):
+            return self._reply(404, {"error": "Not found"})
+        file_hash = self.path[len(BY_HASH):].upper()
+        time.sleep(self.server.delays.get(file_hash, 0))
+        version = self.server.versions.get(file_hash)
+        if version is None:
+            return self._reply(404, {"error": "Model not found"})
+        self._reply(200, version)
+
+    def _reply(self, status: int, obj: dict):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request(port: int, method: str, path: str, body: dict | None = None) -> dict:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def request_ndjson(port: int, path: str, body: dict) -> list[tuple[float, dict]]:
+    """POST and read the NDJSON answer line by line: [(seconds after the request, record), ...]."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        t0 = time.perf_counter()
+        conn.request("POST", path, body=json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        lines = []
+        for line in resp:
+            if line.strip():
+                lines.append((time.perf_counter() - t0, json.loads(line)))
+        return lines
+    finally:
+        conn.close()
+
+
+def start_server(tmp: Path, api_base: str, *extra: str) -> tuple[subprocess.Popen, int]:
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, str(BASE_DIR / "mini_server.py"), "--port", str(port), "--strict",
+                             "--catalog", str(tmp / "catalog.json"), "--civitai-api", api_base, *extra],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("mini_server.py exited during startup")
+        try:
+            request(port, "GET", "/health")
+            return proc, port
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("mini_server.py did not come up")
+
+
+def stop_server(proc: subprocess.Popen):
+    proc.terminate()
+    proc.wait(timeout=10)
+
+
+def write_models(folder: Path, count: int) -> dict[str, str]:
+    """``count`` small random files -> {path: SHA-256}."""
+    folder.mkdir(parents=True, exist_ok=True)
+    files = {}
+    for i in range(count):
+        data = os.urandom(64 * 1024)
+        path = folder / f"lora_{i:03d}.safetensors"
+        path.write_bytes(data)
+        files[str(path)] = hashlib.sha256(data).hexdigest().upper()
+    return files
+
+
+def version(i: int) -> dict:
+    return {"id": 1000 + i, "modelId": 500 + i, "name": f"v{i}", "model": {"name": f"Model {i}"},
+            "trainedWords": [f"word{i}"], "baseModel": "SDXL 1.0"}
+
+
+def check(results: list, name: str, ok: bool, **details):
+    results.append({"check": name, "ok": bool(ok), **details})
+
+
+def check_batch(tmp: Path, fake: FakeCivitai, args, results: list):
+    files = write_models(tmp / "batch", args.files)
+    paths = list(files)
+    slow, unknown = paths[0], paths[-1]
+    for i, path in enumerate(paths[:-1]):
+        fake.versions[files[path]] = version(i)
+    fake.delays[files[slow]] = args.slow
+    missing = str(tmp / "batch" / "missing.safetensors")
+
+    proc, port = start_server(tmp, fake.api_base, "--max-heavy-jobs", "1")
+    try:
+        t0 = time.perf_counter()
+        lines = request_ndjson(port, "/enrich-civitai/batch", {"paths": [slow, *paths[1:], missing],
+                                                               "workers": args.workers})
+        elapsed = time.perf_counter() - t0
+    finally:
+        stop_server(proc)
+
+    records = [record for _, record in lines]
+    by_path = {record.get("path"): (at, record) for at, record in lines if record.get("type") == "result"}
+    check(results, "summary_last", records and records[-1].get("type") == "summary"
+          and records[-1].get("count") == len(paths) + 1 and records[-1].get("failed") == 1,
+          summary=records[-1] if records else None)
+    check(results, "every_path_once", len(by_path) == len(paths) + 1 == len(records) - 1)
+    check(results, "found_and_not_found",
+          all(by_path.get(p, (0, {}))[1].get("data", {}).get("found") for p in paths[:-1])
+          and by_path.get(unknown, (0, {}))[1].get("data", {}).get("found") is False)
+    missing_record = by_path.get(missing, (0, {}))[1]
+    check(results, "missing_path_error_record", missing_record.get("ok") is False
+          and "File does not exist" in missing_record.get("error", ""), record=missing_record)
+    first_at = lines[0][0] if lines else elapsed
+    slow_at = by_path.get(slow, (elapsed, {}))[0]
+    check(results, "streamed_in_completion_order",
+          records and records[0].get("path") != slow and slow_at == max(at for at, _ in by_path.values())
+          and first_at < args.slow <= slow_at,
+          first_record_s=round(first_at, 3), slow_record_s=round(slow_at, 3))
+    check(results, "connections_reused", 0 < fake.connections < fake.requests,
+          connections=fake.connections, requests=fake.requests)
+    return {"files": len(paths), "workers": args.workers, "elapsed_s": round(elapsed, 3)}
+
+
+def check_cache(tmp: Path, fake: FakeCivitai, args, results: list):
+    tmp = tmp / "cache"
+    files = write_models(tmp / "models", 3)
+    (known, known_hash), (unknown, unknown_hash), (later, _) = files.items()
+    fake.versions[known_hash] = version(0)
+    ttl, negative_ttl = 2 * args.ttl, args.ttl
+
+    def enrich(port: int, path: str) -> tuple[dict, int]:
+        before = fake.requests
+        data = request(port, "POST", "/enrich-civitai", {"path": path})
+        return data.get("data") or {"error": data.get("error")}, fake.requests - before
+
+    proc, port = start_server(tmp, fake.api_base, "--civitai-cache-ttl", str(ttl),
+                              "--civitai-negative-ttl", str(negative_ttl))
+    try:
+        t0 = time.monotonic()
+        first = [enrich(port, known), enrich(port, unknown)]
+        again = [enrich(port, known), enrich(port, unknown)]
+        check(results, "cached_within_ttl",
+              all(d.get("civitai_cached") is False and n == 1 for d, n in first)
+              and all(d.get("civitai_cached") is True and n == 0 for d, n in again)
+              and first[0][0].get("found") is True and first[1][0].get("found") is False)
+
+        time.sleep(max(0.0, t0 + negative_ttl + 0.3 - time.monotonic()))
+        found, found_requests = enrich(port, known)
+        not_found, not_found_requests = enrich(port, unknown)
+        check(results, "negative_ttl_expiry", not_found.get("civitai_cached") is False and not_found_requests == 1
+              and found.get("civitai_cached") is True and found_requests == 0,
+              found_age=found.get("cache_age"), negative_ttl=negative_ttl)
+
+        time.sleep(max(0.0, t0 + ttl + 0.3 - time.monotonic()))
+        found, found_requests = enrich(port, known)
+        check(results, "ttl_expiry", found.get("civitai_cached") is False and found_requests == 1
+              and found.get("found") is True, ttl=ttl)
+
+        fake.status = 503
+        try:
+            time.sleep(ttl + 0.3)
+            found, found_requests = enrich(port, known)
+        finally:
+            fake.status = None
+        check(results, "stale_when_upstream_down", found.get("found") is True and found.get("stale") is True
+              and found.get("civitai_cached") is True and found_requests >= 1, data=found)
+
+        exported = request(port, "GET", "/civitai-cache/export")["entries"]
+        fetched_at = next(e["fetched_at"] for e in exported if e["hash"] == known_hash)
+        other_hash = "AB" * 32
+        imported = request(port, "POST", "/civitai-cache/import", {"entries": [
+            {"hash": known_hash, "fetched_at": fetched_at + 100, "data": {**version(0), "name": "newer"}},
+            {"hash": known_hash, "fetched_at": fetched_at - 100, "data": {**version(0), "name": "older"}},
+            {"hash": other_hash, "fetched_at": fetched_at, "data": version(9)},
+            {"hash": unknown_hash, "fetched_at": fetched_at - 100, "data": version(8)},
+        ]})["data"]
+        exported = {e["hash"]: e for e in request(port, "GET", "/civitai-cache/export")["entries"]}
+        check(results, "import_newer_fetched_at_wins",
+              imported == {"imported": 2, "unchanged": 2, "skipped": 0}
+              and exported[known_hash]["data"]["name"] == "newer" and exported[other_hash]["found"] is True
+              and exported[unknown_hash]["found"] is False, result=imported)
+    finally:
+        stop_server(proc)
+
+    proc, port = start_server(tmp, fake.api_base, "--civitai-offline")
+    try:
+        cached, cached_requests = enrich(port, known)
+        missing, missing_requests = enrich(port, later)
+    finally:
+        stop_server(proc)
+    check(results, "offline_cached", cached.get("found") is True and cached.get("civitai_cached") is True
+          and cached.get("version_name") == "newer" and cached_requests == 0)
+    check(results, "offline_miss", missing.get("found") is False and missing.get("offline") is True
+          and missing.get("civitai_cached") is False and missing_requests == 0, data=missing)
+    return {"ttl": ttl, "negative_ttl": negative_ttl}
+
+
+def run(args) -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix="comfydash-bench-civitai-"))
+    fake = FakeCivitai()
+    results: list = []
+    try:
+        batch = check_batch(tmp, fake, args, results)
+        cache = check_cache(tmp, fake, args, results)
+        return {
+            "benchmark": "civitai",
+            "python": sys.version.split()[0],
+            "batch": batch,
+            "cache": cache,
+            "checks": results,
+            "ok": all(r["ok"] for r in results),
+        }
+    finally:
+        fake.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ComfyDash CivitAI lookup check")
+    ap.add_argument("--files", type=int, default=12, help="Test files per batch (default 12)")
+    ap.add_argument("--workers", type=int, default=4, help="Batch workers (default 4)")
+    ap.add_argument("--ttl", type=float, default=1.0,
+                    help="--civitai-negative-ttl for the cache checks; the found TTL is twice that (default 1.0)")
+    ap.add_argument("--slow", type=float, default=1.0, help="Seconds the slow by-hash answer takes (default 1.0)")
+    args = ap.parse_args(argv)
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
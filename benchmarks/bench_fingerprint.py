@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComfyDash architecture fingerprint check + benchmark
+- Synthetic safetensors headers for SD1.5 / SD2 / SDXL / Pony / Flux / Cascade checkpoints,
+  kohya/diffusers/ComfyUI LoRAs and embeddings, many of them with misleading file names
+  and without kohya ss_* metadata.
+- PyTorch files (.ckpt/.pt/.bin) written without torch: the pickle opcodes torch.save()
+  emits, in the zip layout (torch >= 1.6) and the legacy multi-pickle layout; A1111,
+  diffusers and SDXL textual inversion embeddings; and a malicious pickle that must
+  not run (the scanner walks the opcodes, it never unpickles).
+- Every file goes through the scanner's build_item(); the resulting "base" must match the
+  expected architecture. Exit code 1 if any case is misclassified.
+- Raw header edge cases (metadata first/last/missing/duplicate/nested, unicode, truncated or
+  trailing garbage, signature keys nested below the top level, tensor tables the fast path
+  must hand to json.loads): read_safetensors_metadata() must return what json.loads of the
+  whole header gives, and nested keys must not count.
+- Header speed: LoRA headers of ~130 KB / 527 KB / 1.8 MB (large ss_tag_frequency, many
+  tensors); the header reader (metadata + fingerprint) must beat
+  json.loads(header).get("__metadata__") on each, else exit code 1.
+- Output: JSON with per-case result, header size and fingerprint time (bytes read and
+  vector count for the PyTorch cases).
+
+    python benchmarks/bench_fingerprint.py
+    python benchmarks/bench_fingerprint.py --filler 3000 --rounds 50
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import io
+import json
+import os
+import pickle
+import shutil
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_scanner():
+    """Load scanner/main.py the same way mini_server does."""
+    for scanner_py in (BASE_DIR / "Scanner" / "main.py", BASE_DIR / "scanner" / "main.py"):
+        if scanner_py.exists():
+            spec = importlib.util.spec_from_file_location("comfydash_scanner", str(scanner_py))
+            mod = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(mod)  # type: ignore[union-attr]
+            return mod
+    raise RuntimeError("scanner/main.py not found")
+
+
+# ---------------- synthetic headers -----------------
+
+def ldm_unet(ctx: int, prefix: str = "model.diffusion_model.") -> dict:
+    keys = {}
+    for block, ch in ((1, 320), (2, 320), (4, 640), (5, 640), (7, 1280), (8, 1280)):
+        base = f"{prefix}input_blocks.{block}.1.transformer_blocks.0"
+        keys[f"{base}.attn1.to_q.weight"] = [ch, ch]
+        keys[f"{base}.attn2.to_k.weight"] = [ch, ctx]
+        keys[f"{base}.attn2.to_v.weight"] = [ch, ctx]
+    return keys
+
+
+def sd15_checkpoint() -> dict:
+    return {
+        "cond_stage_model.transformer.text_model.embeddings.token_embedding.weight": [49408, 768],
+        **ldm_unet(768),
+    }
+
+
+def sd20_checkpoint() -> dict:
+    return {
+        "cond_stage_model.model.transformer.resblocks.0.attn.in_proj_weight": [3072, 1024],
+        "cond_stage_model.model.token_embedding.weight": [49408, 1024],
+        **ldm_unet(1024),
+    }
+
+
+def sdxl_checkpoint(refiner: bool = False) -> dict:
+    keys = {"model.diffusion_model.label_emb.0.0.weight": [1280 if not refiner else 1536, 2816 if not refiner else 2560]}
+    if refiner:
+        keys["conditioner.embedders.0.model.transformer.resblocks.0.attn.in_proj_weight"] = [3840, 1280]
+        keys.update(ldm_unet(1280))
+    else:
+        keys["conditioner.embedders.0.transformer.text_model.embeddings.token_embedding.weight"] = [49408, 768]
+        keys["conditioner.embedders.1.model.transformer.resblocks.0.attn.in_proj_weight"] = [3840, 1280]
+        keys.update(ldm_unet(2048))
+    return keys
+
+
+def flux_unet(prefix: str = "") -> dict:
+    return {
+        f"{prefix}double_blocks.0.img_attn.qkv.weight": [9216, 3072],
+        f"{prefix}double_blocks.0.txt_attn.qkv.weight": [9216, 3072],
+        f"{prefix}single_blocks.0.linear1.weight": [21504, 3072],
+        f"{prefix}img_in.weight": [3072, 64],
+    }
+
+
+def cascade(stage: str) -> dict:
+    if stage == "c":
+        return {"clip_txt_mapper.weight": [8192, 1280], "clip_img_mapper.weight": [8192, 768],
+                "down_blocks.0.0.channelwise.0.weight": [8192, 2048]}
+    return {"effnet_mapper.0.weight": [2560, 64, 1, 1], "down_blocks.0.0.channelwise.0.weight": [1280, 320]}
+
+
+def kohya_lora(te: list[tuple[str, int]], unet: dict, rank: int = 16) -> dict:
+    keys = {}
+    for name, dim in te:
+        keys[f"{name}_text_model_encoder_layers_0_mlp_fc1.lora_down.weight"] = [rank, dim]
+        keys[f"{name}_text_model_encoder_layers_0_mlp_fc1.lora_up.weight"] = [dim * 4, rank]
+    for name, dim in unet.items():
+        keys[f"lora_unet_{name}.lora_down.weight"] = [rank, dim]
+        keys[f"lora_unet_{name}.alpha"] = []
+    return keys
+
+
+def peft_lora(names: dict, rank: int = 16) -> dict:
+    keys = {}
+    for name, dim in names.items():
+        keys[f"{name}.lora_A.weight"] = [rank, dim]
+        keys[f"{name}.lora_B.weight"] = [dim, rank]
+    return keys
+
+
+SD_UNET_DIFFUSERS = "down_blocks_0_attentions_0_transformer_blocks_0_attn2_to_k"
+SDXL_UNET_LDM = "input_blocks_4_1_transformer_blocks_0_attn2_to_k"
+
+# (file name, kind, tensors, metadata, metadata_last, expected base)
+CASES = [
+    ("my_merge_v3", "checkpoint", sd15_checkpoint, None, False, "sd15"),
+    ("dreamshaperXL_turbo_to_sd15", "checkpoint", sd15_checkpoint, None, False, "sd15"),
+    ("v2-1_768-ema-pruned", "checkpoint", sd20_checkpoint, None, False, "sd20"),
+    ("realisticVision_v5", "checkpoint", sdxl_checkpoint, None, False, "sdxl"),
+    ("refiner_merge", "checkpoint", lambda: sdxl_checkpoint(refiner=True), None, False, "sdxl"),
+    ("ponyDiffusionV6XL", "checkpoint", sdxl_checkpoint, None, False, "pony"),
+    ("final_merge_2", "checkpoint", sdxl_checkpoint, None, False, "sdxl"),
+    ("model_fp8", "checkpoint", flux_unet, None, False, "flux"),
+    ("model_comfy", "checkpoint", lambda: flux_unet("model.diffusion_model."), None, False, "flux"),
+    ("stage_c_bf16", "checkpoint", lambda: cascade("c"), None, False, "cascade"),
+    ("b_lite", "checkpoint", lambda: cascade("b"), None, False, "cascade"),
+    ("anime_xl_style", "lora", lambda: kohya_lora([("lora_te", 768)], {SD_UNET_DIFFUSERS: 768}),
+     None, False, "sd15"),
+    ("sd2_lineart", "lora", lambda: kohya_lora([("lora_te", 1024)], {SD_UNET_DIFFUSERS: 1024}),
+     None, False, "sd20"),
+    ("detail_tweaker", "lora", lambda: kohya_lora([("lora_te1", 768), ("lora_te2", 1280)], {SDXL_UNET_LDM: 2048}),
+     {"ss_training_comment": "trigger word: detail"}, False, "sdxl"),
+    ("unet_only_style", "lora", lambda: kohya_lora([], {SDXL_UNET_LDM: 2048}), None, False, "sdxl"),
+    ("wrong_meta_sd15", "lora", lambda: kohya_lora([("lora_te1", 768), ("lora_te2", 1280)], {SDXL_UNET_LDM: 2048}),
+     {"ss_base_model_version": "sd_v1"}, False, "sdxl"),
+    ("meta_last_xl", "lora", lambda: kohya_lora([("lora_te1", 768), ("lora_te2", 1280)], {SDXL_UNET_LDM: 2048}),
+     {"ss_output_name": "x"}, True, "sdxl"),
+    ("flux_kohya", "lora", lambda: kohya_lora([], {"double_blocks_0_img_attn_qkv": 3072,
+                                                    "single_blocks_0_linear1": 3072}), None, False, "flux"),
+    ("flux_diffusers", "lora", lambda: peft_lora({
+        "transformer.single_transformer_blocks.0.attn.to_q": 3072,
+        "transformer.transformer_blocks.0.attn.to_q": 3072}), None, False, "flux"),
+    ("flux_comfy", "lora", lambda: peft_lora({"diffusion_model.double_blocks.0.img_attn.qkv": 3072}),
+     None, False, "flux"),
+    ("peft_sd15", "lora", lambda: peft_lora({
+        "unet.down_blocks.1.attentions.0.transformer_blocks.0.attn2.to_k": 768}), None, False, "sd15"),
+    ("peft_xl", "lora", lambda: peft_lora({
+        "unet.down_blocks.1.attentions.0.transformer_blocks.0.attn2.to_k": 2048}), None, False, "sdxl"),
+    ("easynegative", "embedding", lambda: {"emb_params": [8, 768]}, None, False, "sd15"),
+    ("sd2_negative", "embedding", lambda: {"emb_params": [8, 1024]}, None, False, "sd20"),
+    ("negativeXL_D", "embedding", lambda: {"clip_g": [8, 1280], "clip_l": [8, 768]}, None, False, "sdxl"),
+    # No signature -> file name / metadata decide as before
+    ("unknown_fluxlike", "checkpoint", lambda: {"foo.weight": [4, 4]}, None, False, "flux"),
+    ("unknown_plain", "lora", lambda: {"bar.lora_down.weight": [4, 4]}, {"ss_base_model_version": "sdxl_base_v1-0"},
+     False, "sdxl"),
+]
+
+
+# ---------------- synthetic PyTorch files -----------------
+
+class T:
+    """A tensor in a synthetic torch pickle."""
+
+    def __init__(self, *shape: int, storage: str = "HalfStorage"):
+        self.shape, self.storage = shape, storage
+
+
+class TorchPickle:
+    """Protocol 2 opcodes as torch.save() writes them: storages as persistent ids,
+    tensors via torch._utils._rebuild_tensor_v2, repeated globals memoized."""
+
+    def __init__(self):
+        self.out = bytearray(b"\x80\x02")
+        self.memo: dict = {}
+        self.storages = 0
+
+    def global_(self, module: str, name: str):
+        key = (module, name)
+        if key in self.memo:
+            self.out += b"h" + bytes([self.memo[key]]) if self.memo[key] < 256 else \
+                b"j" + struct.pack("<I", self.memo[key])
+            return
+        self.out += f"c{module}\n{name}\n".encode()
+        self.memo[key] = len(self.memo)
+        self.out += b"r" + struct.pack("<I", self.memo[key])
+
+    def value(self, obj):
+        if isinstance(obj, dict):
+            self.out += b"}"
+            if obj:
+                self.out += b"("
+                for key, value in obj.items():
+                    self.value(key)
+                    self.value(value)
+                self.out += b"u"
+        elif isinstance(obj, T):
+            self.tensor(obj)
+        elif isinstance(obj, str):
+            raw = obj.encode("utf-8")
+            self.out += b"X" + struct.pack("<I", len(raw)) + raw
+        elif isinstance(obj, int):
+            self.out += b"J" + struct.pack("<i", obj)
+        elif isinstance(obj, tuple):
+            self.out += b"("
+            for v in obj:
+                self.value(v)
+            self.out += b"t"
+        else:
+            raise TypeError(obj)
+
+    def tensor(self, t: T):
+        numel, stride = 1, []
+        for d in reversed(t.shape):
+            stride.insert(0, numel)
+            numel *= d
+        self.global_("torch._utils", "_rebuild_tensor_v2")
+        self.out += b"(("
+        self.value("storage")
+        self.global_("torch", t.storage)
+        self.value(str(self.storages))
+        self.value("cpu")
+        self.value(numel)
+        self.out += b"tQ"  # TUPLE, BINPERSID
+        self.storages += 1
+        self.value(0)
+        self.value(tuple(t.shape))
+        self.value(tuple(stride))
+        self.out += b"\x89"  # NEWFALSE
+        self.global_("collections", "OrderedDict")
+        self.out += b")RtR"
+
+    def dumps(self, obj) -> bytes:
+        self.value(obj)
+        return bytes(self.out + b".")
+
+
+def write_torch(path: Path, obj, layout: str = "zip", pickled: bytes | None = None) -> int:
+    """Write obj like torch.save(); returns the size of the object pickle."""
+    pkl = pickled if pickled is not None else TorchPickle().dumps(obj)
+    if layout == "zip":
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as z:
+            z.writestr("archive/data.pkl", pkl)
+            z.writestr("archive/byteorder", "little")
+            for i in range(pkl.count(b"X\x03\x00\x00\x00cpu")):
+                z.writestr(f"archive/data/{i}", os.urandom(64))
+            z.writestr("archive/version", "3\n")
+    else:
+        with path.open("wb") as f:
+            for head in (0x1950a86a20f9469cfc6c, 1001, {"protocol_version": 1001, "little_endian": True}):
+                f.write(pickle.dumps(head, protocol=2))
+            f.write(pkl)
+            f.write(pickle.dumps([str(i) for i in range(pkl.count(b"X\x03\x00\x00\x00cpu"))], protocol=2))
+            f.write(os.urandom(4096))
+    return len(pkl)
+
+
+def state_dict(tensors: dict, filler: int) -> dict:
+    """ldm order: UNet first, then the (filler) VAE, text encoder keys last."""
+    unet = {k: T(*v) for k, v in tensors.items() if k.startswith("model.")}
+    rest = {k: T(*v) for k, v in tensors.items() if not k.startswith("model.")}
+    vae = {f"first_stage_model.decoder.up.{i // 20}.block.{i % 20}.conv1.weight": T(128, 128, 3, 3)
+           for i in range(filler)}
+    return {**unet, **vae, **rest}
+
+
+def a1111_embedding(vectors: int, dim: int) -> dict:
+    return {"string_to_token": {"*": 265}, "string_to_param": {"*": T(vectors, dim, storage="FloatStorage")},
+            "name": "emb", "step": 3000, "sd_checkpoint": "4c86efd0", "sd_checkpoint_name": "base"}
+
+
+EVIL_MARKER = "comfydash-evil-pickle-ran"
+
+
+def evil_pickle(marker: Path) -> bytes:
+    """A pickle that creates `marker` when unpickled (builtins.exec via REDUCE)."""
+    code = f"open({str(marker)!r}, 'w').close()".encode()
+    return (b"\x80\x02}(X\x05\x00\x00\x00statecbuiltins\nexec\n(X" + struct.pack("<I", len(code)) + code
+            + b"tRu.")
+
+
+# (file name, kind, object factory(filler), layout, expected base, expected vectors)
+TORCH_CASES = [
+    ("dreamshaperXL_merge.ckpt", "checkpoint", lambda n: {"state_dict": state_dict(sd15_checkpoint(), n),
+                                                          "global_step": 840000}, "zip", "sd15", None),
+    ("sd_xl_refined.ckpt", "checkpoint", lambda n: {"state_dict": state_dict(sd20_checkpoint(), n)},
+     "legacy", "sd20", None),
+    ("v1-5-to-xl.pt", "checkpoint", lambda n: state_dict(sdxl_checkpoint(), n), "zip", "sdxl", None),
+    ("flux_unet_fp16.pt", "checkpoint", lambda n: state_dict(flux_unet("model.diffusion_model."), n),
+     "zip", "flux", None),
+    ("easynegative_xl.pt", "embedding", lambda n: a1111_embedding(8, 768), "zip", "sd15", 8),
+    ("sd2_negative.pt", "embedding", lambda n: a1111_embedding(4, 1024), "legacy", "sd20", 4),
+    ("learned_embeds.bin", "embedding", lambda n: {"<cat-toy>": T(768, storage="FloatStorage")}, "zip", "sd15", 1),
+    ("negativeXL_D.pt", "embedding", lambda n: {"clip_g": T(8, 1280), "clip_l": T(8, 768)}, "zip", "sdxl", 8),
+    ("unet_xl_upscale.pth", "checkpoint", lambda n: {"params": {"conv.weight": T(64, 3, 3, 3)}}, "zip",
+     "sdxl", None),
+    # Malicious pickle: never executed, file name decides
+    ("evil_sdxl.pt", "checkpoint", None, "zip", "sdxl", None),
+]
+
+
+def run_torch_cases(scanner, tmp: Path, filler: int) -> list[dict]:
+    results = []
+    marker = tmp / EVIL_MARKER
+    for name, kind, factory, layout, expected, vectors in TORCH_CASES:
+        path = tmp / name
+        if factory is None:
+            pkl_bytes = write_torch(path, None, layout, evil_pickle(marker))
+        else:
+            pkl_bytes = write_torch(path, factory(filler if kind == "checkpoint" else 0), layout)
+        item, nbytes, _, parse_s, _ = scanner._build_item(kind, path, path.stat())
+        ok = item["base"] == expected and item.get("vectors") == vectors and not marker.exists()
+        results.append({
+            "name": name,
+            "kind": kind,
+            "layout": layout,
+            "expected": expected,
+            "base": item["base"],
+            "vectors": item.get("vectors"),
+            "ok": ok,
+            "file_bytes": path.stat().st_size,
+            "pickle_bytes": pkl_bytes,
+            "bytes_read": nbytes,
+            "parse_ms": round(parse_s * 1000, 3),
+        })
+    return results
+
+
+_T = '{"dtype":"F16","shape":[2048,4],"data_offsets":[0,16384]}'
+_XL = ('"model.diffusion_model.input_blocks.4.1.transformer_blocks.0.attn2.to_k.weight":'
+       '{"dtype":"F16","shape":[640,2048],"data_offsets":[0,2621440]}')
+# Raw headers for the __metadata__ reader: (name, header text, expected fingerprint).
+# Metadata must equal json.loads(header).get("__metadata__", {}) (None if that raises),
+# with a non-object __metadata__ read as {}.
+HEADER_CASES = [
+    ("metadata_first", '{"__metadata__":{"a":"1"},"t":%s}' % _T, None),
+    ("metadata_last", '{"t":%s,"__metadata__":{"a":"2"}}' % _T, None),
+    ("metadata_missing", '{"t":%s}' % _T, None),
+    ("metadata_unicode", '{"__metadata__":{"name":"Gr\u00fc\u00dfe \u2603","raw":"äöü"},"t":%s}' % _T, None),
+    ("metadata_escaped_key_in_value", '{"__metadata__":{"c":"\\"__metadata__\\":{\\"x\\":1}"},"t":%s}' % _T, None),
+    ("metadata_duplicate_last_wins", '{"__metadata__":{"a":"3"},"t":%s,"__metadata__":{"a":"4"}}' % _T, None),
+    ("metadata_nested_in_tensor",
+     '{"t":{"dtype":"F16","shape":[1],"data_offsets":[0,2],"__metadata__":{"nested":"1"}},"__metadata__":{"a":"4"}}',
+     None),
+    ("metadata_not_object", '{"__metadata__":"text","t":%s}' % _T, None),
+    ("truncated", '{"__metadata__":{"a":"1"},"t":{"dtype":"F16","sha', None),
+    ("trailing_syntax_error", '{"__metadata__":{"a":"1"}, broken', None),
+    ("trailing_garbage", '{"__metadata__":{"a":"1"}} x', None),
+    ("not_an_object", '[{"__metadata__":{"a":"1"}}]', None),
+    ("bom", '\ufeff{"__metadata__":{"a":"1"}}', None),
+    ("signature_top_level", '{"__metadata__":{"a":"1"},%s}' % _XL, "sdxl"),
+    ("signature_nested_only", '{"__metadata__":{"a":"1"},"wrapper":{%s}}' % _XL, None),
+    # Layouts the fast tensor-table check must hand to json.loads (or reject like it)
+    ("tensor_missing_comma", '{"__metadata__":{"a":"1"},"t":%s "u":%s}' % (_T, _T), None),
+    ("tensor_missing_colon", '{"__metadata__":{"a":"1"},"t"%s}' % _T, None),
+    ("tensor_escaped_key", '{"__metadata__":{"a":"1"},"t\\"x":%s,%s}' % (_T, _XL), "sdxl"),
+    ("tensor_duplicate_key", '{"__metadata__":{"a":"1"},"t":%s,"t":{"dtype":"F16","shape":[1],"data_offsets":[0,2]}}'
+     % _T, None),
+    ("tensor_like_second_metadata", '{"t":%s,"__metadata__":{"dtype":"F16","shape":[1],"data_offsets":[0,2]}}' % _T,
+     None),
+    ("tensor_pretty_printed", '{\n  "__metadata__": {"a": "1"},\n  %s,\n  "t": %s\n}' % (_XL, _T), "sdxl"),
+    ("tensor_after_non_ascii_metadata", '{"__metadata__":{"n":"\u00e4\u00f6\u00fc \u2603"},"t":%s,%s}' % (_T, _XL), "sdxl"),
+    ("signature_in_metadata_only", '{"__metadata__":{"model.diffusion_model.input_blocks.4.1.transformer_blocks.0.'
+     'attn2.to_k.weight":"{\\"dtype\\":\\"F16\\",\\"shape\\":[640,2048]}"}}', None),
+]
+
+
+def reference_metadata(raw: bytes):
+    """How __metadata__ was read before the streaming reader: json.loads of the whole header."""
+    try:
+        metadata = json.loads(raw.decode("utf-8")).get("__metadata__", {})
+    except Exception:
+        return None
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def run_header_cases(scanner, tmp: Path) -> list[dict]:
+    results = []
+    for name, text, expected_arch in HEADER_CASES:
+        raw = text.encode("utf-8")
+        path = tmp / f"{name}.safetensors"
+        with path.open("wb") as f:
+            f.write(struct.pack("<Q", len(raw)) + raw + os.urandom(256))
+        metadata = scanner.read_safetensors_metadata(path)
+        arch = scanner.fingerprint_architecture(raw)
+        expected = reference_metadata(raw)
+        results.append({"name": name, "metadata": metadata, "expected_metadata": expected, "fingerprint": arch,
+                        "expected": expected_arch, "ok": metadata == expected and arch == expected_arch})
+    return results
+
+
+def build_header(tensors: dict, metadata: dict | None, metadata_last: bool, filler: int) -> bytes:
+    """Header laid out like the safetensors writer: __metadata__ first, tensors sorted by name."""
+    entries = dict(tensors)
+    for i in range(filler):
+        entries[f"model.diffusion_model.output_blocks.{i // 20}.{i % 20}.filler.weight"] = [320, 320, 3, 3]
+    header: dict = {}
+    if metadata is not None and not metadata_last:
+        header["__metadata__"] = metadata
+    offset = 0
+    for key in sorted(entries):
+        shape = entries[key]
+        n = 2
+        for d in shape:
+            n *= d
+        header[key] = {"dtype": "F16", "shape": shape, "data_offsets": [offset, offset + n]}
+        offset += n
+    if metadata is not None and metadata_last:
+        header["__metadata__"] = metadata
+    return json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+
+def lora_header(target_bytes: int) -> bytes:
+    """kohya-style LoRA header of roughly ``target_bytes``: a large ss_tag_frequency string in
+    __metadata__ plus a tensor table sized like the metadata."""
+    tags = {f"tag_{i} with words": i % 97 + 1 for i in range(target_bytes // 100)}
+    metadata = {"ss_network_module": "networks.lora", "ss_output_name": "bench",
+                "ss_tag_frequency": json.dumps({"10_bench": tags})}
+    unet = {SDXL_UNET_LDM: 2048}
+    for i in range(target_bytes // 390):
+        unet[f"output_blocks_{i // 30}_1_transformer_blocks_{i % 30}_attn1_to_q"] = 640
+    return build_header(kohya_lora([("lora_te1", 768), ("lora_te2", 1280)], unet), metadata, False, 0)
+
+
+def run_header_speed(scanner, rounds: int) -> list[dict]:
+    """Header reader (metadata + fingerprint) against json.loads(header).get("__metadata__")."""
+    results = []
+    for target in (130_000, 527_000, 1_800_000):
+        raw = lora_header(target)
+        blob = struct.pack("<Q", len(raw)) + raw
+        base, reader = [], []
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            json.loads(raw.decode("utf-8")).get("__metadata__")
+            base.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            hdr = scanner._SafetensorsHeader(io.BytesIO(), blob)
+            hdr.metadata()
+            hdr.architecture()
+            reader.append(time.perf_counter() - t0)
+        base_ms, reader_ms = statistics.median(base) * 1000, statistics.median(reader) * 1000
+        results.append({
+            "header_bytes": len(raw),
+            "json_loads_ms": round(base_ms, 3),
+            "reader_ms": round(reader_ms, 3),
+            "speedup": round(base_ms / reader_ms, 2),
+            "ok": reader_ms < base_ms,
+        })
+    return results
+
+
+def run(args) -> dict:
+    scanner = load_scanner()
+    tmp = Path(tempfile.mkdtemp(prefix="comfydash-fingerprint-"))
+    results = []
+    try:
+        for name, kind, tensors, metadata, metadata_last, expected in CASES:
+            filler = args.filler if kind == "checkpoint" else args.filler // 10
+            raw = build_header(tensors(), metadata, metadata_last, filler)
+            path = tmp / f"{name}.safetensors"
+            with path.open("wb") as f:
+                f.write(struct.pack("<Q", len(raw)) + raw + os.urandom(4096))
+            item = scanner.build_item(kind, path, path.stat())
+
+            times = []
+            for _ in range(args.rounds):
+                t0 = time.perf_counter()
+                scanner.fingerprint_architecture(raw)
+                times.append(time.perf_counter() - t0)
+            results.append({
+                "name": name,
+                "kind": kind,
+                "expected": expected,
+                "base": item["base"],
+                "fingerprint": scanner.fingerprint_architecture(raw),
+                "ok": item["base"] == expected,
+                "header_bytes": len(raw),
+                "fingerprint_ms": round(statistics.median(times) * 1000, 3),
+            })
+        torch_results = run_torch_cases(scanner, tmp, args.filler)
+        header_results = run_header_cases(scanner, tmp)
+        speed_results = run_header_speed(scanner, args.rounds)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    checked = results + torch_results + header_results
+    failed = [r["name"] for r in checked if not r["ok"]]
+    failed += [f"header_speed_{r['header_bytes']}" for r in speed_results if not r["ok"]]
+    return {
+        "benchmark": "fingerprint",
+        "cases": len(checked),
+        "passed": len(checked) - len(failed),
+        "failed": failed,
+        "fingerprint_ms_p50": round(statistics.median(r["fingerprint_ms"] for r in results), 3),
+        "fingerprint_ms_max": max(r["fingerprint_ms"] for r in results),
+        "results": results,
+        "torch_results": torch_results,
+        "header_results": header_results,
+        "header_speed": speed_results,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ComfyDash architecture fingerprint check")
+    ap.add_argument("--filler", type=int, default=2000, help="Extra tensor entries per checkpoint header (default 2000)")
+    ap.add_argument("--rounds", type=int, default=20, help="Timing rounds per header (default 20)")
+    args = ap.parse_args(argv)
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
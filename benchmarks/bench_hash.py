@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComfyDash SHA-256 benchmark
+- Writes a test file (default 1 GB, non-sparse) and hashes it with the old read loop
+  (f.read of 1 MB chunks, a new bytes object each) and with the scanner's sha256_file
+  (readinto one reused buffer per thread), which the server's hash cache uses.
+- Hashes it once more through an IOThrottle at --cap MB/s and reports how close the
+  achieved rate comes to the cap (the hash sweep's I/O limit).
+- The page cache stays warm after the first pass, so the numbers are the CPU side of
+  hashing; --drop-caches (Linux, root) makes every pass read from disk.
+- Output: JSON on stdout, so runs can be compared over time.
+
+    python benchmarks/bench_hash.py --size 2G --repeat 3 --cap 200
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import mini_server  # noqa: E402
+
+
+def parse_size(text: str) -> int:
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper()
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def drop_caches() -> bool:
+    """Best effort: flush the page cache so the next pass really reads from disk (Linux, root only)."""
+    try:
+        os.sync()
+        Path("/proc/sys/vm/drop_caches").write_text("3\n")
+        return True
+    except OSError:
+        return False
+
+
+def read_loop_sha256(path: Path, chunk: int = 1024 * 1024) -> str:
+    """Reference: how files used to be hashed (f.read per 1 MB chunk)."""
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        while True:
+            data = f.read(chunk)
+            if not data:
+                break
+            h.update(data)
+    return h.hexdigest().upper()
+
+
+def timed(fn, path: Path, repeat: int, cold: bool) -> tuple[str, dict]:
+    times = []
+    digest = ""
+    for _ in range(repeat):
+        if cold:
+            drop_caches()
+        t0 = time.perf_counter()
+        digest = fn(path)
+        times.append(time.perf_counter() - t0)
+    size_mb = path.stat().st_size / 1_000_000
+    best = statistics.median(times)
+    return digest, {"s_p50": round(best, 3), "mb_per_s": round(size_mb / best, 1)}
+
+
+def run(args) -> dict:
+    scanner, _ = mini_server._load_scanner_module()
+    tmp = Path(tempfile.mkdtemp(prefix="comfydash-bench-hash-"))
+    try:
+        path = tmp / "model.safetensors"
+        block = os.urandom(16 * 1024 * 1024)
+        with path.open("wb") as f:
+            left = args.size
+            while left > 0:
+                f.write(block[:min(left, len(block))])
+                left -= len(block)
+        cold = args.drop_caches and drop_caches()
+
+        old_digest, old = timed(read_loop_sha256, path, args.repeat, cold)
+        new_digest, new = timed(scanner.sha256_file, path, args.repeat, cold)
+        assert old_digest == new_digest
+
+        throttle = mini_server.IOThrottle(args.cap)
+        t0 = time.perf_counter()
+        scanner.sha256_file(path, throttle=throttle)
+        elapsed = time.perf_counter() - t0
+        return {
+            "benchmark": "hash",
+            "python": sys.version.split()[0],
+            "file_bytes": args.size,
+            "cold": cold,
+            "buffer_bytes": scanner.HASH_CHUNK,
+            "f_read_1mb": old,
+            "readinto_reused_buffer": new,
+            "autov2": mini_server.autov2(new_digest),
+            "throttled": {
+                "cap_mb_per_s": args.cap,
+                "achieved_mb_per_s": round(args.size / 1_000_000 / elapsed, 1),
+                "waited_s": round(throttle.waited, 3),
+            },
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ComfyDash SHA-256 benchmark")
+    ap.add_argument("--size", type=parse_size, default=parse_size("1G"), help="Test file size, e.g. 2G (default 1G)")
+    ap.add_argument("--repeat", type=int, default=3, help="Hash passes per method (default 3)")
+    ap.add_argument("--cap", type=float, default=200.0, help="MB/s cap for the throttled pass (default 200)")
+    ap.add_argument("--drop-caches", action="store_true", help="Drop the OS page cache before each pass (root)")
+    args = ap.parse_args(argv)
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComfyDash scanner benchmark
+- Generates a synthetic ComfyUI root: sparse multi-GB checkpoints, LoRAs with
+  realistic kohya __metadata__ (incl. large ss_tag_frequency blobs), embeddings
+  and nested subfolders.
+- Times cold, warm and incremental scans per worker count with the scanner's
+  per-phase breakdown (walk, stat, sampling, header parse, sort, JSON write)
+  and peak Python heap (tracemalloc, measured in a separate pass; streamed to a file
+  vs. the whole catalog built in memory).
+- Output: JSON on stdout, so regressions can be compared run over run.
+
+    python benchmarks/bench_scan.py --checkpoints 20 --loras 2000 --embeddings 200 --workers 1,4
+    python benchmarks/bench_scan.py --root F:/AI/ComfyUI      # benchmark a real library instead
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import struct
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+WORDS = ["anime", "realistic", "portrait", "style", "detail", "cyber", "dream", "epic", "photo", "sketch",
+         "ink", "neon", "fantasy", "castle", "armor", "lineart", "watercolor", "noir", "pastel", "chibi"]
+TAGS = ["1girl", "solo", "smile", "long hair", "blue eyes", "outdoors", "night", "city", "sword", "hat",
+        "red hair", "masterpiece", "best quality", "dress", "flower", "sky", "cloud", "tree", "water", "cat",
+        "looking at viewer", "simple background", "white background", "upper body", "short hair", "jewelry"]
+
+
+def load_scanner():
+    """Load scanner/main.py the same way mini_server does."""
+    for scanner_py in (BASE_DIR / "Scanner" / "main.py", BASE_DIR / "scanner" / "main.py"):
+        if scanner_py.exists():
+            spec = importlib.util.spec_from_file_location("comfydash_scanner", str(scanner_py))
+            mod = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(mod)  # type: ignore[union-attr]
+            return mod
+    raise RuntimeError("scanner/main.py not found")
+
+
+# ---------------- synthetic tree -----------------
+
+def parse_size(text: str) -> int:
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper()
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def write_safetensors(path: Path, metadata: dict | None, tensors: dict, size: int = 0):
+    """Valid safetensors header; the payload is sparse (truncate) up to `size` bytes."""
+    header: dict = {}
+    if metadata is not None:
+        header["__metadata__"] = metadata
+    offset = 0
+    for key, (dtype, shape) in tensors.items():
+        n = 2
+        for d in shape:
+            n *= d
+        header[key] = {"dtype": dtype, "shape": shape, "data_offsets": [offset, offset + n]}
+        offset += n
+    raw = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        f.write(struct.pack("<Q", len(raw)))
+        f.write(raw)
+        f.write(os.urandom(4096))
+        f.truncate(max(size, 8 + len(raw) + 4096))
+        # real tail bytes, so fast_id's tail sample is not all zeros
+        f.seek(0, os.SEEK_END)
+        f.write(os.urandom(4096))
+
+
+def lora_tensors(rnd: random.Random, blocks: int) -> dict:
+    tensors = {}
+    for b in range(blocks):
+        for part in ("attn1_to_q", "attn1_to_k", "attn1_to_v", "attn2_to_out_0"):
+            base = f"lora_unet_input_blocks_{b}_1_transformer_blocks_0_{part}"
+            rank = rnd.choice((4, 8, 16, 32))
+            tensors[f"{base}.lora_down.weight"] = ("F16", [rank, 640])
+            tensors[f"{base}.lora_up.weight"] = ("F16", [640, rank])
+            tensors[f"{base}.alpha"] = ("F16", [])
+    return tensors
+
+
+def lora_metadata(rnd: random.Random, tag_count: int) -> dict:
+    datasets = {}
+    for d in range(rnd.randint(1, 3)):
+        tags = {f"{rnd.choice(TAGS)} {i}" if i >= len(TAGS) else TAGS[i]: rnd.randint(1, 400)
+                for i in range(tag_count)}
+        datasets[f"{rnd.randint(2, 20)}_{rnd.choice(WORDS)}"] = tags
+    return {
+        "ss_base_model_version": rnd.choice(["sd_v1", "sdxl_base_v1-0", "sd_v2"]),
+        "ss_sd_model_name": rnd.choice(["v1-5-pruned-emaonly.safetensors", "sd_xl_base_1.0.safetensors"]),
+        "ss_training_comment": f"trigger word: {rnd.choice(WORDS)}_style, trained on {rnd.randint(20, 400)} images",
+        "ss_tag_frequency": json.dumps(datasets),
+        "ss_network_dim": str(rnd.choice((4, 8, 16, 32))),
+        "ss_network_alpha": "1.0",
+        "ss_learning_rate": "0.0001",
+        "ss_num_train_images": str(rnd.randint(20, 400)),
+        "ss_resolution": "(1024, 1024)",
+        "ss_output_name": rnd.choice(WORDS),
+    }
+
+
+def generate_tree(root: Path, checkpoints: int, checkpoint_size: int, loras: int, embeddings: int,
+                  depth: int, tag_count: int, seed: int = 1) -> dict:
+    rnd = random.Random(seed)
+    t0 = time.perf_counter()
+    apparent = 0
+
+    def nested(base: Path) -> Path:
+        parts = [rnd.choice(WORDS) for _ in range(rnd.randint(0, depth))]
+        return base.joinpath(*parts)
+
+    for i in range(checkpoints):
+        path = nested(root / "models" / "checkpoints") / f"{rnd.choice(WORDS)}_{i}.safetensors"
+        tensors = {f"model.diffusion_model.input_blocks.{b}.0.weight": ("F16", [320, 320, 3, 3]) for b in range(200)}
+        write_safetensors(path, {"modelspec.title": path.stem}, tensors, checkpoint_size)
+        apparent += path.stat().st_size
+    for i in range(loras):
+        path = nested(root / "models" / "loras") / f"{rnd.choice(WORDS)}_{rnd.choice(WORDS)}_{i}.safetensors"
+        write_safetensors(path, lora_metadata(rnd, tag_count), lora_tensors(rnd, rnd.randint(4, 24)),
+                          rnd.randint(2, 200) * 1024 * 1024)
+        apparent += path.stat().st_size
+    for i in range(embeddings):
+        folder = nested(root / "models" / "embeddings")
+        if i % 2:
+            path = folder / f"emb_{i}.safetensors"
+            write_safetensors(path, None, {"emb_params": ("F32", [rnd.randint(1, 16), 768])})
+        else:
+            path = folder / f"emb_{i}.pt"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"PK\x03\x04" + os.urandom(rnd.randint(4, 64) * 1024))
+        apparent += path.stat().st_size
+
+    return {
+        "checkpoints": checkpoints,
+        "loras": loras,
+        "embeddings": embeddings,
+        "apparent_bytes": apparent,
+        "generate_s": round(time.perf_counter() - t0, 3),
+    }
+
+
+# ---------------- measurements -----------------
+
+def drop_caches() -> bool:
+    """Best effort: flush the page cache so the next scan is really cold (Linux, root only)."""
+    try:
+        os.sync()
+        Path("/proc/sys/vm/drop_caches").write_text("3\n")
+        return True
+    except OSError:
+        return False
+
+
+def timed_scan(scanner, root: Path, output: Path, workers: int, incremental: bool, label: str) -> dict:
+    stats: dict = {}
+    t0 = time.perf_counter()
+    catalog = scanner.scan(root, output, incremental=incremental, workers=workers, stats=stats)
+    wall = time.perf_counter() - t0
+    run = {
+        "label": label,
+        "workers": workers,
+        "wall_s": round(wall, 4),
+        "items": catalog["count"],
+        "files_per_s": round(catalog["count"] / wall, 1) if wall > 0 else None,
+        "bytes_sampled": stats.get("bytes_sampled", 0),
+        "phases": {k: round(stats.get(k, 0.0), 4) for k in scanner.PHASES},
+    }
+    if incremental:
+        run["incremental"] = catalog.get("incremental")
+    return run
+
+
+def peak_memory(scanner, root: Path, output: Path | None, workers: int) -> int:
+    """Peak Python heap of one full scan; output=None builds the whole catalog in memory."""
+    tracemalloc.start()
+    try:
+        scanner.scan(root, output, workers=workers)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(args) -> dict:
+    scanner = load_scanner()
+    tmp = None
+    if args.root:
+        root = Path(args.root).expanduser().resolve()
+        tree = {"root": str(root), "synthetic": False}
+    else:
+        tmp = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="comfydash-bench-"))
+        root = tmp / "ComfyUI"
+        if not root.exists():
+            tree = generate_tree(root, args.checkpoints, parse_size(args.checkpoint_size), args.loras,
+                                 args.embeddings, args.depth, args.tags)
+        else:
+            tree = {"reused_tree": True}
+        tree.update({"root": str(root), "synthetic": True})
+
+    out_dir = Path(tempfile.mkdtemp(prefix="comfydash-bench-out-"))
+    try:
+        runs = []
+        for workers in args.workers:
+            output = out_dir / f"catalog-w{workers}.json"
+            cold_ok = drop_caches() if args.drop_caches else False
+            runs.append(timed_scan(scanner, root, output, workers, False, "cold" if cold_ok else "first"))
+            for _ in range(args.repeat):
+                runs.append(timed_scan(scanner, root, output, workers, False, "warm"))
+            runs.append(timed_scan(scanner, root, output, workers, True, "incremental"))
+            runs[-1]["peak_py_heap_bytes"] = peak_memory(scanner, root, out_dir / "mem.json", workers)
+            runs[-1]["peak_py_heap_bytes_in_memory"] = peak_memory(scanner, root, None, workers)
+        return {
+            "benchmark": "scan",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tree": tree,
+            "runs": runs,
+        }
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        if tmp is not None and not args.keep:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ComfyDash scanner benchmark")
+    ap.add_argument("--root", help="Benchmark an existing ComfyUI root instead of a synthetic tree")
+    ap.add_argument("--keep", help="Generate (or reuse) the synthetic tree in this folder and keep it")
+    ap.add_argument("--checkpoints", type=int, default=10, help="Sparse checkpoints (default 10)")
+    ap.add_argument("--checkpoint-size", default="6G", help="Apparent checkpoint size, e.g. 2G (default 6G)")
+    ap.add_argument("--loras", type=int, default=500, help="LoRAs (default 500)")
+    ap.add_argument("--embeddings", type=int, default=100, help="Embeddings (default 100)")
+    ap.add_argument("--depth", type=int, default=2, help="Max. nested subfolder depth (default 2)")
+    ap.add_argument("--tags", type=int, default=800, help="Tags per ss_tag_frequency dataset (default 800)")
+    ap.add_argument("--workers", default="1,4", help="Comma-separated worker counts (default 1,4)")
+    ap.add_argument("--repeat", type=int, default=2, help="Warm scans per worker count (default 2)")
+    ap.add_argument("--drop-caches", action="store_true", help="Drop the OS page cache before each cold scan (root)")
+    args = ap.parse_args(argv)
+    args.workers = [int(w) for w in args.workers.split(",") if w.strip()]
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
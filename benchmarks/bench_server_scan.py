@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComfyDash /scan latency benchmark
+- Starts mini_server.py on a free port and sends repeated POST /scan requests
+  (full and incremental, { data: false }) for a synthetic tree (bench_scan.py's
+  generator) or an existing ComfyUI root.
+- The scanner module stays resident in the server: only the first request pays
+  for loading it. For comparison the script times what every request used to
+  cost on top: executing scanner/main.py again, and a scan through the scanner
+  CLI in a fresh Python process (the old fallback after a failed scan).
+- Output: JSON on stdout, so runs can be compared over time.
+
+    python benchmarks/bench_server_scan.py --loras 500 --calls 10
+    python benchmarks/bench_server_scan.py --root F:/AI/ComfyUI
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import importlib.util
+import json
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_module(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(name, str(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)  # type: ignore[union-attr]
+    return mod
+
+
+def scanner_path() -> Path:
+    for scanner_py in (BASE_DIR / "Scanner" / "main.py", BASE_DIR / "scanner" / "main.py"):
+        if scanner_py.exists():
+            return scanner_py
+    raise RuntimeError("scanner/main.py not found")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request(port: int, method: str, path: str, body: dict | None = None) -> tuple[dict, float]:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+    try:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        t0 = time.perf_counter()
+        conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        data = json.loads(resp.read())
+        return data, time.perf_counter() - t0
+    finally:
+        conn.close()
+
+
+def wait_ready(port: int, proc: subprocess.Popen, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("mini_server.py exited during startup")
+        try:
+            request(port, "GET", "/health")
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("mini_server.py did not come up")
+
+
+def summarize(label: str, times: list[float], counts: list[int]) -> dict:
+    rest = times[1:] or times
+    return {
+        "label": label,
+        "calls": len(times),
+        "items": counts[-1] if counts else 0,
+        "first_ms": round(times[0] * 1000, 2),
+        "p50_ms": round(statistics.median(rest) * 1000, 2),
+        "min_ms": round(min(rest) * 1000, 2),
+        "max_ms": round(max(rest) * 1000, 2),
+    }
+
+
+def run(args) -> dict:
+    scanner_py = scanner_path()
+    tmp = Path(tempfile.mkdtemp(prefix="comfydash-bench-srv-"))
+    proc = None
+    try:
+        if args.root:
+            root = Path(args.root).expanduser().resolve()
+            tree = {"root": str(root), "synthetic": False}
+        else:
+            bench_scan = load_module("bench_scan", Path(__file__).resolve().parent / "bench_scan.py")
+            root = tmp / "ComfyUI"
+            tree = bench_scan.generate_tree(root, args.checkpoints, bench_scan.parse_size("2G"), args.loras,
+                                            args.embeddings, 2, args.tags)
+            tree.update({"root": str(root), "synthetic": True})
+        output = tmp / "catalog.json"
+
+        # What every /scan used to pay before scanning: executing scanner/main.py again
+        exec_times = []
+        for i in range(args.calls):
+            t0 = time.perf_counter()
+            load_module(f"comfydash_scanner_{i}", scanner_py)
+            exec_times.append(time.perf_counter() - t0)
+
+        # ... and after any exception: the whole scan again through the CLI
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, str(scanner_py), "--root", str(root), "--output", str(tmp / "cli.json"),
+                        "--workers", str(args.workers)], check=True, capture_output=True)
+        cli_s = time.perf_counter() - t0
+
+        port = free_port()
+        proc = subprocess.Popen([sys.executable, str(BASE_DIR / "mini_server.py"), "--port", str(port), "--strict"],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wait_ready(port, proc)
+
+        runs = []
+        for incremental in (False, True):
+            times, counts = [], []
+            for _ in range(args.calls):
+                data, elapsed = request(port, "POST", "/scan", {
+                    "root": str(root), "output": str(output), "incremental": incremental,
+                    "workers": args.workers, "data": False,
+                })
+                if not data.get("ok"):
+                    raise RuntimeError(f"/scan failed: {data.get('error')}")
+                times.append(elapsed)
+                counts.append(data.get("count", 0))
+            runs.append(summarize("incremental" if incremental else "full", times, counts))
+
+        health, _ = request(port, "GET", "/health")
+        return {
+            "benchmark": "server_scan",
+            "python": sys.version.split()[0],
+            "tree": tree,
+            "runs": runs,
+            "scanner": health.get("scanner"),
+            "module_exec_ms_p50": round(statistics.median(exec_times) * 1000, 2),
+            "cli_scan_s": round(cli_s, 4),
+        }
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ComfyDash /scan latency benchmark")
+    ap.add_argument("--root", help="Scan an existing ComfyUI root instead of a synthetic tree")
+    ap.add_argument("--checkpoints", type=int, default=5, help="Sparse checkpoints (default 5)")
+    ap.add_argument("--loras", type=int, default=300, help="LoRAs (default 300)")
+    ap.add_argument("--embeddings", type=int, default=50, help="Embeddings (default 50)")
+    ap.add_argument("--tags", type=int, default=200, help="Tags per ss_tag_frequency dataset (default 200)")
+    ap.add_argument("--workers", type=int, default=4, help="Scanner workers per request (default 4)")
+    ap.add_argument("--calls", type=int, default=10, help="/scan requests per mode (default 10)")
+    args = ap.parse_args(argv)
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComfyDash tag index benchmark
+- Top-N extraction from a large synthetic ss_tag_frequency blob: the scanner's
+  heap-based extract_top_tags() vs. merge + full sort.
+- Builds the scanner's TagIndex for a synthetic library (default 30k LoRAs with
+  realistic tag distributions), writes catalog.tags.json next to a matching
+  catalog and times GET /tags style lookups against mini_server.TagStore.
+- Output: JSON on stdout, so runs can be compared over time.
+
+    python benchmarks/bench_tags.py --loras 30000 --repeat 50
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import mini_server  # noqa: E402
+
+WORDS = ["anime", "realistic", "portrait", "style", "detail", "cyber", "dream", "epic", "photo", "sketch",
+         "ink", "neon", "fantasy", "castle", "armor", "lineart", "watercolor", "noir", "pastel", "chibi"]
+TAGS = ["1girl", "solo", "smile", "long hair", "blue eyes", "outdoors", "night", "city", "sword", "hat",
+        "red hair", "masterpiece", "best quality", "dress", "flower", "sky", "cloud", "tree", "water", "cat",
+        "looking at viewer", "simple background", "white background", "upper body", "short hair", "jewelry"]
+
+
+def vocabulary(size: int, rnd: random.Random) -> list[str]:
+    vocab = list(TAGS)
+    while len(vocab) < size:
+        vocab.append(f"{rnd.choice(WORDS)} {rnd.choice(TAGS)} {len(vocab)}")
+    return vocab
+
+
+def tag_frequency(rnd: random.Random, vocab: list[str], tags: int) -> str:
+    """ss_tag_frequency as kohya writes it: {dataset: {tag: count}}, Zipf-like tag popularity."""
+    datasets = {}
+    for d in range(rnd.randint(1, 3)):
+        counts = {}
+        for _ in range(tags):
+            tag = vocab[min(int(rnd.paretovariate(1.1)) - 1, len(vocab) - 1)] if rnd.random() < 0.5 \
+                else rnd.choice(vocab)
+            counts[tag] = rnd.randint(1, 400)
+        datasets[f"{rnd.randint(2, 20)}_{rnd.choice(WORDS)}"] = counts
+    return json.dumps(datasets)
+
+
+def full_sort_top_tags(tag_frequency_str: str, top_n: int = 15) -> str | None:
+    """Reference: merge all datasets and sort everything (how top tags used to be extracted)."""
+    all_tags: dict = {}
+    for category_tags in json.loads(tag_frequency_str).values():
+        if isinstance(category_tags, dict):
+            for tag, count in category_tags.items():
+                all_tags[tag] = all_tags.get(tag, 0) + count
+    top = [tag for tag, _ in sorted(all_tags.items(), key=lambda x: x[1], reverse=True)[:top_n]]
+    return ", ".join(top) if top else None
+
+
+def median_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return round(statistics.median(times) * 1000, 3)
+
+
+def run(args) -> dict:
+    rnd = random.Random(7)
+    scanner, _ = mini_server._load_scanner_module()
+    vocab = vocabulary(args.vocab, rnd)
+
+    blob = tag_frequency(rnd, vocab, args.blob_tags)
+    assert scanner.extract_top_tags(blob) == full_sort_top_tags(blob)
+    extract = {
+        "blob_bytes": len(blob),
+        "heap_ms": median_ms(lambda: scanner.extract_top_tags(blob), args.repeat),
+        "full_sort_ms": median_ms(lambda: full_sort_top_tags(blob), args.repeat),
+    }
+
+    tmp = Path(tempfile.mkdtemp(prefix="comfydash-bench-tags-"))
+    try:
+        catalog_path = tmp / "catalog.json"
+        index = scanner.TagIndex()
+        items = []
+        t0 = time.perf_counter()
+        for i in range(args.loras):
+            counts = scanner.tag_frequency_counts(tag_frequency(rnd, vocab, rnd.randint(20, args.tags)))
+            top = scanner.most_frequent_tags(counts, scanner.TAG_INDEX_TOP)
+            item = {"id": f"{i:032x}", "type": "lora", "name": f"lora_{i}",
+                    "path": f"/models/loras/lora_{i}.safetensors", "size": 1, "base": "sdxl", "mtime": 0,
+                    "trigger": f"{rnd.choice(WORDS)}_style"}
+            index.add_tags(item["id"], top)
+            index.add_item(item)
+            items.append(item)
+        build_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index.write(scanner.tag_index_path(catalog_path))
+        write_s = time.perf_counter() - t0
+        catalog_path.write_text(json.dumps(scanner.make_catalog(tmp, items)), encoding="utf-8")
+
+        store = mini_server.TagStore(mini_server.CatalogStore(catalog_path))
+        t0 = time.perf_counter()
+        info = store.info()
+        load_s = time.perf_counter() - t0
+        store.catalog.items_by_id([])  # build the id map outside the timed queries
+
+        rare = store.current()["names"][len(store.current()["names"]) // 2]
+        queries = [
+            ("index freshness check (stat of catalog.tags.json)", store.current),
+            ("tag=1girl (most common)", lambda: store.by_tag("1girl", 0, mini_server.TAGS_PAGE_SIZE)),
+            (f"tag={rare} (rare)", lambda: store.by_tag(rare, 0, mini_server.TAGS_PAGE_SIZE)),
+            ("tag=1girl, deep page", lambda: store.by_tag("1girl", 5000, mini_server.TAGS_PAGE_SIZE)),
+            ("trigger=anime_style", lambda: store.by_trigger("anime_style", 0, mini_server.TAGS_PAGE_SIZE)),
+            ("q=long (prefix)", lambda: store.search("long", mini_server.TAGS_PAGE_SIZE)),
+            ("top tags", lambda: store.top(mini_server.TAGS_PAGE_SIZE)),
+        ]
+        results = [{"label": label, "ms_p50": median_ms(fn, args.repeat)} for label, fn in queries]
+        size = scanner.tag_index_path(catalog_path).stat().st_size
+        return {
+            "benchmark": "tags",
+            "extract_top_tags": extract,
+            "index": {**info, "build_s": round(build_s, 3), "write_s": round(write_s, 3),
+                      "load_s": round(load_s, 3), "file_bytes": size},
+            "queries": results,
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ComfyDash tag index benchmark")
+    ap.add_argument("--loras", type=int, default=30000, help="Synthetic LoRAs (default 30000)")
+    ap.add_argument("--tags", type=int, default=300, help="Max. tags per LoRA dataset (default 300)")
+    ap.add_argument("--vocab", type=int, default=20000, help="Distinct tags overall (default 20000)")
+    ap.add_argument("--blob-tags", type=int, default=4000, help="Tags per dataset of the extraction blob (default 4000)")
+    ap.add_argument("--repeat", type=int, default=20, help="Timing rounds per measurement (default 20)")
+    args = ap.parse_args(argv)
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
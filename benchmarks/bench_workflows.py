@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComfyDash workflow reference benchmark
+- Writes a synthetic catalog (default 30k models across checkpoints/loras/embeddings/...,
+  nested subfolders) and a folder of UI-format workflows whose loader nodes and prompts
+  reference those models: most by their exact relative path, some from another
+  subfolder, some missing.
+- Times GET /workflows style reports through mini_server.WorkflowStore (first report
+  parses every file, later ones reuse the parsed references) and resolving all
+  references through the ModelRefIndex vs. a linear search over the catalog per reference.
+- Output: JSON on stdout, so runs can be compared over time.
+
+    python benchmarks/bench_workflows.py --items 30000 --workflows 500
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import mini_server  # noqa: E402
+
+FOLDERS = {"checkpoint": "checkpoints", "lora": "loras", "embedding": "embeddings", "vae": "vae", "unet": "unet"}
+WEIGHTS = {"checkpoint": 0.15, "lora": 0.6, "embedding": 0.15, "vae": 0.05, "unet": 0.05}
+SUBFOLDERS = ["", "", "SDXL", "Pony", "IL", "SD15/styles", "Flux", "Realistisch"]
+WORDS = ["anime", "realistic", "portrait", "style", "detail", "cyber", "dream", "epic", "photo", "sketch"]
+
+
+def catalog_items(rnd: random.Random, root: Path, count: int) -> list[dict]:
+    items = []
+    kinds, weights = list(WEIGHTS), list(WEIGHTS.values())
+    for i in range(count):
+        kind = rnd.choices(kinds, weights)[0]
+        name = f"{rnd.choice(WORDS)}_{rnd.choice(WORDS)}_v{i}"
+        rel = "/".join(part for part in (rnd.choice(SUBFOLDERS), f"{name}.safetensors") if part)
+        items.append({"id": f"{i:032x}", "type": kind, "name": name, "size": 1, "base": "sdxl", "mtime": 0,
+                      "path": str(root / "models" / FOLDERS[kind] / rel), "rel": rel})
+    return items
+
+
+def workflow(rnd: random.Random, items: list[dict], refs: int) -> tuple[dict, list[tuple[str, str]]]:
+    """UI-format workflow with ``refs`` model references; returns it with its (kind, ref) list."""
+    nodes, wanted = [], []
+    for node_id in range(refs):
+        it = rnd.choice(items)
+        roll = rnd.random()
+        if roll < 0.1:
+            ref = f"missing_{rnd.randint(0, 10 ** 6)}.safetensors"
+        elif roll < 0.2:
+            ref = "Elsewhere\\" + it["rel"].rsplit("/", 1)[-1]  # right file name, other subfolder
+        else:
+            ref = it["rel"].replace("/", "\\") if rnd.random() < 0.5 else it["rel"]
+        if it["type"] == "embedding":
+            stem = ref.rsplit(".", 1)[0]
+            nodes.append({"id": node_id, "type": "CLIPTextEncode", "mode": 0,
+                          "widgets_values": [f"masterpiece, (embedding:{stem}:1.1), 1girl"]})
+            wanted.append(("embedding", stem))
+            continue
+        node_type = {"checkpoint": "CheckpointLoaderSimple", "lora": "LoraLoader", "vae": "VAELoader",
+                     "unet": "UNETLoader"}[it["type"]]
+        nodes.append({"id": node_id, "type": node_type, "mode": 0, "widgets_values": [ref, 1.0, 1.0]})
+        wanted.append((it["type"], ref))
+    return {"last_node_id": refs, "nodes": nodes, "links": [], "version": 0.4}, wanted
+
+
+def linear_resolve(items: list[dict], folders, kind: str, ref: str):
+    """Reference: walk the whole catalog for one reference (what the index avoids)."""
+    key = mini_server._model_ref_key(ref)
+    by_name = []
+    for it in items:
+        if it.get("type") != kind:
+            continue
+        parts = mini_server._model_ref_key(it["path"]).split("/")
+        start = max((i + 1 for i, part in enumerate(parts[:-1]) if part in folders), default=len(parts) - 1)
+        if key in mini_server._model_ref_keys("/".join(parts[start:])):
+            return "path"
+        if key.rpartition("/")[2] in mini_server._model_ref_keys(parts[-1]):
+            by_name.append(it)
+    return "name" if by_name else None
+
+
+def median_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return round(statistics.median(times) * 1000, 3)
+
+
+def run(args) -> dict:
+    rnd = random.Random(11)
+    scanner, _ = mini_server._load_scanner_module()
+    folders = {folder.casefold() for folder in scanner.COMFY_FOLDER_KINDS}
+    tmp = Path(tempfile.mkdtemp(prefix="comfydash-bench-wf-"))
+    try:
+        root = tmp / "ComfyUI"
+        items = catalog_items(rnd, root, args.items)
+        catalog_path = tmp / "catalog.json"
+        catalog_path.write_text(json.dumps({"schema": "comfydash/catalog@1", "generated_at": "", "comfyui_root": "",
+                                            "count": len(items), "items": items}), encoding="utf-8")
+        wf_dir = tmp / "Workflows"
+        wf_dir.mkdir()
+        refs = []
+        for i in range(args.workflows):
+            data, wanted = workflow(rnd, items, args.refs)
+            (wf_dir / f"workflow_{i:04d}.json").write_text(json.dumps(data), encoding="utf-8")
+            refs.extend(wanted)
+
+        store = mini_server.WorkflowStore(mini_server.CatalogStore(catalog_path))
+        store.dirs = [wf_dir]
+        t0 = time.perf_counter()
+        report = store.report()
+        first_s = time.perf_counter() - t0
+        warm_ms = median_ms(store.report, args.repeat)
+
+        index = store._model_index()
+        t0 = time.perf_counter()
+        mini_server.ModelRefIndex(items, index.version, scanner.COMFY_FOLDER_KINDS)
+        build_s = time.perf_counter() - t0
+
+        sample = refs[:args.linear_refs]
+        for kind, ref in sample:
+            assert index.resolve(kind, ref)[0] == linear_resolve(items, folders, kind, ref), (kind, ref)
+        index_ms = median_ms(lambda: [index.resolve(kind, ref) for kind, ref in refs], args.repeat)
+        t0 = time.perf_counter()
+        for kind, ref in sample:
+            linear_resolve(items, folders, kind, ref)
+        linear_s = time.perf_counter() - t0
+        return {
+            "benchmark": "workflows",
+            "python": sys.version.split()[0],
+            "catalog_items": len(items),
+            "workflows": args.workflows,
+            "references": len(refs),
+            "report": {k: report[k] for k in ("count", "references", "present", "missing", "errors")},
+            "first_report_s": round(first_s, 3),
+            "cached_report_ms_p50": warm_ms,
+            "index_build_s": round(build_s, 3),
+            "resolve_all_index_ms_p50": index_ms,
+            "resolve_per_ref_index_us": round(index_ms * 1000 / max(len(refs), 1), 3),
+            "resolve_per_ref_linear_us": round(linear_s * 1e6 / max(len(sample), 1), 1),
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ComfyDash workflow reference benchmark")
+    ap.add_argument("--items", type=int, default=30000, help="Catalog models (default 30000)")
+    ap.add_argument("--workflows", type=int, default=500, help="Workflow files (default 500)")
+    ap.add_argument("--refs", type=int, default=12, help="Model references per workflow (default 12)")
+    ap.add_argument("--linear-refs", type=int, default=200, help="References resolved by linear search (default 200)")
+    ap.add_argument("--repeat", type=int, default=5, help="Timing rounds per measurement (default 5)")
+    args = ap.parse_args(argv)
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -90,6 +90,8 @@ export default function App() {
   // data
   const [items, setItems] = useState([]);
   const [meta, setMeta] = useState({ comfyui_root: "", count: 0 });
+  // server catalog version the items correspond to ({ version, epoch }) -> rescans only fetch changes
+  const catalogVersion = useRef(null);
   const [loading, setLoading] = useState(false);
   
   // ComfyUI launch
@@ -212,6 +214,15 @@ export default function App() {
     const normalized = (data.items || []).map(normalizeItem);
     setItems(normalized);
     setMeta({ comfyui_root: data.comfyui_root || "", count: normalized.length });
+    catalogVersion.current = data.version != null ? { version: data.version, epoch: data.epoch } : null;
+  };
+
+  // apply a GET /catalog/changes delta (added/modified replace items with the same path)
+  const applyChanges = (changes) => {
+    const upserts = [...changes.added, ...changes.modified].map(normalizeItem);
+    const gone = new Set([...changes.removed, ...upserts.map(it => it.path)]);
+    setItems(prev => prev.filter(it => !gone.has(it.path)).concat(upserts));
+    setMeta({ comfyui_root: changes.comfyui_root || "", count: changes.count });
   };
 
   // detect API
@@ -238,14 +249,30 @@ export default function App() {
     if (!scanRoot) { alert("Please specify ComfyUI root!"); return; }
     try {
       setScanning(true);
+      // Deltas only work for the server's own catalog (no custom output file)
+      const known = !scanOut ? catalogVersion.current : null;
       const res = await fetch(`${apiBase}/scan`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ root: scanRoot, output: scanOut || undefined }),
+        body: JSON.stringify({ root: scanRoot, output: scanOut || undefined, ...(known ? { data: false } : {}) }),
       });
       const payload = await res.json().catch(() => ({}));
       if (!res.ok) throw new Error(payload?.error || `HTTP ${res.status}`);
-      ingest(payload.data || payload);
+      if (known && !payload.data) {
+        // no-cache: the browser revalidates with If-None-Match and gets a 304 if nothing changed
+        const r = await fetch(`${apiBase}/catalog/changes?since=${known.version}&epoch=${known.epoch}`, { cache: "no-cache" });
+        const changes = await r.json();
+        if (!r.ok || !changes.ok) throw new Error(changes?.error || `HTTP ${r.status}`);
+        if (changes.data.reset) {
+          const full = await fetch(`${apiBase}/catalog`, { cache: "no-cache" }).then(r => r.json());
+          ingest(full.data);
+        } else {
+          applyChanges(changes.data);
+        }
+      } else {
+        ingest(payload.data || payload);
+      }
+      if (payload.version != null) catalogVersion.current = { version: payload.version, epoch: payload.epoch };
     } catch (e) {
       alert("Scan failed: " + e.message);
     } finally { setScanning(false); }
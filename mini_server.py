@@ -1,11 +1,11 @@
-# mini_server.py — ComfyDash Mini-API (v1.3.1)
+# mini_server.py — ComfyDash Mini-API (v1.4)
 # Features
 # - GET  /health  -> { ok, ts, host, port }
-# - POST /scan    -> body { root, output? } -> { ok, data, warning? }
+# - POST /scan    -> body { root, output?, incremental?, workers? } -> { ok, data, warning? }
 # - GET  /comfyui/status -> check if ComfyUI is running
 # - POST /comfyui/start  -> start ComfyUI process
 # - CORS + OPTIONS support
-# - Robust scanner invocation: import Scanner/main.py OR CLI fallback
+# - Robust scanner invocation: import Scanner/main.py (resident since v1.4, see below)
 # - Auto-port selection: tries desired port (default 8000), then 8001..8019 unless --strict
 # - v1.2 changes:
 #   * Default output: if "output" missing, write to <ComfyDash-Root>/catalog.json
@@ -16,24 +16,130 @@
 #   * ComfyUI launch support with conda environment option
 # - v1.3.1 changes:
 #   * Added /enrich-civitai endpoint back for hash-based CivitAI model lookup
+# - v1.4 changes:
+#   * Persistent SHA-256 cache (hash_cache.sqlite next to catalog.json), keyed on
+#     path + size + mtime_ns like the scanner's fast_id; GET /hash-cache -> hit/miss stats
+#   * POST /scan accepts "incremental": true -> reuse unchanged entries of the previous catalog
+#   * POST /scan accepts "workers": N -> scanner reads files with N threads
+#   * POST /scan/stream -> same body as /scan, NDJSON response: one {"type":"item"} record per
+#     file as it is scanned, periodic {"type":"progress"} records and a final {"type":"summary"}
+#   * Threaded server: cheap endpoints (/health, /comfyui/status, ...) answer while scans or hashes
+#     run; heavy endpoints share a bounded number of slots (--max-heavy-jobs, default 2)
+#   * POST /enrich-civitai/batch -> body { paths, workers? }: hashes files in parallel, looks them up
+#     over pooled keep-alive connections and streams one NDJSON result per file as it completes
+#   * --civitai-api URL -> alternative by-hash API base (e.g. a local stand-in server)
+#   * Background jobs: POST /jobs { kind: "scan"|"enrich", ... } -> job id right away,
+#     GET /jobs/{id} -> state, progress, throughput (files/s, MB/s) and result; GET /jobs lists them.
+#     A second submission for the same root (or path set) joins the running job.
+#   * GET /catalog -> current catalog from memory
+#   * GET /catalog?q=&type=&base=&sort=&offset=&limit= -> one page + total from an in-memory index
+#     (type/base/tag tokens/name trigrams); sort: name|size|mtime|type|base, "-" prefix = descending
+#   * --catalog PATH: where the catalog lives; "*.json.gz" stores it as gzip'd compact JSON.
+#     It is only read on first use. GET /catalog/export -> plain catalog@1 JSON
+#   * JSON responses >= 1 KB are gzip-compressed when the client sends Accept-Encoding: gzip
+#   * --watch ROOT [--watch-interval S]: keep catalog.json live via inotify (Linux) or directory-mtime
+#     polling; new/modified files are added once their size/mtime settle (debounced copies);
+#     its stats are in GET /health ("watch")
+#   * GET /metrics -> Prometheus text format: per-route latency histograms, scan phase timers
+#     (walk/stat/sample/parse/sort/write), files + bytes read, hash throughput, CivitAI call latency.
+#     POST /scan, /scan/stream and scan jobs accept "metrics": true -> phase breakdown in the response
+#   * Multi-root: the scanner also reads <root>/extra_model_paths.yaml (or "extra_model_paths": PATH,
+#     false = off) and the vae/controlnet/upscale_models/clip/unet folders; one scan thread per device,
+#     per-root stats in catalog["roots"]. The watcher covers the extra folders as well
+#   * GET /duplicates?root=&workers= (or POST /jobs { kind: "duplicates" }) -> clusters of identical model
+#     files with reclaimable bytes; size -> head/tail sample -> SHA-256 (via hash cache) only for candidates
+#   * Scans stream the catalog to disk while scanning (scanner CatalogWriter: spill file + one small sort
+#     tuple per item, temp file + rename); POST /scan sends that file back as "data" instead of
+#     serializing and writing the catalog a second time
+#   * GET /catalog/changes?since=V[&epoch=E] -> items added/modified and paths removed since version V
+#     (scans diff the new catalog against the previous one, the watcher logs its deltas); /scan responses,
+#     scan summaries and GET /catalog carry "version" + "epoch"; POST /scan { data: false } skips the items
+#   * GET /catalog, /catalog?..., /catalog/changes and /catalog/export send a weak ETag (epoch + version)
+#     and answer If-None-Match with 304 before building the body
+#   * GET /comfyui/status probes ComfyUI's small /system_stats (not /object_info), caches the answer for
+#     2 s per host:port and collapses concurrent polls into one upstream check; adds comfyui_version
+#   * CivitAI responses are cached in civitai_cache.sqlite: found versions for --civitai-cache-ttl
+#     (default 7 days), "not found" for --civitai-negative-ttl (default 1 day); expired entries are served
+#     when CivitAI is unreachable. --civitai-offline answers from the cache only. GET /civitai-cache -> stats,
+#     GET /civitai-cache/export and POST /civitai-cache/import { entries } to move the cache between machines
+#   * The scanner module is loaded once and kept resident (re-executed only when scanner/main.py changes,
+#     see /health "scanner"); /scan no longer reruns a failed scan through the CLI. Files that can't be
+#     read or parsed get an "error" field in the catalog ("errors": count) and are read again next scan
+#   * Scans also write catalog.tags.json (tag -> LoRAs with counts, trigger -> LoRAs); GET /tags?tag=,
+#     ?trigger=, ?q=prefix or no query (most used tags) answers from that index held in memory
+#   * POST /jobs { kind: "hash-sweep", workers?, max_mb_per_s?, restart? } hashes the whole catalog into the
+#     hash cache (readinto a reused 4 MB buffer per thread, MB/s cap shared by the workers, default
+#     --hash-max-mbps). hash_sweep.json records progress, an interrupted sweep resumes on server start
+#     (--no-resume-sweep: don't); POST /jobs/{id}/cancel pauses it. GET /hash-sweep -> checkpoint + job,
+#     GET /hash-cache/export -> all hashes with CivitAI AutoV2; enrich results carry "autov2" too
+#   * GET /workflows[?dir=&missing=1] -> checkpoints, LoRAs, embeddings (and VAE/CLIP/UNet/ControlNet/upscale
+#     models) referenced by the workflow JSON files in Workflows/, --workflows DIR (repeatable) and ComfyUI's
+#     user/default/workflows, each "present" (with the catalog items) or "missing"; UI and API format.
+#     References resolve through a (type, relative path / file name) dict built once per catalog version
+#   * /scan, /scan/stream, scan jobs and the watcher all scan through the scanner's scan() (on_item callback
+#     for streaming and progress); catalog files, the tag index, hash_sweep.json and full SHA-256 hashes use
+#     the scanner's read_catalog / write_catalog / sha256_file
 
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlparse, parse_qs
 from datetime import datetime, timezone
 from pathlib import Path
+import gzip
 import json
+import os
 import sys
 import importlib
 import subprocess
 import importlib.util
 import socket
-import urllib.request
-import urllib.error
-import hashlib
+import sqlite3
+import threading
+import time
+import http.client
+import ssl
+import uuid
+import re
+import select
+import bisect
+import heapq
+import struct
+import zlib
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
 DEFAULT_HOST = "127.0.0.1"
 DEFAULT_PORT = 8000
 AUTO_PORT_MAX_TRIES = 20  # 8000..8019
+STREAM_PROGRESS_INTERVAL = 0.25  # seconds between progress records of /scan/stream
+DEFAULT_MAX_HEAVY_JOBS = 2  # concurrent scans / hash jobs
+DEFAULT_HASH_WORKERS = 2  # files hashed in parallel by /enrich-civitai/batch
+HASH_SWEEP_CHECKPOINT_INTERVAL = 5.0  # seconds between hash_sweep.json checkpoints
+HASH_SWEEP_MAX_ERRORS = 100  # failed files listed in the sweep checkpoint
+HASH_THROTTLE_BURST = 0.25  # seconds of read credit an IOThrottle may bank (time spent hashing, not sleeping)
+DEFAULT_CIVITAI_API = "https://civitai.com/api/v1"
+CATALOG_PAGE_SIZE = 100  # default "limit" of GET /catalog queries
+CATALOG_MAX_PAGE_SIZE = 5000
+TAGS_PAGE_SIZE = 50  # default "limit" of GET /tags
+TAGS_MAX_PAGE_SIZE = 1000
+WORKFLOWS_DIR = Path(__file__).resolve().parent / "Workflows"  # shipped workflow templates
+WORKFLOW_MAX_BYTES = 64 * 1024 * 1024  # larger .json files are not read as workflows
+CATALOG_CHANGELOG_MAX = 100_000  # change log entries kept for GET /catalog/changes
+COMFY_STATUS_TTL = 2.0  # seconds a /comfyui/status answer is reused
+CIVITAI_CACHE_TTL = 7 * 24 * 3600  # seconds a cached CivitAI model version is reused
+CIVITAI_NEGATIVE_TTL = 24 * 3600  # seconds a cached "not found on CivitAI" is reused
+COMFY_STATUS_TIMEOUT = 2.0
+GZIP_MIN_SIZE = 1024  # don't bother compressing tiny responses
+FILE_CHUNK = 1024 * 1024  # catalog files are sent back in blocks of this size
+# Latency histogram buckets (seconds) of GET /metrics; scans and full hashes need the long tail
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+ROUTES = {  # known paths, used as "route" label of request metrics
+    "/health", "/catalog", "/catalog/export", "/catalog/changes", "/jobs", "/metrics", "/hash-cache",
+    "/civitai-cache", "/civitai-cache/export", "/civitai-cache/import",
+    "/comfyui/status", "/comfyui/start", "/enrich-civitai", "/enrich-civitai/batch", "/scan", "/scan/stream",
+    "/duplicates", "/tags", "/hash-sweep", "/hash-cache/export", "/workflows",
+}
+SCAN_PHASES = ("walk_s", "stat_s", "sample_s", "parse_s", "sort_s", "write_s")  # scanner stats keys
 
 # will be set in main()
 SELECTED_HOST = DEFAULT_HOST
@@ -48,53 +154,2165 @@ def json_bytes(obj):
     return json.dumps(obj, ensure_ascii=False).encode("utf-8")
 
 
-def write_file(path: Path, data: dict):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "").lower() not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
 
 
-def _load_scanner_module():
-    """Search for Scanner/main.py (case insensitive) in project and load dynamically via importlib."""
-    base_dir = Path(__file__).resolve().parent
-    candidates = [
-        (base_dir / "Scanner" / "main.py").resolve(),
-        (base_dir / "scanner" / "main.py").resolve(),
-    ]
-    for scanner_py in candidates:
-        if scanner_py.exists():
-            spec = importlib.util.spec_from_file_location("comfydash_scanner", str(scanner_py))
-            if spec is None or spec.loader is None:
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def default_catalog_path() -> Path:
+    return (Path(__file__).resolve().parent / "catalog.json").resolve()
+
+
+def autov2(sha256: str) -> str:
+    """CivitAI's AutoV2 short hash: the first 10 hex digits of the SHA-256."""
+    return sha256[:10].upper()
+
+
+class IOThrottle:
+    """Caps the combined read rate (MB/s, 0 = unlimited) of all threads sharing it.
+
+    Each read books its bytes on a virtual clock that advances at the allowed
+    rate; a reader ahead of the clock sleeps until it catches up. The clock may
+    lag behind real time by HASH_THROTTLE_BURST, so time spent hashing between
+    reads doesn't pull the rate below the cap.
+    """
+
+    def __init__(self, mb_per_s: float = 0):
+        self.mb_per_s = float(mb_per_s)
+        self.waited = 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes: int):
+        if self.mb_per_s <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._next = max(self._next, now - HASH_THROTTLE_BURST) + nbytes / (self.mb_per_s * 1_000_000)
+            delay = self._next - now
+        if delay > 0:
+            time.sleep(delay)
+            with self._lock:
+                self.waited += delay
+            METRICS.inc("comfydash_hash_throttle_seconds_total", delay, "Time hash reads waited for the MB/s cap")
+
+
+class HashCache:
+    """Persistent SHA-256 store keyed on (path, size, mtime_ns).
+
+    Same basis as the scanner's fast_id: an entry is only valid while size and
+    mtime_ns of the file are unchanged, otherwise the file is hashed again.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS file_hashes ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " sha256 TEXT NOT NULL,"
+                " hashed_at TEXT NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, path: Path, st) -> str | None:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT sha256 FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (str(path), st.st_size, st.st_mtime_ns),
+            ).fetchone()
+        return row[0] if row else None
+
+    def store(self, path: Path, st, digest: str):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, sha256, hashed_at) VALUES (?, ?, ?, ?, ?)",
+                (str(path), st.st_size, st.st_mtime_ns, digest, iso_now()),
+            )
+            conn.commit()
+
+    def sha256(self, path: Path, progress=None, throttle=None) -> tuple[str, bool]:
+        """Return (sha256, cached). Only new or modified files are read from disk."""
+        st = path.stat()
+        digest = self.lookup(path, st)
+        if digest is not None:
+            with self._lock:
+                self.hits += 1
+            return digest, True
+
+        with self._lock:
+            self.misses += 1
+        # A rate-limited read (hash sweep) mostly sleeps in the throttle and is capped by it
+        # already; holding a heavy-job slot through those sleeps would only block scans
+        limited = throttle is not None and throttle.mb_per_s > 0
+        with HEAVY_JOBS.slot() if not limited else nullcontext():
+            t0 = time.perf_counter()
+            # Full SHA-256 (required for CivitAI by-hash lookups), read through the scanner's buffer
+            digest = _load_scanner_module()[0].sha256_file(path, progress, throttle)
+        METRICS.inc("comfydash_hash_bytes_total", st.st_size, "Bytes read for full SHA-256 hashes")
+        METRICS.inc("comfydash_hash_seconds_total", time.perf_counter() - t0, "Time spent on full SHA-256 hashes")
+        # Don't remember hashes of files that changed while we were reading them
+        st_after = path.stat()
+        if (st_after.st_size, st_after.st_mtime_ns) == (st.st_size, st.st_mtime_ns):
+            self.store(path, st, digest)
+        return digest, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM file_hashes").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries, "path": str(self.db_path)}
+
+    def export(self) -> dict:
+        """All stored hashes (with AutoV2), e.g. to look models up elsewhere."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT path, size, mtime_ns, sha256, hashed_at FROM file_hashes ORDER BY path").fetchall()
+        return {
+            "schema": "comfydash/hash-cache@1",
+            "exported_at": iso_now(),
+            "entries": [{"path": path, "size": size, "mtime_ns": mtime_ns, "sha256": digest,
+                         "autov2": autov2(digest), "hashed_at": hashed_at}
+                        for path, size, mtime_ns, digest, hashed_at in rows],
+        }
+
+
+HASH_CACHE = HashCache(default_catalog_path().parent / "hash_cache.sqlite")
+
+
+class HeavyJobLimiter:
+    """Caps concurrent heavy work (scans, full-file hashing). Requests beyond the
+    limit wait for a free slot; cheap endpoints never touch the limiter.
+
+    A scan holds one slot for its whole run. Hashing takes a slot per file
+    (HashCache.sha256, only when the file is actually read), so batches and
+    enrich jobs with N workers count as up to N heavy jobs, and a cached hash
+    never waits. A hash sweep with an MB/s cap takes no slot: its reads are
+    limited by the IOThrottle and it would hold the slot while sleeping.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, int(limit))
+        self.running = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def configure(self, limit: int):
+        """Change the limit (--max-heavy-jobs); safe while slots are held or awaited."""
+        with self._cond:
+            self.limit = max(1, int(limit))
+            # A higher limit may free slots for everyone waiting
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            self.waiting += 1
+            try:
+                while self.running >= self.limit:
+                    self._cond.wait()
+            finally:
+                self.waiting -= 1
+            self.running += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.running -= 1
+                self._cond.notify()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"running": self.running, "waiting": self.waiting, "limit": self.limit}
+
+
+HEAVY_JOBS = HeavyJobLimiter(DEFAULT_MAX_HEAVY_JOBS)
+
+
+class Metrics:
+    """Process-wide counters, gauges and latency histograms, rendered in the
+    Prometheus text exposition format by GET /metrics."""
+
+    def __init__(self, buckets: tuple = METRICS_BUCKETS):
+        self.buckets = buckets
+        self._help: dict[str, tuple[str, str]] = {}  # name -> (type, help)
+        self._values: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, list]] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def _declare(self, name: str, kind: str, help_text: str):
+        if name not in self._help:
+            self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, value: float = 1, help_text: str = "", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._declare(name, "counter", help_text)
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, help_text: str = "", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._declare(name, "gauge", help_text)
+            self._values.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, seconds: float, help_text: str = "", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._declare(name, "histogram", help_text)
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-2] += seconds
+            hist[-1] += 1
+
+    @staticmethod
+    def _number(value: float) -> str:
+        if isinstance(value, int) or float(value).is_integer():
+            return str(int(value))
+        return repr(float(value))
+
+    @staticmethod
+    def _labels(key: tuple, extra: str = "") -> str:
+        parts = ['%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                 for k, v in key]
+        if extra:
+            parts.append(extra)
+        return "{%s}" % ",".join(parts) if parts else ""
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name in sorted(self._help):
+                kind, help_text = self._help[name]
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind != "histogram":
+                    for key, value in sorted(self._values.get(name, {}).items()):
+                        lines.append(f"{name}{self._labels(key)} {self._number(value)}")
+                    continue
+                for key, hist in sorted(self._histograms.get(name, {}).items()):
+                    for bound, count in zip(self.buckets, hist):
+                        le = 'le="%g"' % bound
+                        lines.append(f"{name}_bucket{self._labels(key, le)} {count}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{name}_bucket{self._labels(key, le)} {hist[-1]}")
+                    lines.append(f"{name}_sum{self._labels(key)} {self._number(hist[-2])}")
+                    lines.append(f"{name}_count{self._labels(key)} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def record_scan_metrics(stats: dict, elapsed: float, incremental: bool):
+    """Feed one finished scan (scanner ``stats`` incl. phase timers) into METRICS."""
+    METRICS.observe("comfydash_scan_duration_seconds", elapsed, "Wall time of complete scans",
+                    mode="incremental" if incremental else "full")
+    METRICS.inc("comfydash_scan_files_total", stats.get("files_seen", 0), "Model files seen by scans")
+    METRICS.inc("comfydash_scan_bytes_read_total", stats.get("bytes_sampled", 0),
+                "Bytes read by scans (ID samples + safetensors headers + PyTorch pickles)")
+    for phase in SCAN_PHASES:
+        if phase in stats:
+            METRICS.inc("comfydash_scan_phase_seconds_total", stats[phase],
+                        "Time spent per scan phase (summed over worker threads)", phase=phase[:-2])
+    if elapsed > 0:
+        METRICS.set("comfydash_scan_last_files_per_second", stats.get("files_seen", 0) / elapsed,
+                    "Throughput of the most recent scan")
+
+
+class CivitaiError(Exception):
+    pass
+
+
+class CivitaiClient:
+    """by-hash lookups over a small pool of keep-alive connections.
+
+    The API base is configurable (--civitai-api) so a local stand-in server
+    with the same model-versions/by-hash response shape can be used.
+    """
+
+    def __init__(self, api_base: str, max_idle: int = 4, timeout: float = 10):
+        self.configure(api_base)
+        self.max_idle = max_idle
+        self.timeout = timeout
+
+    def configure(self, api_base: str):
+        parsed = urlparse(api_base.rstrip("/"))
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"Invalid CivitAI API base: {api_base}")
+        self.api_base = api_base.rstrip("/")
+        self._scheme = parsed.scheme
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._prefix = parsed.path
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(self._host, self._port, timeout=self.timeout,
+                                               context=ssl.create_default_context())
+        return http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+
+    def _acquire(self) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._new_connection(), False
+
+    def _release(self, conn: http.client.HTTPConnection):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _get(self, path: str) -> tuple[int, bytes]:
+        t0 = time.perf_counter()
+        status = "error"
+        try:
+            status, body = self._request(path)
+            return status, body
+        finally:
+            METRICS.observe("comfydash_civitai_request_duration_seconds", time.perf_counter() - t0,
+                            "Outbound CivitAI API calls", status=status)
+
+    def _request(self, path: str) -> tuple[int, bytes]:
+        conn, reused = self._acquire()
+        try:
+            conn.request("GET", self._prefix + path, headers={"User-Agent": "ComfyDash/1.4"})
+            response = conn.getresponse()
+            body = response.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if not reused:
+                raise
+            # Idle keep-alive connection was closed by the server - retry once on a fresh one
+            conn = self._new_connection()
+            try:
+                conn.request("GET", self._prefix + path, headers={"User-Agent": "ComfyDash/1.4"})
+                response = conn.getresponse()
+                body = response.read()
+            except Exception:
+                conn.close()
+                raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return response.status, body
+
+    def by_hash(self, file_hash: str) -> dict | None:
+        """Model version for a SHA-256, or None if CivitAI doesn't know it."""
+        status, body = self._get(f"/model-versions/by-hash/{file_hash}")
+        if status == 404:
+            return None
+        if status != 200:
+            raise CivitaiError(f"CivitAI API error: {status}")
+        return json.loads(body.decode("utf-8"))
+
+
+CIVITAI = CivitaiClient(DEFAULT_CIVITAI_API)
+
+
+_CIVITAI_HASH = re.compile(r"^[0-9A-F]{8,64}$")
+
+
+class CivitaiCache:
+    """Persistent by-hash response store (civitai_cache.sqlite next to catalog.json).
+
+    A found model version is reused for ``ttl`` seconds, a "not found" answer
+    (404) for ``negative_ttl``. Expired entries are still served if CivitAI
+    can't be reached. In ``offline`` mode nothing goes to the network: entries
+    are used whatever their age, unknown hashes are reported as not cached.
+    """
+
+    def __init__(self, db_path: Path, ttl: float = CIVITAI_CACHE_TTL, negative_ttl: float = CIVITAI_NEGATIVE_TTL):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.offline = False
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS civitai_responses ("
+                " hash TEXT PRIMARY KEY,"
+                " body TEXT,"  # by-hash JSON, NULL = not found
+                " fetched_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, file_hash: str) -> tuple[dict | None, float] | None:
+        """(version data or None for "not found", fetched_at) or None if not cached."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT body, fetched_at FROM civitai_responses WHERE hash = ?", (file_hash.upper(),)
+            ).fetchone()
+        if row is None:
+            return None
+        return (json.loads(row[0]) if row[0] is not None else None), row[1]
+
+    def put(self, file_hash: str, data: dict | None, fetched_at: float | None = None):
+        body = json.dumps(data, ensure_ascii=False) if data is not None else None
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO civitai_responses (hash, body, fetched_at) VALUES (?, ?, ?)",
+                (file_hash.upper(), body, fetched_at if fetched_at is not None else time.time()),
+            )
+            conn.commit()
+
+    def _count(self, result: str):
+        METRICS.inc("comfydash_civitai_cache_total", 1, "CivitAI by-hash lookups by cache outcome", result=result)
+
+    def lookup(self, file_hash: str, fetch) -> tuple[dict | None, dict]:
+        """(version data or None, cache info) for a hash; ``fetch(hash)`` asks CivitAI on a miss.
+        cache info: civitai_cached, cache_age (s) and "stale" / "offline" where they apply."""
+        cached = self.get(file_hash)
+        now = time.time()
+        if cached is not None:
+            data, fetched_at = cached
+            age = max(0.0, now - fetched_at)
+            if self.offline or age < (self.ttl if data is not None else self.negative_ttl):
+                with self._lock:
+                    self.hits += 1
+                self._count("hit")
+                return data, {"civitai_cached": True, "cache_age": round(age)}
+        if self.offline:
+            self._count("offline_miss")
+            return None, {"civitai_cached": False, "offline": True}
+
+        with self._lock:
+            self.misses += 1
+        try:
+            data = fetch(file_hash)
+        except Exception:
+            if cached is None:
+                self._count("error")
+                raise
+            # CivitAI down or slow -> an old answer beats none
+            with self._lock:
+                self.stale += 1
+            self._count("stale")
+            return cached[0], {"civitai_cached": True, "cache_age": round(now - cached[1]), "stale": True}
+        self._count("miss")
+        self.put(file_hash, data, now)
+        return data, {"civitai_cached": False}
+
+    def export(self) -> dict:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT hash, body, fetched_at FROM civitai_responses ORDER BY hash").fetchall()
+        return {
+            "schema": "comfydash/civitai-cache@1",
+            "exported_at": iso_now(),
+            "entries": [{"hash": h, "found": body is not None, "fetched_at": fetched_at,
+                         "data": json.loads(body) if body is not None else None} for h, body, fetched_at in rows],
+        }
+
+    def import_entries(self, entries: list) -> dict:
+        """Merge exported entries; an entry only replaces a cached one if it was fetched later."""
+        rows, skipped = [], 0
+        for entry in entries:
+            if not isinstance(entry, dict):
+                skipped += 1
+                continue
+            file_hash = str(entry.get("hash", "")).upper()
+            fetched_at = entry.get("fetched_at")
+            data = entry.get("data")
+            if (not _CIVITAI_HASH.match(file_hash) or isinstance(fetched_at, bool)
+                    or not isinstance(fetched_at, (int, float)) or not (data is None or isinstance(data, dict))):
+                skipped += 1
                 continue
-            mod = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(mod)  # type: ignore[attr-defined]
-            return mod, scanner_py
-    raise RuntimeError("Scanner file not found (tried: %s)" % ", ".join(str(c) for c in candidates))
+            rows.append((file_hash, json.dumps(data, ensure_ascii=False) if data is not None else None,
+                         float(fetched_at)))
+        with self._lock:
+            conn = self._connect()
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT INTO civitai_responses (hash, body, fetched_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(hash) DO UPDATE SET body = excluded.body, fetched_at = excluded.fetched_at"
+                " WHERE excluded.fetched_at > civitai_responses.fetched_at",
+                rows,
+            )
+            conn.commit()
+            imported = conn.total_changes - before
+        return {"imported": imported, "unchanged": len(rows) - imported, "skipped": skipped}
+
+    def stats(self) -> dict:
+        with self._lock:
+            found, not_found = self._connect().execute(
+                "SELECT COUNT(body), COUNT(*) - COUNT(body) FROM civitai_responses").fetchone()
+            return {"entries": found + not_found, "found": found, "not_found": not_found, "hits": self.hits,
+                    "misses": self.misses, "stale": self.stale, "offline": self.offline, "ttl": self.ttl,
+                    "negative_ttl": self.negative_ttl, "path": str(self.db_path)}
+
+
+CIVITAI_CACHE = CivitaiCache(default_catalog_path().parent / "civitai_cache.sqlite")
+
+
+def civitai_result(file_hash: str, hash_cached: bool) -> dict:
+    """by-hash lookup (through CIVITAI_CACHE) -> the "data" payload of /enrich-civitai."""
+    data, cache_info = CIVITAI_CACHE.lookup(file_hash, CIVITAI.by_hash)
+    if data is None:
+        error = ("Not in the local CivitAI cache (offline mode)" if cache_info.get("offline")
+                 else "Model not found on CivitAI")
+        return {"found": False, "hash": file_hash, "autov2": autov2(file_hash), "hash_cached": hash_cached,
+                "error": error, **cache_info}
+    return {
+        "found": True,
+        "hash": file_hash,
+        "autov2": autov2(file_hash),
+        "model_name": data.get('model', {}).get('name', ''),
+        "version_name": data.get('name', ''),
+        "url": f"https://civitai.com/models/{data.get('modelId', '')}?modelVersionId={data.get('id', '')}",
+        "trained_words": data.get('trainedWords', []),
+        "base_model": data.get('baseModel', ''),
+        "hash_cached": hash_cached,
+        **cache_info,
+    }
+
+
+def enrich_file(file_path: str, progress=None) -> dict:
+    """Hash one file (cached) and look it up on CivitAI. Raises on any failure."""
+    file_p = Path(file_path).expanduser().resolve()
+    if not file_p.exists():
+        raise FileNotFoundError(f"File does not exist: {file_p}")
+    try:
+        file_hash, hash_cached = HASH_CACHE.sha256(file_p, progress)
+    except Exception as e:
+        raise RuntimeError(f"Failed to hash file: {e}") from e
+    try:
+        return civitai_result(file_hash, hash_cached)
+    except CivitaiError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Failed to query CivitAI: {e}") from e
+
+
+class CatalogStore:
+    """In-memory copy of the current catalog (items keyed by path).
+
+    Filled lazily from catalog.json, re-read after every scan to that file and
+    patched in place by the filesystem watcher. Every change bumps ``version``
+    and is logged per path, so changes(since) can answer with just the items
+    that were added, modified or removed. Versions count per server process
+    (``epoch``); the log keeps the last CATALOG_CHANGELOG_MAX entries.
+    """
 
+    def __init__(self, path: Path):
+        self.path = path
+        self.comfyui_root = ""
+        self.generated_at = ""
+        self._items: dict[str, dict] = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:12]
+        self._added: dict[str, int] = {}  # path -> version in which it (last) appeared
+        self._log: list[tuple[int, str]] = []  # (version, path) per change, ascending
+        self._log_floor = 0  # changes(since) needs since >= this, otherwise the client has to reload
+        self._index: CatalogIndex | None = None
+        self._by_id: tuple[int, dict[str, dict]] | None = None  # (version, id -> item)
 
-def call_scanner_via_import(root: Path, output: Path | None):
+    def _read(self) -> dict | None:
+        try:
+            data = _load_scanner_module()[0].read_catalog(self.path)
+        except (OSError, ValueError, EOFError):
+            return None
+        if isinstance(data, dict) and data.get("schema") == "comfydash/catalog@1":
+            return data
+        return None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        data = self._read()
+        if data is not None:
+            self.comfyui_root = data.get("comfyui_root", "")
+            self.generated_at = data.get("generated_at", "")
+            self._items = {it["path"]: it for it in data.get("items", []) if isinstance(it, dict) and "path" in it}
+            self.version += 1
+            self._added = dict.fromkeys(self._items, self.version)
+        # Nothing older is known -> clients with an earlier version reload everything
+        self._log_floor = self.version
+
+    def _update(self, upserts: dict[str, dict], removed) -> bool:
+        """Apply item changes as one new version and log them; True if anything changed."""
+        removed = [path for path in removed if path in self._items]
+        upserts = {path: item for path, item in upserts.items() if self._items.get(path) != item}
+        if not removed and not upserts:
+            return False
+        self.version += 1
+        for path in removed:
+            del self._items[path]
+            del self._added[path]
+            self._log.append((self.version, path))
+        for path, item in upserts.items():
+            if path not in self._items:
+                self._added[path] = self.version
+            self._items[path] = item
+            self._log.append((self.version, path))
+        if len(self._log) > CATALOG_CHANGELOG_MAX:
+            drop = len(self._log) - CATALOG_CHANGELOG_MAX // 2
+            self._log_floor = self._log[drop - 1][0]
+            del self._log[:drop]
+        return True
+
+    def reload(self, path: Path) -> int | None:
+        """A scan rewrote ``path``: if that is our file, read it back and log the difference
+        to the previous copy. Returns the new version (None if ``path`` is another file)."""
+        if path.resolve() != self.path:
+            return None
+        with self._lock:
+            if not self._loaded:
+                self._ensure_loaded()
+                return self.version
+            data = self._read()
+            if data is None:
+                return self.version
+            self.comfyui_root = data.get("comfyui_root", "")
+            self.generated_at = data.get("generated_at", "")
+            items = {it["path"]: it for it in data.get("items", []) if isinstance(it, dict) and "path" in it}
+            self._update(items, [p for p in self._items if p not in items])
+            return self.version
+
+    def etag(self) -> str:
+        """Weak ETag of the current version; every catalog response derives from it."""
+        with self._lock:
+            self._ensure_loaded()
+            return f'W/"{self.epoch}-{self.version}"'
+
+    def changes(self, since: int, epoch: str | None = None) -> dict:
+        """Items added/modified and paths removed after version ``since``.
+        "reset": true means the log doesn't reach back that far (or another server
+        process issued ``since``) and the client must fetch the full catalog."""
+        with self._lock:
+            self._ensure_loaded()
+            data = {"version": self.version, "epoch": self.epoch, "since": since,
+                    "comfyui_root": self.comfyui_root, "count": len(self._items)}
+            if (epoch and epoch != self.epoch) or not self._log_floor <= since <= self.version:
+                data["reset"] = True
+                return data
+            start = bisect.bisect_right(self._log, since, key=lambda entry: entry[0])
+            added, modified, removed = [], [], []
+            for path in dict.fromkeys(path for _, path in self._log[start:]):
+                item = self._items.get(path)
+                if item is None:
+                    removed.append(path)
+                elif self._added[path] > since:
+                    added.append(item)
+                else:
+                    modified.append(item)
+            data.update({"reset": False, "added": added, "modified": modified, "removed": removed})
+            return data
+
+    def get(self, path: str) -> dict | None:
+        with self._lock:
+            self._ensure_loaded()
+            return self._items.get(path)
+
+    def root(self) -> str:
+        """comfyui_root of the current catalog ("" if none)."""
+        with self._lock:
+            self._ensure_loaded()
+            return self.comfyui_root
+
+    def paths(self) -> list[str]:
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._items)
+
+    def apply(self, upserts: list[dict], removed: list[str]) -> bool:
+        """Apply watcher deltas; returns True if anything changed."""
+        with self._lock:
+            self._ensure_loaded()
+            changed = self._update({item["path"]: item for item in upserts}, removed)
+            if changed:
+                self.generated_at = iso_now()
+            return changed
+
+    def snapshot(self, versioned: bool = False) -> dict:
+        """The catalog@1 document; ``versioned`` adds "version" and "epoch" for changes()."""
+        with self._lock:
+            self._ensure_loaded()
+            items = sorted(self._items.values(), key=lambda x: (x["type"], x["name"].lower()))
+            data = {
+                "schema": "comfydash/catalog@1",
+                "generated_at": self.generated_at,
+                "comfyui_root": self.comfyui_root,
+                "count": len(items),
+                "items": items,
+            }
+            if versioned:
+                data.update({"version": self.version, "epoch": self.epoch})
+            return data
+
+    def index(self) -> "CatalogIndex":
+        """Search index for the current version (rebuilt lazily after changes)."""
+        with self._lock:
+            self._ensure_loaded()
+            if self._index is None or self._index.version != self.version:
+                self._index = CatalogIndex(list(self._items.values()), self.version)
+            return self._index
+
+    def items_by_id(self, ids: list[str]) -> list[dict | None]:
+        """Current items for catalog ids (None where an id is gone); the id map is rebuilt per version."""
+        with self._lock:
+            self._ensure_loaded()
+            if self._by_id is None or self._by_id[0] != self.version:
+                self._by_id = (self.version, {it["id"]: it for it in self._items.values() if "id" in it})
+            by_id = self._by_id[1]
+            return [by_id.get(item_id) for item_id in ids]
+
+    def items(self) -> tuple[int, list[dict]]:
+        """(version, items) of the current catalog, unsorted."""
+        with self._lock:
+            self._ensure_loaded()
+            return self.version, list(self._items.values())
+
+    def save(self, tags=None):
+        """Write catalog.json. With ``tags`` (a scanner TagIndex holding the LoRAs read since
+        the last save) catalog.tags.json is rewritten to match the saved items, too."""
+        mod = _load_scanner_module()[0]
+        snapshot = self.snapshot()
+        mod.write_catalog(self.path, snapshot)
+        if tags is not None:
+            for item in snapshot["items"]:
+                tags.add_item(item)
+            tags.write(mod.tag_index_path(self.path))
+
+
+_TOKEN_SPLIT = re.compile(r"[\s,;()\[\]{}|]+")
+
+
+class CatalogIndex:
+    """Read-only search structure over one catalog version.
+
+    - type / base -> positions
+    - tag + trigger tokens -> positions
+    - name trigrams -> positions (substring search without scanning every name)
+    - presorted position lists per sort key
+    """
+
+    SORT_KEYS = ("name", "size", "mtime", "type", "base")
+
+    def __init__(self, items: list[dict], version: int):
+        self.version = version
+        self.items = sorted(items, key=lambda x: (x["type"], x["name"].lower()))
+        self.names = [it["name"].lower() for it in self.items]
+        self.by_type: dict[str, set[int]] = {}
+        self.by_base: dict[str, set[int]] = {}
+        self.by_token: dict[str, set[int]] = {}
+        self.by_trigram: dict[str, set[int]] = {}
+        for pos, it in enumerate(self.items):
+            self.by_type.setdefault(str(it.get("type", "")).lower(), set()).add(pos)
+            self.by_base.setdefault(str(it.get("base", "")).lower(), set()).add(pos)
+            for field in ("tags", "trigger"):
+                for token in _TOKEN_SPLIT.split(str(it.get(field) or "").lower()):
+                    if token:
+                        self.by_token.setdefault(token, set()).add(pos)
+            name = self.names[pos]
+            for i in range(len(name) - 2):
+                self.by_trigram.setdefault(name[i:i + 3], set()).add(pos)
+
+        self.order: dict[str, list[int]] = {}
+        self.rank: dict[str, list[int]] = {}
+        for key in self.SORT_KEYS:
+            if key == "name":
+                order = sorted(range(len(self.items)), key=lambda p: (self.names[p], self.items[p]["type"]))
+            else:
+                order = sorted(range(len(self.items)), key=lambda p, k=key: (self._sort_value(self.items[p], k), self.names[p]))
+            rank = [0] * len(order)
+            for r, p in enumerate(order):
+                rank[p] = r
+            self.order[key] = order
+            self.rank[key] = rank
+
+    @staticmethod
+    def _sort_value(item: dict, key: str):
+        value = item.get(key)
+        if key in ("size", "mtime"):
+            return value or 0
+        return str(value or "").lower()
+
+    def _match_token(self, token: str, candidates: set[int] | None) -> set[int]:
+        """Positions whose name contains token or that carry it as tag/trigger token."""
+        tagged = self.by_token.get(token, set())
+        if len(token) >= 3:
+            grams = sorted((self.by_trigram.get(token[i:i + 3], set()) for i in range(len(token) - 2)), key=len)
+            pool = grams[0] if candidates is None or len(grams[0]) <= len(candidates) else candidates
+        else:
+            pool = candidates if candidates is not None else range(len(self.items))
+        names = self.names
+        named = {p for p in pool if token in names[p]}
+        if candidates is None:
+            return named | tagged
+        return (named & candidates) | (tagged & candidates)
+
+    def query(self, q: str = "", type_: str = "", base: str = "", sort: str = "name",
+              offset: int = 0, limit: int = 100) -> tuple[int, list[dict]]:
+        """-> (total matches, page of items). ``sort`` may start with '-' for descending."""
+        candidates: set[int] | None = None
+        for field, value in ((self.by_type, type_), (self.by_base, base)):
+            if value:
+                allowed: set[int] = set()
+                for v in value.lower().split(","):
+                    allowed |= field.get(v.strip(), set())
+                candidates = allowed if candidates is None else candidates & allowed
+        for token in q.lower().split():
+            candidates = self._match_token(token.strip("\"'"), candidates)
+            if not candidates:
+                break
+
+        descending = sort.startswith("-")
+        key = sort.lstrip("-") or "name"
+        if key not in self.order:
+            raise ValueError(f"Unknown sort key: {key} (expected one of {', '.join(self.SORT_KEYS)})")
+        order = self.order[key]
+        if candidates is None:
+            total = len(order)
+            ordered = order[::-1] if descending else order
+        elif len(candidates) * 8 < len(self.items):
+            total = len(candidates)
+            ordered = sorted(candidates, key=self.rank[key].__getitem__, reverse=descending)
+        else:
+            # Walk the presorted order and stop as soon as the page is full
+            total = len(candidates)
+            ordered = []
+            for p in (reversed(order) if descending else order):
+                if p in candidates:
+                    ordered.append(p)
+                    if len(ordered) >= offset + limit:
+                        break
+        return total, [self.items[p] for p in ordered[offset:offset + limit]]
+
+
+CATALOG = CatalogStore(default_catalog_path())
+
+
+class TagStore:
+    """The scanner's tag index (catalog.tags.json next to the catalog) for GET /tags.
+
+    Loaded lazily and re-read whenever the file changes (every scan to the
+    catalog rewrites it, and so does every save of watcher changes). Postings
+    stay as array("I") [pos, count, ...] per tag, most frequent first; a sorted
+    tag list answers prefix lookups via bisect. Positions are resolved to the
+    current catalog items on every query.
+    """
+
+    def __init__(self, catalog: CatalogStore):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._key: tuple | None = None  # (path, mtime_ns, size) of the loaded file
+        self._data: dict = self._empty()
+        self._paths: tuple[Path, Path] | None = None  # (catalog path, its tag index path)
+
+    @staticmethod
+    def _empty() -> dict:
+        return {"generated_at": None, "ids": [], "tags": {}, "triggers": {}, "names": [], "top": []}
+
+    def _load(self, path: Path) -> dict:
+        try:
+            raw = _load_scanner_module()[0].read_catalog(path)
+            if not isinstance(raw, dict) or raw.get("schema") != "comfydash/tag-index@1":
+                return self._empty()
+            tags = {tag: array("I", flat) for tag, flat in raw.get("tags", {}).items()}
+            triggers = {trigger: array("I", ps) for trigger, ps in raw.get("triggers", {}).items()}
+        except (OSError, ValueError, EOFError, TypeError, OverflowError, AttributeError):
+            return self._empty()
+        return {
+            "generated_at": raw.get("generated_at"),
+            "ids": raw.get("ids", []),
+            "tags": tags,
+            "triggers": triggers,
+            "names": sorted(tags),
+            "top": heapq.nlargest(TAGS_MAX_PAGE_SIZE, tags, key=lambda tag: len(tags[tag])),
+        }
+
+    def _path(self) -> Path:
+        """catalog.tags.json of the current catalog; asks the scanner only when the catalog path changes."""
+        paths = self._paths
+        if paths is None or paths[0] is not self.catalog.path:
+            paths = self._paths = (self.catalog.path, _load_scanner_module()[0].tag_index_path(self.catalog.path))
+        return paths[1]
+
+    def current(self) -> dict:
+        """Tag index data; per call only catalog.tags.json is stat'ed, it is re-read when it changed."""
+        path = self._path()
+        try:
+            st = path.stat()
+            key = (str(path), st.st_mtime_ns, st.st_size)
+        except OSError:
+            key = None
+        with self._lock:
+            if key != self._key:
+                self._key = key
+                self._data = self._load(path) if key is not None else self._empty()
+            return self._data
+
+    def _items(self, data: dict, positions) -> list[dict]:
+        found = self.catalog.items_by_id([data["ids"][p] for p in positions if p < len(data["ids"])])
+        return [item for item in found if item is not None]
+
+    def info(self) -> dict:
+        data = self.current()
+        return {"generated_at": data["generated_at"], "loras": len(data["ids"]), "tags": len(data["tags"]),
+                "triggers": len(data["triggers"])}
+
+    def by_tag(self, tag: str, offset: int, limit: int) -> dict:
+        """LoRAs trained on ``tag`` (most frequent first), each with its "tag_count"."""
+        data = self.current()
+        flat = data["tags"].get(tag.strip().lower(), ())
+        page = flat[2 * offset:2 * (offset + limit)]
+        counts = {data["ids"][page[i]]: page[i + 1] for i in range(0, len(page), 2)}
+        items = [{**item, "tag_count": counts[item["id"]]} for item in self._items(data, page[::2])]
+        return {"tag": tag.strip().lower(), "total": len(flat) // 2, "offset": offset, "limit": limit, "items": items}
+
+    def by_trigger(self, trigger: str, offset: int, limit: int) -> dict:
+        data = self.current()
+        positions = data["triggers"].get(trigger.strip().lower(), ())
+        return {"trigger": trigger.strip().lower(), "total": len(positions), "offset": offset, "limit": limit,
+                "items": self._items(data, positions[offset:offset + limit])}
+
+    def search(self, prefix: str, limit: int) -> list[dict]:
+        """Tags starting with ``prefix`` (alphabetical) with their number of LoRAs."""
+        data = self.current()
+        prefix = prefix.strip().lower()
+        names, tags = data["names"], data["tags"]
+        out = []
+        for i in range(bisect.bisect_left(names, prefix), len(names)):
+            if not names[i].startswith(prefix) or len(out) >= limit:
+                break
+            out.append({"tag": names[i], "loras": len(tags[names[i]]) // 2})
+        return out
+
+    def top(self, limit: int) -> list[dict]:
+        data = self.current()
+        return [{"tag": tag, "loras": len(data["tags"][tag]) // 2} for tag in data["top"][:limit]]
+
+
+TAGS = TagStore(CATALOG)
+
+
+# Loader nodes: their model arguments in widget order as (input name, catalog type); None = no model file
+WORKFLOW_LOADERS = {
+    "CheckpointLoaderSimple": (("ckpt_name", "checkpoint"),),
+    "CheckpointLoader": (("config_name", None), ("ckpt_name", "checkpoint")),
+    "ImageOnlyCheckpointLoader": (("ckpt_name", "checkpoint"),),
+    "unCLIPCheckpointLoader": (("ckpt_name", "checkpoint"),),
+    "LoraLoader": (("lora_name", "lora"),),
+    "LoraLoaderModelOnly": (("lora_name", "lora"),),
+    "VAELoader": (("vae_name", "vae"),),
+    "UNETLoader": (("unet_name", "unet"),),
+    "CLIPLoader": (("clip_name", "clip"),),
+    "DualCLIPLoader": (("clip_name1", "clip"), ("clip_name2", "clip")),
+    "TripleCLIPLoader": (("clip_name1", "clip"), ("clip_name2", "clip"), ("clip_name3", "clip")),
+    "ControlNetLoader": (("control_net_name", "controlnet"),),
+    "DiffControlNetLoader": (("control_net_name", "controlnet"),),
+    "UpscaleModelLoader": (("model_name", "upscale_model"),),
+}
+# API-format inputs of other (custom) nodes that name a model file ("model_name" is too generic)
+WORKFLOW_INPUT_KINDS = {name: kind for args in WORKFLOW_LOADERS.values() for name, kind in args
+                        if kind and name != "model_name"}
+# UI-format nodes with an unknown widget layout: model file names, typed by a word in the node type
+WORKFLOW_TYPE_HINTS = (("lora", "lora"), ("checkpoint", "checkpoint"), ("ckpt", "checkpoint"), ("unet", "unet"),
+                       ("controlnet", "controlnet"), ("vae", "vae"))
+MODEL_FILE_EXT = (".safetensors", ".ckpt", ".pt", ".pth", ".bin", ".sft", ".gguf")
+_EMBEDDING_REF = re.compile(r"embedding:([^\s,:()\[\]{}|<>]+)")  # as CLIP text encoders read prompts
+
+
+def workflow_nodes(data) -> tuple[str | None, list[dict]]:
+    """("ui" | "api", nodes) of a parsed workflow file; (None, []) if it isn't one.
+
+    UI format: the editor's save file ("nodes" with "widgets_values", plus the
+    nodes of subgraph definitions). API format: node id -> {class_type, inputs},
+    also wrapped in {"prompt": ...} as sent to ComfyUI's /prompt.
+    """
+    if isinstance(data, dict) and isinstance(data.get("nodes"), list):
+        nodes = list(data["nodes"])
+        definitions = data.get("definitions")
+        for sub in (definitions.get("subgraphs") or []) if isinstance(definitions, dict) else []:
+            if isinstance(sub, dict) and isinstance(sub.get("nodes"), list):
+                nodes.extend(sub["nodes"])
+        return "ui", [node for node in nodes if isinstance(node, dict)]
+    if isinstance(data, dict) and isinstance(data.get("prompt"), dict):
+        data = data["prompt"]
+    if isinstance(data, dict) and data and all(isinstance(n, dict) and "class_type" in n for n in data.values()):
+        return "api", [{**node, "id": node_id} for node_id, node in data.items()]
+    return None, []
+
+
+def _model_file_strings(values: list):
+    """Strings that look like model files, also one level down in dict widgets (e.g. LoRA stacks)."""
+    for value in values:
+        for v in value.values() if isinstance(value, dict) else (value,):
+            if isinstance(v, str) and v.lower().endswith(MODEL_FILE_EXT):
+                yield v
+
+
+def iter_workflow_refs(fmt: str, nodes: list[dict]):
+    """Model references of workflow_nodes() output, one dict per reference:
+    {node, class_type, kind, ref, input[, muted]} - kind is the catalog type."""
+    for node in nodes:
+        if fmt == "ui":
+            class_type = str(node.get("type") or "")
+            values = node.get("widgets_values")
+            named = values if isinstance(values, dict) else None  # some custom nodes store widgets by name
+            values = list(values.values()) if named is not None else values if isinstance(values, list) else []
+            muted = node.get("mode") in (2, 4)  # 2 = muted, 4 = bypassed
+        else:
+            class_type = str(node.get("class_type") or "")
+            named = node.get("inputs") if isinstance(node.get("inputs"), dict) else {}
+            values = list(named.values())
+            muted = False
+        base = {"node": node.get("id"), "class_type": class_type}
+        if muted:
+            base["muted"] = True
+
+        args = WORKFLOW_LOADERS.get(class_type)
+        if named is not None:
+            kinds = dict(args) if args else WORKFLOW_INPUT_KINDS
+            found = [(name, kinds.get(name), value) for name, value in named.items()]
+        elif args:
+            found = [(name, kind, value) for (name, kind), value in zip(args, values)]
+        else:
+            hint = next((kind for word, kind in WORKFLOW_TYPE_HINTS if word in class_type.lower()), None)
+            found = [(None, hint, value) for value in _model_file_strings(values)] if hint else []
+        for name, kind, value in found:
+            if kind and isinstance(value, str) and value.strip():
+                yield {**base, "kind": kind, "ref": value, "input": name}
+
+        for value in values:
+            if isinstance(value, str) and "embedding:" in value:
+                for ref in dict.fromkeys(_EMBEDDING_REF.findall(value)):
+                    yield {**base, "kind": "embedding", "ref": ref, "input": None}
+
+
+def _model_ref_key(ref: str) -> str:
+    """Comparable form of a model reference or path: "/" separators, case-insensitive."""
+    return ref.replace("\\", "/").strip().strip("/").casefold()
+
+
+def _model_ref_keys(name: str):
+    """A name and, for model files, the name without extension (embedding:NAME may omit it)."""
+    yield name
+    stem, dot, ext = name.rpartition(".")
+    if dot and stem and "." + ext in MODEL_FILE_EXT:
+        yield stem
+
+
+class ModelRefIndex:
+    """Catalog items keyed the way workflows name them, built once per catalog version.
+
+    - (type, path below its model folder) -> items: what loader widgets store,
+      e.g. ("lora", "il/detail.safetensors"); the model folder is the last path
+      component that is a ComfyUI folder name (loras, checkpoints, ...)
+    - (type, file name) -> items: the file exists, but in another subfolder
+    Both also hold the names without extension. Keys are case-insensitive with
+    "/" separators, so resolving a reference is one or two dict lookups.
+    """
+
+    def __init__(self, items: list[dict], version: int, folders):
+        self.version = version
+        self.by_rel: dict[tuple, list[dict]] = {}
+        self.by_file: dict[tuple, list[dict]] = {}
+        folders = {folder.casefold() for folder in folders}
+        for it in items:
+            parts = _model_ref_key(str(it.get("path", ""))).split("/")
+            start = max((i + 1 for i, part in enumerate(parts[:-1]) if part in folders), default=len(parts) - 1)
+            kind = it.get("type")
+            for key in _model_ref_keys("/".join(parts[start:])):
+                self.by_rel.setdefault((kind, key), []).append(it)
+            for key in _model_ref_keys(parts[-1]):
+                self.by_file.setdefault((kind, key), []).append(it)
+
+    def resolve(self, kind: str, ref: str) -> tuple[str | None, list[dict]]:
+        """("path" | "name" | None, matching items) for one reference."""
+        key = _model_ref_key(ref)
+        items = self.by_rel.get((kind, key))
+        if items:
+            return "path", items
+        items = self.by_file.get((kind, key.rpartition("/")[2]))
+        if items:
+            return "name", items
+        return None, []
+
+
+class WorkflowStore:
+    """Workflow JSON files and the catalog models they reference, for GET /workflows.
+
+    Covers the shipped Workflows/ templates, --workflows DIR and ComfyUI's saved
+    workflows (<comfyui_root>/user/default/workflows of the current catalog).
+    A file is parsed once and only its references are kept; it is read again
+    when its size or mtime change. References are resolved on every request
+    against a ModelRefIndex, which is rebuilt only when the catalog version moves.
+    """
+
+    def __init__(self, catalog: CatalogStore):
+        self.catalog = catalog
+        self.dirs: list[Path] = [WORKFLOWS_DIR]
+        self._lock = threading.Lock()
+        self._files: dict[str, tuple[tuple, dict]] = {}  # path -> ((mtime_ns, size), parsed)
+        self._index: ModelRefIndex | None = None
+
+    def folders(self) -> list[Path]:
+        folders = list(self.dirs)
+        root = self.catalog.root()
+        if root:
+            folders.append(Path(root) / "user" / "default" / "workflows")
+        return [folder for folder in dict.fromkeys(folders) if folder.is_dir()]
+
+    @staticmethod
+    def _read(path: Path, size: int) -> dict:
+        if size > WORKFLOW_MAX_BYTES:
+            return {"error": f"File larger than {WORKFLOW_MAX_BYTES} bytes"}
+        try:
+            with path.open("rb") as f:
+                data = json.load(f)
+        except (OSError, ValueError, RecursionError) as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+        fmt, nodes = workflow_nodes(data)
+        if fmt is None:
+            return {"error": "Not a ComfyUI workflow"}
+        return {"format": fmt, "nodes": len(nodes), "refs": list(iter_workflow_refs(fmt, nodes))}
+
+    def _parsed(self, folders: list[Path], prune: bool) -> list[tuple[Path, Path, dict]]:
+        """(folder, file, parsed) for every *.json below ``folders``; unchanged files come from the cache."""
+        out, seen = [], {}
+        for folder in folders:
+            for path in sorted(folder.rglob("*.json")):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                stamp = (st.st_mtime_ns, st.st_size)
+                cached = self._files.get(str(path))
+                if cached is None or cached[0] != stamp:
+                    cached = (stamp, self._read(path, st.st_size))
+                seen[str(path)] = cached
+                out.append((folder, path, cached[1]))
+        if prune:
+            self._files = seen
+        else:
+            self._files.update(seen)
+        return out
+
+    def _model_index(self) -> ModelRefIndex:
+        if self._index is None or self._index.version != self.catalog.version:
+            version, items = self.catalog.items()
+            mod, _ = _load_scanner_module()
+            self._index = ModelRefIndex(items, version, mod.COMFY_FOLDER_KINDS)
+        return self._index
+
+    def report(self, folders: list[Path] | None = None, missing_only: bool = False) -> dict:
+        """Per workflow: its model references, each "present" (with the catalog items) or
+        "missing"; plus every missing model with the workflows that need it."""
+        with self._lock:
+            default = folders is None
+            folders = self.folders() if default else folders
+            files = self._parsed(folders, prune=default)
+            index = self._model_index()
+
+        workflows = []
+        missing: dict[tuple, dict] = {}
+        totals = {"references": 0, "present": 0, "missing": 0, "errors": 0}
+        for folder, path, parsed in files:
+            entry = {"name": path.stem, "file": path.relative_to(folder).as_posix(), "path": str(path)}
+            if "error" in parsed:
+                totals["errors"] += 1
+                if not missing_only:
+                    workflows.append({**entry, "error": parsed["error"]})
+                continue
+            models = []
+            for ref in parsed["refs"]:
+                match, items = index.resolve(ref["kind"], ref["ref"])
+                if match is None:
+                    models.append({**ref, "status": "missing"})
+                    need = missing.setdefault((ref["kind"], _model_ref_key(ref["ref"])),
+                                              {"kind": ref["kind"], "ref": ref["ref"], "workflows": {}})
+                    need["workflows"][entry["file"]] = None
+                    continue
+                models.append({**ref, "status": "present", "match": match,
+                               "items": [{"id": it.get("id"), "name": it.get("name"), "path": it.get("path")}
+                                         for it in items]})
+            n_missing = sum(1 for model in models if model["status"] == "missing")
+            totals["references"] += len(models)
+            totals["missing"] += n_missing
+            totals["present"] += len(models) - n_missing
+            if n_missing or not missing_only:
+                workflows.append({**entry, "format": parsed["format"], "nodes": parsed["nodes"],
+                                  "present": len(models) - n_missing, "missing": n_missing, "models": models})
+        return {
+            "folders": [str(folder) for folder in folders],
+            "catalog_version": index.version,
+            "count": len(files),
+            **totals,
+            "workflows": workflows,
+            "missing_models": [{**need, "workflows": list(need["workflows"])}
+                               for need in sorted(missing.values(), key=lambda n: (n["kind"], n["ref"].lower()))],
+        }
+
+
+WORKFLOWS = WorkflowStore(CATALOG)
+
+
+class ScannerModule:
+    """Scanner/main.py (case insensitive), loaded once and kept resident.
+
+    get() only stats the file; the module is executed again when its mtime or
+    size changes (hot reload while developing the scanner). If the edited file
+    fails to load, the previous module stays in use and the error is reported
+    in info() until the file changes again.
+    """
+
+    def __init__(self):
+        base_dir = Path(__file__).resolve().parent
+        self.candidates = [
+            (base_dir / "Scanner" / "main.py").resolve(),
+            (base_dir / "scanner" / "main.py").resolve(),
+        ]
+        self.loads = 0
+        self._lock = threading.Lock()
+        self._mod = None
+        self._path: Path | None = None
+        self._key: tuple | None = None  # (path, mtime_ns, size) of the loaded (or last failed) file
+        self._loaded_at: str | None = None
+        self._error: str | None = None
+
+    def _locate(self) -> tuple[Path, tuple]:
+        for scanner_py in self.candidates:
+            try:
+                st = scanner_py.stat()
+            except OSError:
+                continue
+            return scanner_py, (str(scanner_py), st.st_mtime_ns, st.st_size)
+        raise RuntimeError("Scanner file not found (tried: %s)" % ", ".join(str(c) for c in self.candidates))
+
+    def get(self):
+        """(module, path) of the current scanner."""
+        scanner_py, key = self._locate()
+        with self._lock:
+            if key != self._key:
+                self._key = key
+                try:
+                    spec = importlib.util.spec_from_file_location("comfydash_scanner", str(scanner_py))
+                    if spec is None or spec.loader is None:
+                        raise RuntimeError(f"Cannot load {scanner_py}")
+                    mod = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(mod)  # type: ignore[attr-defined]
+                except Exception as e:
+                    self._error = f"{type(e).__name__}: {e}"
+                    if self._mod is None:
+                        raise
+                    print(f"[ComfyDash] Scanner reload failed, keeping the loaded version: {self._error}")
+                else:
+                    self._mod, self._path, self._error = mod, scanner_py, None
+                    self._loaded_at = iso_now()
+                    self.loads += 1
+                    METRICS.inc("comfydash_scanner_loads_total", 1, "Scanner module (re)loads")
+            return self._mod, self._path
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"path": str(self._path) if self._path else None, "loaded_at": self._loaded_at,
+                    "loads": self.loads, "reload_error": self._error}
+
+
+SCANNER = ScannerModule()
+
+
+def _load_scanner_module():
+    """(module, path) of the resident scanner, see ScannerModule."""
+    return SCANNER.get()
+
+
+def scan_metrics(stats: dict, elapsed: float) -> dict:
+    """Phase breakdown of one scan for "metrics": true responses."""
+    data = {k: round(stats[k], 4) for k in SCAN_PHASES if k in stats}
+    data.update({
+        "elapsed": round(elapsed, 4),
+        "files_seen": stats.get("files_seen", 0),
+        "bytes_sampled": stats.get("bytes_sampled", 0),
+    })
+    if elapsed > 0:
+        data["files_per_s"] = round(data["files_seen"] / elapsed, 2)
+    return data
+
+
+def parse_scan_body(body: dict) -> dict:
+    """Validate a /scan body -> { root, output, incremental, workers, metrics, extra_paths, data }. Raises ValueError."""
+    root = body.get("root")
+    output = body.get("output")
+    incremental = bool(body.get("incremental", False))
+    workers = body.get("workers", 1)
+    extra_paths = body.get("extra_model_paths")
+
+    if not root or not isinstance(root, str):
+        raise ValueError("Field 'root' (string) is required.")
+    if not isinstance(workers, int) or isinstance(workers, bool) or not 1 <= workers <= 64:
+        raise ValueError("Field 'workers' must be an integer between 1 and 64.")
+    if extra_paths not in (None, False) and not (isinstance(extra_paths, str) and extra_paths.strip()):
+        raise ValueError("Field 'extra_model_paths' must be a path or false.")
+    if isinstance(extra_paths, str):
+        extra_paths = str(Path(extra_paths).expanduser().resolve())
+        if not Path(extra_paths).is_file():
+            raise ValueError(f"extra_model_paths file does not exist: {extra_paths}")
+
+    root_p = Path(root).expanduser().resolve()
+    if not root_p.exists():
+        raise ValueError(f"Root does not exist: {root_p}")
+
+    # v1.2: Define default output if not set -> in ComfyDash root
+    if isinstance(output, str) and output.strip():
+        out_p = Path(output).expanduser().resolve()
+    else:
+        out_p = CATALOG.path
+
+    return {"root": root_p, "output": out_p, "incremental": incremental, "workers": workers,
+            "metrics": bool(body.get("metrics", False)), "extra_paths": extra_paths,
+            "data": bool(body.get("data", True))}
+
+
+def run_scan(opts: dict, stats: dict, on_item=None) -> dict:
+    """Scan with the scanner's scan() into opts["output"], reload CATALOG from it and return a summary.
+
+    ``stats`` is filled live by the scanner (files_seen, bytes_sampled, ...);
+    ``on_item(item)`` is called for every item as soon as it is built.
+    """
     mod, _ = _load_scanner_module()
-    for fn_name in ("scan", "run_scan", "do_scan"):
-        fn = getattr(mod, fn_name, None)
-        if fn is None:
-            continue
+    out_p = opts["output"]
+    t0 = time.perf_counter()
+    catalog = mod.scan(opts["root"], out_p, incremental=opts["incremental"], workers=opts["workers"],
+                       stats=stats, extra_paths=opts.get("extra_paths"), on_item=on_item)
+    elapsed = time.perf_counter() - t0
+    stats.setdefault("files_seen", catalog.get("count", 0))
+    summary = {
+        "count": catalog["count"],
+        "comfyui_root": catalog["comfyui_root"],
+        "generated_at": catalog["generated_at"],
+        "output": str(out_p),
+    }
+    if "incremental" in catalog:
+        summary["incremental"] = catalog["incremental"]
+    if "roots" in catalog:
+        summary["roots"] = catalog["roots"]
+    if "errors" in catalog:
+        summary["errors"] = catalog["errors"]
+    version = CATALOG.reload(out_p)
+    if version is not None:
+        summary.update({"version": version, "epoch": CATALOG.epoch})
+        if WATCHER is not None:
+            WATCHER.rescan()  # an explicit scan may have found model folders the watcher doesn't know
+    record_scan_metrics(stats, elapsed, opts["incremental"])
+    return summary
+
+
+class Job:
+    """A background scan/enrich job; progress fields are updated by the worker thread.
+    Cancellable jobs check ``cancel_event`` and stop early (state "cancelled")."""
+
+    def __init__(self, kind: str, key: tuple, params: dict, cancellable: bool = False):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.key = key
+        self.params = params
+        self.cancellable = cancellable
+        self.cancel_event = threading.Event()
+        self.state = "queued"  # queued -> running -> done | failed | cancelled
+        self.created_at = iso_now()
+        self.started_at: str | None = None
+        self.finished_at: str | None = None
+        self.files_done = 0
+        self.files_total: int | None = None
+        self.bytes_done = 0
+        self.result = None
+        self.error: str | None = None
+        self._t_start: float | None = None
+        self._t_end: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("queued", "running")
+
+    def add_bytes(self, nbytes: int):
+        with self._lock:
+            self.bytes_done += nbytes
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            elapsed = 0.0
+            if self._t_start is not None:
+                elapsed = (self._t_end or time.perf_counter()) - self._t_start
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "state": self.state,
+                "cancellable": self.cancellable,
+                "params": self.params,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "progress": {
+                    "files_done": self.files_done,
+                    "files_total": self.files_total,
+                    "bytes_done": self.bytes_done,
+                },
+                "throughput": {
+                    "elapsed": round(elapsed, 3),
+                    "files_per_s": round(self.files_done / elapsed, 2) if elapsed > 0 else 0.0,
+                    "mb_per_s": round(self.bytes_done / elapsed / 1_000_000, 2) if elapsed > 0 else 0.0,
+                },
+                "result": self.result,
+                "error": self.error,
+            }
+
+
+class JobManager:
+    """Runs scans and enrichments in background threads (each holding a heavy-job slot).
+
+    Submitting a job with the same key as a queued/running one returns the
+    existing job instead of starting a second run.
+    """
+
+    def __init__(self, keep_finished: int = 50):
+        self.keep_finished = keep_finished
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, key: tuple, params: dict, target, cancellable: bool = False,
+               heavy: bool = True) -> tuple[Job, bool]:
+        """Start ``target(job)`` in a thread; ``heavy`` jobs wait for a HEAVY_JOBS slot first
+        (jobs that only hash take their slots per file instead)."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.active:
+                    return job, True
+            job = Job(kind, key, params, cancellable)
+            self._jobs[job.id] = job
+            self._prune()
+        threading.Thread(target=self._run, args=(job, target, heavy), name=f"job-{job.id}", daemon=True).start()
+        return job, False
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active(self, kind: str) -> Job | None:
+        with self._lock:
+            return next((job for job in self._jobs.values() if job.kind == kind and job.active), None)
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if not j.active]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+
+    def _run(self, job: Job, target, heavy: bool):
+        with HEAVY_JOBS.slot() if heavy else nullcontext():
+            with job._lock:
+                job.state = "running"
+                job.started_at = iso_now()
+                job._t_start = time.perf_counter()
+            try:
+                result = target(job)
+                state, error = ("cancelled" if job.cancel_event.is_set() else "done"), None
+            except Exception as e:
+                import traceback; traceback.print_exc()
+                result, state, error = None, "failed", str(e)
+            with job._lock:
+                job.result = result
+                job.state = state
+                job.error = error
+                job.finished_at = iso_now()
+                job._t_end = time.perf_counter()
+
+
+JOBS = JobManager()
+
+
+def _scan_job(opts: dict):
+    def target(job: Job):
+        stats: dict = {}
+
+        def on_item(_item):
+            with job._lock:
+                job.files_done = stats.get("files_seen", 0)
+                job.bytes_done = stats.get("bytes_sampled", 0)
+
+        t0 = time.perf_counter()
+        summary = run_scan(opts, stats, on_item)
+        on_item(None)
+        if opts["metrics"]:
+            summary["metrics"] = scan_metrics(stats, time.perf_counter() - t0)
+        return summary
+    return target
+
+
+def _enrich_job(paths: list, workers: int):
+    def target(job: Job):
+        job.files_total = len(paths)
+        results = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(enrich_file, p, job.add_bytes): p for p in paths}
+            for fut in as_completed(futures):
+                record = {"path": futures[fut]}
+                try:
+                    record.update({"ok": True, "data": fut.result()})
+                except Exception as e:
+                    record.update({"ok": False, "error": str(e)})
+                results.append(record)
+                with job._lock:
+                    job.files_done += 1
+        return {
+            "count": len(results),
+            "found": sum(1 for r in results if r["ok"] and r["data"].get("found")),
+            "failed": sum(1 for r in results if not r["ok"]),
+            "results": results,
+        }
+    return target
+
+
+def parse_duplicates_params(params: dict) -> tuple[Path, int]:
+    """root (default: root of the current catalog) + workers for duplicate searches. Raises ValueError."""
+    root = params.get("root") or CATALOG.root()
+    workers = params.get("workers", DEFAULT_HASH_WORKERS)
+    if isinstance(workers, str):
+        workers = int(workers) if workers.isdigit() else 0
+    if not root or not isinstance(root, str):
+        raise ValueError("Field 'root' (string) is required (no catalog loaded).")
+    if not isinstance(workers, int) or isinstance(workers, bool) or not 1 <= workers <= 16:
+        raise ValueError("Field 'workers' must be an integer between 1 and 16.")
+    root_p = Path(root).expanduser().resolve()
+    if not root_p.exists():
+        raise ValueError(f"Root does not exist: {root_p}")
+    return root_p, workers
+
+
+def find_duplicates(root: Path, workers: int, stats: dict | None = None) -> dict:
+    """Scanner's tiered duplicate search; full hashes go through the persistent hash cache."""
+    mod, _ = _load_scanner_module()
+    return mod.find_duplicates(root, workers=workers, hasher=lambda p: HASH_CACHE.sha256(p)[0], stats=stats)
+
+
+def _duplicates_job(root: Path, workers: int):
+    def target(job: Job):
+        return find_duplicates(root, workers)
+    return target
+
+
+class _SweepCancelled(Exception):
+    pass
+
+
+class HashSweep:
+    """Full-library SHA-256 sweep over the catalog with an on-disk checkpoint.
+
+    Files are hashed in path order through HASH_CACHE (unchanged files cost a
+    lookup, not a read). hash_sweep.json next to catalog.json records the last
+    path up to which every file is finished ("resume_after") plus the counters
+    for those files, so after a crash or restart the sweep continues there;
+    an interrupted sweep (state "running") is resumed when the server starts.
+    A cancelled sweep is "paused" and continues with the next submission.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.default_mb_per_s = 0.0  # --hash-max-mbps
+        self._lock = threading.Lock()
+
+    def load(self) -> dict | None:
+        try:
+            data = _load_scanner_module()[0].read_catalog(self.path)
+        except (OSError, ValueError):
+            return None
+        return data if isinstance(data, dict) and data.get("schema") == "comfydash/hash-sweep@1" else None
+
+    def save(self, state: dict):
+        with self._lock:
+            state["updated_at"] = iso_now()
+            _load_scanner_module()[0].write_catalog(self.path, state)
+
+    def pending(self) -> dict | None:
+        """Checkpoint of a sweep that was interrupted (server stopped or crashed), else None."""
+        state = self.load()
+        return state if state is not None and state.get("state") == "running" else None
+
+    def run(self, job: Job, workers: int, mb_per_s: float, restart: bool) -> dict:
+        paths = sorted(CATALOG.paths())
+        state = None if restart else self.load()
+        if state is None or state.get("state") == "done":
+            state = {"schema": "comfydash/hash-sweep@1", "started_at": iso_now(), "resume_after": None,
+                     "files_done": 0, "hashed": 0, "cached": 0, "missing": 0, "failed": 0, "bytes_hashed": 0,
+                     "errors": []}
+        start = bisect.bisect_right(paths, state["resume_after"]) if state["resume_after"] else 0
+        resumed_at = start
+        state.update({"state": "running", "catalog": str(CATALOG.path), "files_total": len(paths),
+                      "files_done": start, "workers": workers, "max_mb_per_s": mb_per_s})
+        self.save(state)
+        throttle = IOThrottle(mb_per_s)
+        with job._lock:
+            job.files_total = len(paths)
+            job.files_done = start
+
+        def hash_one(path: str) -> tuple[str, int, str | None]:
+            read = 0
+
+            def progress(nbytes: int):
+                nonlocal read
+                read += nbytes
+                job.add_bytes(nbytes)
+                if job.cancel_event.is_set():
+                    raise _SweepCancelled()
+
+            try:
+                _, cached = HASH_CACHE.sha256(Path(path), progress, throttle)
+            except _SweepCancelled:
+                return "cancelled", read, None
+            except FileNotFoundError:
+                return "missing", 0, None
+            except OSError as e:
+                return "failed", read, str(e)
+            return ("cached" if cached else "hashed"), read, None
+
+        outcomes: dict[int, tuple[str, int, str | None]] = {}
+        low = start  # every path before this index is finished
+        next_index = start
+        in_flight: dict = {}
+        last_save = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash-sweep") as pool:
+            while True:
+                # a few files ahead per worker, so a cancel doesn't wait for a long queue
+                while next_index < len(paths) and len(in_flight) < 2 * workers and not job.cancel_event.is_set():
+                    in_flight[pool.submit(hash_one, paths[next_index])] = next_index
+                    next_index += 1
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    outcomes[in_flight.pop(fut)] = fut.result()
+                while low in outcomes and outcomes[low][0] != "cancelled":
+                    result, nbytes, error = outcomes.pop(low)
+                    state[result] += 1
+                    state["bytes_hashed"] += nbytes
+                    if error is not None and len(state["errors"]) < HASH_SWEEP_MAX_ERRORS:
+                        state["errors"].append({"path": paths[low], "error": error})
+                    METRICS.inc("comfydash_hash_sweep_files_total", 1, "Files processed by hash sweeps",
+                                result=result)
+                    low += 1
+                state["files_done"] = low
+                state["resume_after"] = paths[low - 1] if low > 0 else None
+                with job._lock:
+                    job.files_done = low
+                if time.monotonic() - last_save >= HASH_SWEEP_CHECKPOINT_INTERVAL:
+                    self.save(state)
+                    last_save = time.monotonic()
+
+        state["state"] = "done" if low >= len(paths) else "paused"
+        self.save(state)
+        return {
+            "state": state["state"],
+            "files_total": len(paths),
+            "files_done": low,
+            "resumed_at": resumed_at,
+            "hashed": state["hashed"],
+            "cached": state["cached"],
+            "missing": state["missing"],
+            "failed": state["failed"],
+            "bytes_hashed": state["bytes_hashed"],
+            "throttle_wait_s": round(throttle.waited, 3),
+            "checkpoint": str(self.path),
+        }
+
+
+HASH_SWEEP = HashSweep(default_catalog_path().parent / "hash_sweep.json")
+
+
+def set_catalog_path(path: Path):
+    """--catalog: move the catalog and the files kept next to it (hash cache, CivitAI cache,
+    hash sweep checkpoint); must run before any of them is opened."""
+    CATALOG.path = path
+    HASH_CACHE.db_path = path.parent / HASH_CACHE.db_path.name
+    CIVITAI_CACHE.db_path = path.parent / CIVITAI_CACHE.db_path.name
+    HASH_SWEEP.path = path.parent / HASH_SWEEP.path.name
+
+
+def submit_hash_sweep(workers: int, mb_per_s: float, restart: bool = False) -> tuple[Job, bool]:
+    params = {"workers": workers, "max_mb_per_s": mb_per_s, "restart": restart}
+    return JOBS.submit("hash-sweep", ("hash-sweep",), params,
+                       lambda job: HASH_SWEEP.run(job, workers, mb_per_s, restart), cancellable=True, heavy=False)
+
+
+def submit_job(body: dict) -> tuple[Job, bool]:
+    """Validate a POST /jobs body and submit it. Raises ValueError on bad input."""
+    kind = body.get("kind")
+    if kind == "scan":
+        opts = parse_scan_body(body)
+        params = {"root": str(opts["root"]), "output": str(opts["output"]),
+                  "incremental": opts["incremental"], "workers": opts["workers"], "metrics": opts["metrics"],
+                  "extra_model_paths": opts["extra_paths"]}
+        # Same root into another catalog is a different scan; into the same one it coalesces
+        return JOBS.submit("scan", ("scan", params["root"], params["output"]), params, _scan_job(opts))
+    if kind == "enrich":
+        paths = body.get("paths")
+        workers = body.get("workers", DEFAULT_HASH_WORKERS)
+        if not isinstance(paths, list) or not paths or not all(isinstance(p, str) and p for p in paths):
+            raise ValueError("Field 'paths' (list of strings) is required")
+        if not isinstance(workers, int) or isinstance(workers, bool) or not 1 <= workers <= 16:
+            raise ValueError("Field 'workers' must be an integer between 1 and 16.")
+        paths = list(dict.fromkeys(paths))
+        params = {"paths": paths, "workers": workers}
+        return JOBS.submit("enrich", ("enrich", tuple(sorted(paths))), params, _enrich_job(paths, workers),
+                           heavy=False)
+    if kind == "duplicates":
+        root_p, workers = parse_duplicates_params(body)
+        params = {"root": str(root_p), "workers": workers}
+        return JOBS.submit("duplicates", ("duplicates", params["root"]), params, _duplicates_job(root_p, workers),
+                           heavy=False)
+    if kind == "hash-sweep":
+        workers = body.get("workers", 1)
+        mb_per_s = body.get("max_mb_per_s", HASH_SWEEP.default_mb_per_s)
+        restart = body.get("restart", False)
+        if not isinstance(workers, int) or isinstance(workers, bool) or not 1 <= workers <= 16:
+            raise ValueError("Field 'workers' must be an integer between 1 and 16.")
+        if not isinstance(mb_per_s, (int, float)) or isinstance(mb_per_s, bool) or mb_per_s < 0:
+            raise ValueError("Field 'max_mb_per_s' must be a number >= 0 (0 = unlimited).")
+        if not isinstance(restart, bool):
+            raise ValueError("Field 'restart' must be a boolean.")
+        if not CATALOG.paths():
+            raise ValueError("No catalog loaded - run a scan first.")
+        return submit_hash_sweep(workers, float(mb_per_s), restart)
+    raise ValueError("Field 'kind' must be 'scan', 'enrich', 'duplicates' or 'hash-sweep'.")
+
+
+# inotify(7) constants (Linux); the watcher falls back to polling elsewhere
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal ctypes inotify binding: directory watches -> changed dirs/files."""
+
+    MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+            | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._ctypes = ctypes
+        self._dirs: dict[int, str] = {}
+
+    def add(self, directory: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self._dirs[wd] = directory
+
+    def wait(self, timeout: float) -> tuple[set, set, bool]:
+        """-> (changed dirs, changed files, overflow) collected within timeout."""
+        dirs: set = set()
+        files: set = set()
+        overflow = False
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return dirs, files, overflow
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _INOTIFY_EVENT.unpack_from(data, offset)
+                name = data[offset + _INOTIFY_EVENT.size:offset + _INOTIFY_EVENT.size + length].rstrip(b"\0")
+                offset += _INOTIFY_EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._dirs[wd]
+                    continue
+                if mask & (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF):
+                    dirs.add(directory)
+                if mask & (IN_MODIFY | IN_CLOSE_WRITE) and not mask & IN_ISDIR:
+                    files.add(os.path.join(directory, os.fsdecode(name)))
+        return dirs, files, overflow
+
+    def close(self):
+        os.close(self._fd)
+
+
+class CatalogWatcher(threading.Thread):
+    """Keeps CATALOG (and catalog.json) current for one ComfyUI root.
+
+    Changes are detected with inotify on Linux, otherwise by polling directory
+    mtimes (which sees added/removed/renamed files, not in-place rewrites).
+    New or modified files are only added once their size and mtime have been
+    stable for ``debounce`` seconds, so half-copied checkpoints are skipped.
+    The model folders are resolved once; they are resolved again only when
+    extra_model_paths.yaml changes (mtime) or after a scan of the catalog (rescan()).
+    """
+
+    def __init__(self, store: CatalogStore, root: Path, interval: float = 2.0,
+                 debounce: float = 3.0, use_inotify: bool = True):
+        super().__init__(name="catalog-watcher", daemon=True)
+        self.store = store
+        self.root = root
+        self.interval = interval
+        self.debounce = debounce
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.backend = "polling"
+        self._mod = None
+        self._folders: list[tuple[str, str]] = []
+        self._config_mtime: int | None = None  # extra_model_paths.yaml when _folders were resolved
+        self._folders_stale = False
+        self._dir_mtimes: dict[str, int] = {}
+        self._pending: dict[str, tuple | None] = {}
+        self._inotify: _Inotify | None = None
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def rescan(self):
+        """Resolve the model folders again on the next tick."""
+        self._folders_stale = True
+
+    def run(self):
+        self._mod, _ = _load_scanner_module()
+        # Bring the catalog up to date once (cheap when catalog.json is current)
+        opts = {"root": self.root, "output": self.store.path, "incremental": True, "workers": 1}
+        with HEAVY_JOBS.slot():
+            run_scan(opts, {})
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+                self.backend = "inotify"
+            except (OSError, AttributeError):
+                self._inotify = None
+        self._refresh_folders(initial=True)
+        print(f"Watching {self.root} for model changes ({self.backend})")
+
+        while not self._stop.is_set():
+            try:
+                self._tick()
+            except Exception:
+                import traceback; traceback.print_exc()
+                self._stop.wait(self.interval)
+
+    def _tick(self):
+        self._mod, _ = _load_scanner_module()  # picks up a reloaded scanner
+        if self._inotify is not None:
+            dirs, files, overflow = self._inotify.wait(self.interval)
+            if overflow:
+                dirs = set(self._dir_mtimes)
+        else:
+            self._stop.wait(self.interval)
+            dirs, files = self._changed_dirs(), set()
+        if self._folders_stale or self._config_stat() != self._config_mtime:
+            self._refresh_folders()
+
+        removed: list[str] = []
+        for d in dirs:
+            removed += self._rescan_dir(d)
+        for f in files:
+            self._pending.setdefault(f, None)
+        settled, gone = self._settle()
+        if not settled and not removed and not gone:
+            return
+        # The tag index follows every saved delta, so /tags sees LoRAs the watcher added or removed
+        tag_path = self._mod.tag_index_path(self.store.path)
+        tags = self._mod.TagIndex(self._mod.load_tag_index(tag_path), source=tag_path)
+        upserts = [self._mod.build_item(kind, Path(path), st, tags) for kind, path, st in settled]
+        if self.store.apply(upserts, removed + gone):
+            self.store.save(tags)
+
+    def _config_stat(self) -> int | None:
+        try:
+            return os.stat(self.root / self._mod.EXTRA_PATHS_FILE).st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh_folders(self, initial: bool = False):
+        """Resolve the model folders; new ones are tracked, and unless this is the ``initial``
+        resolve (right after the startup scan) files in them the catalog lacks become pending."""
+        self._folders_stale = False
+        self._config_mtime = self._config_stat()
+        self._folders = [(kind, str(folder)) for kind, folder in self._mod.model_folders(self.root)]
+        for _, folder in self._folders:
+            if folder not in self._dir_mtimes:
+                self._add_tree(folder, initial=initial)
+
+    def _add_tree(self, directory: str, initial: bool = False):
+        """Track a directory and its subdirectories; files in new trees become pending."""
+        for dirpath, dirnames, filenames in os.walk(directory):
+            try:
+                self._dir_mtimes[dirpath] = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                continue
+            if self._inotify is not None:
+                self._inotify.add(dirpath)
+            if not initial:
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    if not self._known(path):
+                        self._pending.setdefault(path, None)
+
+    def _changed_dirs(self) -> set:
+        changed = set()
+        for d, mtime in list(self._dir_mtimes.items()):
+            try:
+                current = os.stat(d).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                changed.add(d)
+        return changed
+
+    def _rescan_dir(self, directory: str) -> list[str]:
+        """List one changed directory -> removed catalog paths; new/changed files become pending."""
+        prefix = directory + os.sep
+        try:
+            entries = {e.name: e for e in os.scandir(directory)}
+            self._dir_mtimes[directory] = os.stat(directory).st_mtime_ns
+        except OSError:
+            # Directory itself is gone: drop it, its subdirectories and their items
+            for d in [d for d in self._dir_mtimes if d == directory or d.startswith(prefix)]:
+                del self._dir_mtimes[d]
+            return [p for p in self.store.paths() if p.startswith(prefix)]
+
+        removed = []
+        for p in self.store.paths():
+            if p.startswith(prefix) and os.sep not in p[len(prefix):] and p[len(prefix):] not in entries:
+                removed.append(p)
+        for name, entry in entries.items():
+            path = os.path.join(directory, name)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if path not in self._dir_mtimes:
+                        self._add_tree(path)
+                elif entry.is_file() and not self._known(path, entry.stat()):
+                    self._pending.setdefault(path, None)
+            except OSError:
+                continue
+        for d in [d for d in self._dir_mtimes if d.startswith(prefix) and not os.path.isdir(d)]:
+            del self._dir_mtimes[d]
+            removed += [p for p in self.store.paths() if p.startswith(d + os.sep)]
+        return removed
+
+    def _known(self, path: str, st: os.stat_result | None = None) -> bool:
+        """Is the file in the catalog with its current size and mtime?"""
+        known = self.store.get(path)
+        if known is None:
+            return False
         try:
-            return fn(str(root), str(output) if output else None)
-        except TypeError:
-            return fn(str(root))
-    raise RuntimeError("No suitable scan function found in Scanner/main.py (expected scan/run_scan/do_scan).")
+            st = st or os.stat(path)
+        except OSError:
+            return False
+        return (known.get("size"), known.get("mtime_ns")) == (st.st_size, st.st_mtime_ns)
+
+    def _kind_for(self, path: str) -> str | None:
+        for kind, folder in self._folders:
+            if path.startswith(folder + os.sep) and self._mod.accepts(kind, Path(path)):
+                return kind
+        return None
 
+    def _settle(self) -> tuple[list[tuple], list[str]]:
+        """(kind, path, stat) of pending files whose size/mtime stayed put for `debounce` seconds,
+        and catalog paths whose file is gone."""
+        now = time.monotonic()
+        settled, removed = [], []
+        for path, seen in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                if self.store.get(path) is not None:
+                    removed.append(path)
+                continue
+            sig = (st.st_size, st.st_mtime_ns)
+            if seen is None or seen[0] != sig:
+                self._pending[path] = (sig, now)
+                continue
+            if now - seen[1] < self.debounce:
+                continue
+            del self._pending[path]
+            kind = self._kind_for(path)
+            if kind is not None:
+                settled.append((kind, path, st))
+        return settled, removed
 
-def call_scanner_via_cli(root: Path, output: Path | None):
-    _, scanner_py = _load_scanner_module()
-    cmd = [sys.executable, str(scanner_py), "--root", str(root), "--stdout"]
-    if output is not None:
-        cmd += ["--output", str(output)]
-    proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    return json.loads(proc.stdout)
+    def stats(self) -> dict:
+        return {
+            "root": str(self.root),
+            "backend": self.backend,
+            "directories": len(self._dir_mtimes),
+            "pending": len(self._pending),
+        }
+
+
+WATCHER: CatalogWatcher | None = None
+
+
+class ComfyStatusProbe:
+    """Is a ComfyUI instance up? Asks its small /system_stats endpoint instead of the
+    multi-MB /object_info, caches the answer for ``ttl`` seconds per host:port and
+    lets concurrent polls wait for the one check in flight instead of starting their own."""
+
+    def __init__(self, ttl: float = COMFY_STATUS_TTL, timeout: float = COMFY_STATUS_TIMEOUT):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._results: dict[tuple[str, int], tuple[float, dict]] = {}
+        self._inflight: dict[tuple[str, int], threading.Event] = {}
+
+    def check(self, host: str, port: int) -> dict:
+        """One uncached upstream check -> { running, comfyui_version? }."""
+        conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        try:
+            conn.request("GET", "/system_stats", headers={"User-Agent": "ComfyDash"})
+            resp = conn.getresponse()
+            body = resp.read(64 * 1024)
+        except (OSError, http.client.HTTPException):
+            return {"running": False}
+        finally:
+            conn.close()
+        result = {"running": resp.status == 200}
+        try:
+            version = json.loads(body)["system"]["comfyui_version"]
+            if isinstance(version, str):
+                result["comfyui_version"] = version
+        except (ValueError, KeyError, TypeError):
+            pass
+        return result
+
+    def status(self, host: str, port: int) -> dict:
+        key = (host, port)
+        while True:
+            with self._lock:
+                cached = self._results.get(key)
+                if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                    return {**cached[1], "cached": True, "age": round(time.monotonic() - cached[0], 3)}
+                event = self._inflight.get(key)
+                leader = event is None
+                if leader:
+                    event = self._inflight[key] = threading.Event()
+            if not leader:
+                # Somebody else is asking ComfyUI right now -> use their answer
+                event.wait(self.timeout + 1)
+                continue
+            result = {"running": False}
+            try:
+                result = self.check(host, port)
+            finally:
+                with self._lock:
+                    if len(self._results) >= 64:
+                        self._results.clear()
+                    self._results[key] = (time.monotonic(), result)
+                    del self._inflight[key]
+                event.set()
+            METRICS.inc("comfydash_comfyui_probes_total", 1, "Upstream ComfyUI status checks",
+                        running=str(result["running"]).lower())
+            return {**result, "cached": False, "age": 0.0}
+
+
+COMFY_STATUS = ComfyStatusProbe()
+
+
+def route_label(path: str) -> str:
+    """Bounded "route" label for request metrics (ids and unknown paths collapsed)."""
+    if path in ROUTES:
+        return path
+    if path.startswith("/jobs/"):
+        return "/jobs/{id}"
+    return "other"
 
 
 class Handler(BaseHTTPRequestHandler):
-    server_version = "ComfyDashMini/1.3.1"
+    server_version = "ComfyDashMini/1.4"
+    _status = 0
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def _timed(self, method: str, handler):
+        t0 = time.perf_counter()
+        try:
+            return handler()
+        finally:
+            METRICS.observe("comfydash_http_request_duration_seconds", time.perf_counter() - t0,
+                            "Request latency per route", method=method,
+                            route=route_label(urlparse(self.path).path), status=self._status)
+
+    def do_GET(self):
+        return self._timed("GET", self._handle_get)
+
+    def do_POST(self):
+        return self._timed("POST", self._handle_post)
 
     # --- CORS helpers ---
     def _set_cors(self):
@@ -118,11 +2336,19 @@ class Handler(BaseHTTPRequestHandler):
         except Exception as e:
             raise ValueError(f"Invalid JSON body: {e}")
 
-    def _send_json(self, obj, status=200):
+    def _send_json(self, obj, status=200, headers=None):
         payload = json_bytes(obj)
+        gzipped = len(payload) >= GZIP_MIN_SIZE and accepts_gzip(self.headers.get("Accept-Encoding"))
+        if gzipped:
+            payload = gzip.compress(payload, compresslevel=5)
         self.send_response(status)
         self._set_cors()
         self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Vary", "Accept-Encoding")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.send_header("Content-Length", str(len(payload)))
         self.end_headers()
         try:
@@ -131,43 +2357,327 @@ class Handler(BaseHTTPRequestHandler):
             # Client disconnected - ignore silently
             pass
 
+    def _not_modified(self, etag: str) -> bool:
+        """Send 304 if the client's If-None-Match already names ``etag``."""
+        if not etag_matches(self.headers.get("If-None-Match"), etag):
+            return False
+        self.send_response(304)
+        self._set_cors()
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+        return True
+
+    def _send_json_file(self, path: Path, fields: dict):
+        """``{**fields, "data": <JSON document in path>}`` without loading the file: it is copied
+        in chunks ("*.gz" files decompressed) and gzip-compressed on the fly if the client accepts it."""
+        head = json_bytes(fields)[:-1] + (b', "data": ' if fields else b'"data": ')
+        gzipped = accepts_gzip(self.headers.get("Accept-Encoding"))
+        compressor = zlib.compressobj(5, zlib.DEFLATED, 31) if gzipped else None
+        self.send_response(200)
+        self._set_cors()
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Vary", "Accept-Encoding")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        # Length unknown up front -> the connection closes after the body
+        self.close_connection = True
+
+        def send(chunk: bytes):
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                self.wfile.write(chunk)
+
+        opener = gzip.open if path.suffix.lower() == ".gz" else open
+        try:
+            with opener(path, "rb") as f:
+                send(head)
+                while chunk := f.read(FILE_CHUNK):
+                    send(chunk)
+            send(b"}")
+            if compressor is not None:
+                self.wfile.write(compressor.flush())
+        except (ConnectionAbortedError, BrokenPipeError):
+            pass
+
+    def _send_text(self, text: str, content_type: str, status=200):
+        payload = text.encode("utf-8")
+        self.send_response(status)
+        self._set_cors()
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (ConnectionAbortedError, BrokenPipeError):
+            pass
+
+    def _start_ndjson(self):
+        """Begin a streamed NDJSON response (no Content-Length, connection closes at the end)."""
+        self.send_response(200)
+        self._set_cors()
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.close_connection = True
+
+    def _send_ndjson_line(self, obj):
+        self.wfile.write(json_bytes(obj) + b"\n")
+        self.wfile.flush()
+
+    def _enrich_batch(self, paths: list, workers: int):
+        self._start_ndjson()
+        t0 = time.perf_counter()
+        found = failed = 0
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(enrich_file, p): p for p in dict.fromkeys(paths)}
+                try:
+                    for fut in as_completed(futures):
+                        record = {"type": "result", "path": futures[fut]}
+                        try:
+                            record.update({"ok": True, "data": fut.result()})
+                            found += bool(record["data"].get("found"))
+                        except Exception as e:
+                            record.update({"ok": False, "error": str(e)})
+                            failed += 1
+                        self._send_ndjson_line(record)
+                finally:
+                    for fut in futures:
+                        fut.cancel()
+            self._send_ndjson_line({
+                "type": "summary",
+                "ok": True,
+                "count": len(futures),
+                "found": found,
+                "failed": failed,
+                "elapsed": round(time.perf_counter() - t0, 3),
+                "hash_cache": HASH_CACHE.stats(),
+            })
+        except (ConnectionAbortedError, BrokenPipeError, ConnectionResetError):
+            # Client went away - pending files were cancelled above
+            pass
+
+    def _scan_stream(self, opts: dict):
+        try:
+            _load_scanner_module()
+        except Exception as e:
+            return self._send_json({"ok": False, "error": str(e)}, status=500)
+
+        self._start_ndjson()
+        t0 = time.perf_counter()
+        stats: dict = {}
+        last_progress = [t0]
+
+        def progress(kind="progress"):
+            return {
+                "type": kind,
+                "files_seen": stats.get("files_seen", 0),
+                "bytes_sampled": stats.get("bytes_sampled", 0),
+                "elapsed": round(time.perf_counter() - t0, 3),
+            }
+
+        def on_item(item):
+            self._send_ndjson_line({"type": "item", "item": item})
+            now = time.perf_counter()
+            if now - last_progress[0] >= STREAM_PROGRESS_INTERVAL:
+                self._send_ndjson_line(progress())
+                last_progress[0] = now
+
+        try:
+            result = run_scan(opts, stats, on_item)
+            summary = progress("summary")
+            summary["ok"] = True
+            summary.update(result)
+            if opts["metrics"]:
+                summary["metrics"] = scan_metrics(stats, time.perf_counter() - t0)
+            self._send_ndjson_line(summary)
+        except (ConnectionAbortedError, BrokenPipeError, ConnectionResetError):
+            # Client went away - the generator is closed, the pool shut down
+            pass
+        except Exception as e:
+            import traceback; traceback.print_exc()
+            try:
+                self._send_ndjson_line({"type": "error", "ok": False, "error": str(e)})
+            except OSError:
+                pass
+
     # --- Routes ---
-    def do_GET(self):
+    def _handle_get(self):
         parsed = urlparse(self.path)
         path = parsed.path
         
         if path == "/health":
-            return self._send_json({
+            data = {
                 "ok": True,
                 "ts": iso_now(),
                 "host": SELECTED_HOST,
                 "port": SELECTED_PORT,
-            })
+                "heavy_jobs": HEAVY_JOBS.stats(),
+                "scanner": SCANNER.info(),
+            }
+            if WATCHER is not None:
+                # Changes without a catalog version bump, so not part of the (ETag-cached) /catalog body
+                data["watch"] = WATCHER.stats()
+            return self._send_json(data)
         
+        if path in ("/catalog", "/catalog/changes", "/catalog/export"):
+            # Every catalog view is a function of (epoch, version) and the URL -> conditional GET
+            etag = CATALOG.etag()
+            if self._not_modified(etag):
+                return
+            cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if path == "/catalog":
+            query = parse_qs(parsed.query)
+            if not query:
+                return self._send_json({"ok": True, "data": CATALOG.snapshot(versioned=True)}, headers=cache_headers)
+            try:
+                offset = int(query.get("offset", ["0"])[0])
+                limit = int(query.get("limit", [str(CATALOG_PAGE_SIZE)])[0])
+                if offset < 0 or not 1 <= limit <= CATALOG_MAX_PAGE_SIZE:
+                    raise ValueError(f"offset must be >= 0 and limit between 1 and {CATALOG_MAX_PAGE_SIZE}")
+                index = CATALOG.index()
+                total, page = index.query(
+                    q=query.get("q", [""])[0],
+                    type_=query.get("type", [""])[0],
+                    base=query.get("base", [""])[0],
+                    sort=query.get("sort", ["name"])[0],
+                    offset=offset,
+                    limit=limit,
+                )
+            except ValueError as e:
+                return self._send_json({"ok": False, "error": str(e)}, status=400)
+            return self._send_json({"ok": True, "data": {
+                "total": total,
+                "offset": offset,
+                "limit": limit,
+                "version": index.version,
+                "items": page,
+            }}, headers=cache_headers)
+
+        if path == "/catalog/changes":
+            query = parse_qs(parsed.query)
+            try:
+                since = int(query.get("since", ["0"])[0])
+            except ValueError:
+                return self._send_json({"ok": False, "error": "since must be an integer version"}, status=400)
+            return self._send_json({"ok": True, "data": CATALOG.changes(since, query.get("epoch", [""])[0])},
+                                   headers=cache_headers)
+
+        if path == "/catalog/export":
+            # Plain comfydash/catalog@1 document, whatever the on-disk format is
+            return self._send_json(CATALOG.snapshot(), headers={
+                **cache_headers,
+                "Content-Disposition": 'attachment; filename="catalog.json"',
+            })
+
+        if path == "/tags":
+            query = parse_qs(parsed.query)
+            try:
+                offset = int(query.get("offset", ["0"])[0])
+                limit = int(query.get("limit", [str(TAGS_PAGE_SIZE)])[0])
+                if offset < 0 or not 1 <= limit <= TAGS_MAX_PAGE_SIZE:
+                    raise ValueError(f"offset must be >= 0 and limit between 1 and {TAGS_MAX_PAGE_SIZE}")
+            except ValueError as e:
+                return self._send_json({"ok": False, "error": str(e)}, status=400)
+            if "tag" in query:
+                data = TAGS.by_tag(query["tag"][0], offset, limit)
+            elif "trigger" in query:
+                data = TAGS.by_trigger(query["trigger"][0], offset, limit)
+            elif "q" in query:
+                data = {"q": query["q"][0], "tags": TAGS.search(query["q"][0], limit)}
+            else:
+                data = {"tags": TAGS.top(limit)}
+            return self._send_json({"ok": True, "data": data, "index": TAGS.info()})
+
+        if path == "/workflows":
+            query = parse_qs(parsed.query)
+            folders = None
+            if "dir" in query:
+                folder = Path(query["dir"][0]).expanduser().resolve()
+                if not folder.is_dir():
+                    return self._send_json({"ok": False, "error": f"Directory does not exist: {folder}"}, status=400)
+                folders = [folder]
+            missing_only = query.get("missing", ["0"])[0].lower() in ("1", "true")
+            return self._send_json({"ok": True, "data": WORKFLOWS.report(folders, missing_only)})
+
+        if path == "/jobs":
+            return self._send_json({"ok": True, "data": [job.to_dict() for job in JOBS.list()]})
+
+        if path == "/metrics":
+            heavy = HEAVY_JOBS.stats()
+            METRICS.set("comfydash_heavy_jobs_running", heavy["running"], "Heavy jobs holding a slot")
+            METRICS.set("comfydash_heavy_jobs_waiting", heavy["waiting"], "Heavy jobs waiting for a slot")
+            METRICS.set("comfydash_hash_cache_hits", HASH_CACHE.hits, "Hash cache hits since start")
+            METRICS.set("comfydash_hash_cache_misses", HASH_CACHE.misses, "Hash cache misses since start")
+            return self._send_text(METRICS.render(), "text/plain; version=0.0.4; charset=utf-8")
+
+        if path.startswith("/jobs/"):
+            job = JOBS.get(path[len("/jobs/"):])
+            if job is None:
+                return self._send_json({"ok": False, "error": "Job not found"}, status=404)
+            return self._send_json({"ok": True, "data": job.to_dict()})
+
+        if path == "/duplicates":
+            query = parse_qs(parsed.query)
+            try:
+                root_p, workers = parse_duplicates_params({k: v[0] for k, v in query.items()})
+            except ValueError as e:
+                return self._send_json({"ok": False, "error": str(e)}, status=400)
+            try:
+                data = find_duplicates(root_p, workers)
+            except Exception as e:
+                import traceback; traceback.print_exc()
+                return self._send_json({"ok": False, "error": str(e)}, status=500)
+            return self._send_json({"ok": True, "data": data})
+
+        if path == "/civitai-cache":
+            return self._send_json({"ok": True, "data": CIVITAI_CACHE.stats()})
+
+        if path == "/civitai-cache/export":
+            return self._send_json(CIVITAI_CACHE.export(), headers={
+                "Content-Disposition": 'attachment; filename="civitai_cache.json"',
+            })
+
+        if path == "/hash-cache":
+            try:
+                return self._send_json({"ok": True, "data": HASH_CACHE.stats()})
+            except sqlite3.Error as e:
+                return self._send_json({"ok": False, "error": f"Hash cache unavailable: {e}"}, status=500)
+
+        if path == "/hash-cache/export":
+            try:
+                data = HASH_CACHE.export()
+            except sqlite3.Error as e:
+                return self._send_json({"ok": False, "error": f"Hash cache unavailable: {e}"}, status=500)
+            return self._send_json(data, headers={"Content-Disposition": 'attachment; filename="hash_cache.json"'})
+
+        if path == "/hash-sweep":
+            job = JOBS.active("hash-sweep")
+            return self._send_json({"ok": True, "data": {
+                "checkpoint": HASH_SWEEP.load(),
+                "job": job.to_dict() if job is not None else None,
+            }})
+
         if path == "/comfyui/status":
             # Parse query params
-            from urllib.parse import parse_qs
             query = parse_qs(parsed.query)
             host = query.get('host', ['127.0.0.1'])[0]
-            port = int(query.get('port', ['8188'])[0])
-            
-            # Check if ComfyUI is running
-            try:
-                url = f"http://{host}:{port}/object_info"
-                req = urllib.request.Request(url, headers={'User-Agent': 'ComfyDash'})
-                with urllib.request.urlopen(req, timeout=2) as response:
-                    # If we get here, something is responding
-                    if response.status == 200:
-                        # Try to verify it's actually ComfyUI
-                        return self._send_json({"ok": True, "running": True})
-            except (urllib.error.URLError, socket.timeout, ConnectionRefusedError):
-                pass
-            
-            return self._send_json({"ok": True, "running": False})
+            try:
+                port = int(query.get('port', ['8188'])[0])
+            except ValueError:
+                return self._send_json({"ok": False, "error": "port must be an integer"}, status=400)
+
+            # Cached for a few seconds; concurrent polls share one upstream check
+            return self._send_json({"ok": True, **COMFY_STATUS.status(host, port)})
         
         self._send_json({"ok": False, "error": "Not found"}, status=404)
 
-    def do_POST(self):
+    def _handle_post(self):
         path = urlparse(self.path).path
         
         if path == "/enrich-civitai":
@@ -184,56 +2694,68 @@ class Handler(BaseHTTPRequestHandler):
             if not file_p.exists():
                 return self._send_json({"ok": False, "error": f"File does not exist: {file_p}"}, status=400)
             
-            # Calculate SHA256 hash (full file - required for CivitAI)
-            try:
-                h = hashlib.sha256()
-                with file_p.open('rb') as f:
-                    # Read in chunks for memory efficiency
-                    chunk_size = 1024 * 1024  # 1MB chunks
-                    while True:
-                        chunk = f.read(chunk_size)
-                        if not chunk:
-                            break
-                        h.update(chunk)
-                file_hash = h.hexdigest().upper()  # Full hash, uppercase
+            # Calculate SHA256 hash (full file - required for CivitAI), cached on disk
+            try:
+                file_hash, hash_cached = HASH_CACHE.sha256(file_p)
             except Exception as e:
                 return self._send_json({"ok": False, "error": f"Failed to hash file: {e}"}, status=500)
             
             # Query CivitAI API
             try:
-                url = f"https://civitai.com/api/v1/model-versions/by-hash/{file_hash}"
-                req = urllib.request.Request(url, headers={'User-Agent': 'ComfyDash/1.3'})
-                with urllib.request.urlopen(req, timeout=10) as response:
-                    if response.status == 200:
-                        data = json.loads(response.read().decode('utf-8'))
-                        return self._send_json({
-                            "ok": True,
-                            "data": {
-                                "found": True,
-                                "hash": file_hash,
-                                "model_name": data.get('model', {}).get('name', ''),
-                                "version_name": data.get('name', ''),
-                                "url": f"https://civitai.com/models/{data.get('modelId', '')}?modelVersionId={data.get('id', '')}",
-                                "trained_words": data.get('trainedWords', []),
-                                "base_model": data.get('baseModel', ''),
-                            }
-                        })
-            except urllib.error.HTTPError as e:
-                if e.code == 404:
-                    return self._send_json({
-                        "ok": True,
-                        "data": {"found": False, "hash": file_hash, "error": "Model not found on CivitAI"}
-                    })
-                return self._send_json({
-                    "ok": False,
-                    "error": f"CivitAI API error: {e.code}"
-                }, status=500)
+                data = civitai_result(file_hash, hash_cached)
+            except CivitaiError as e:
+                return self._send_json({"ok": False, "error": str(e)}, status=500)
             except Exception as e:
                 return self._send_json({
                     "ok": False,
                     "error": f"Failed to query CivitAI: {e}"
                 }, status=500)
-        
+            return self._send_json({"ok": True, "data": data, "hash_cache": HASH_CACHE.stats()})
+
+        if path == "/civitai-cache/import":
+            try:
+                body = self._read_json()
+            except ValueError as e:
+                return self._send_json({"ok": False, "error": str(e)}, status=400)
+            entries = body.get("entries") if isinstance(body, dict) else None
+            if not isinstance(entries, list):
+                return self._send_json({"ok": False, "error": "Field 'entries' (list, as in /civitai-cache/export) "
+                                                              "is required"}, status=400)
+            return self._send_json({"ok": True, "data": CIVITAI_CACHE.import_entries(entries)})
+
+        if path.startswith("/jobs/") and path.endswith("/cancel"):
+            job = JOBS.get(path[len("/jobs/"):-len("/cancel")])
+            if job is None:
+                return self._send_json({"ok": False, "error": "Job not found"}, status=404)
+            if not job.cancellable:
+                return self._send_json({"ok": False, "error": f"Jobs of kind '{job.kind}' can't be cancelled"},
+                                       status=409)
+            job.cancel_event.set()
+            return self._send_json({"ok": True, "data": job.to_dict()})
+
+        if path == "/jobs":
+            try:
+                job, coalesced = submit_job(self._read_json())
+            except ValueError as e:
+                return self._send_json({"ok": False, "error": str(e)}, status=400)
+            return self._send_json({"ok": True, "coalesced": coalesced, "data": job.to_dict()},
+                                   status=200 if coalesced else 202)
+
+        if path == "/enrich-civitai/batch":
+            try:
+                body = self._read_json()
+            except ValueError as e:
+                return self._send_json({"ok": False, "error": str(e)}, status=400)
+
+            paths = body.get("paths")
+            workers = body.get("workers", DEFAULT_HASH_WORKERS)
+            if not isinstance(paths, list) or not paths or not all(isinstance(p, str) and p for p in paths):
+                return self._send_json({"ok": False, "error": "Field 'paths' (list of strings) is required"}, status=400)
+            if not isinstance(workers, int) or isinstance(workers, bool) or not 1 <= workers <= 16:
+                return self._send_json({"ok": False, "error": "Field 'workers' must be an integer between 1 and 16."}, status=400)
+
+            return self._enrich_batch(paths, workers)
+
         if path == "/comfyui/start":
             try:
                 body = self._read_json()
@@ -262,20 +2784,14 @@ class Handler(BaseHTTPRequestHandler):
             sock.close()
             
             if not port_available:
-                # Port is taken, check if it's ComfyUI
-                try:
-                    url = f"http://127.0.0.1:{port}/object_info"
-                    req = urllib.request.Request(url, headers={'User-Agent': 'ComfyDash'})
-                    with urllib.request.urlopen(req, timeout=2) as response:
-                        if response.status == 200:
-                            # ComfyUI is already running
-                            return self._send_json({"ok": True, "message": "ComfyUI already running"})
-                except:
-                    # Port is taken by something else
-                    return self._send_json({
-                        "ok": False, 
-                        "error": f"Port {port} is already in use by another process"
-                    }, status=409)
+                # Port is taken, check if it's ComfyUI (uncached: it may have come up just now)
+                if COMFY_STATUS.check("127.0.0.1", port)["running"]:
+                    return self._send_json({"ok": True, "message": "ComfyUI already running"})
+                # Port is taken by something else
+                return self._send_json({
+                    "ok": False,
+                    "error": f"Port {port} is already in use by another process"
+                }, status=409)
             
             # Start ComfyUI
             try:
@@ -297,51 +2813,49 @@ class Handler(BaseHTTPRequestHandler):
             except Exception as e:
                 return self._send_json({"ok": False, "error": f"Failed to start ComfyUI: {e}"}, status=500)
         
-        if path != "/scan":
+        if path not in ("/scan", "/scan/stream"):
             return self._send_json({"ok": False, "error": "Not found"}, status=404)
 
         try:
-            body = self._read_json()
+            opts = parse_scan_body(self._read_json())
         except ValueError as e:
             return self._send_json({"ok": False, "error": str(e)}, status=400)
 
-        root = body.get("root")
-        output = body.get("output")
-
-        if not root or not isinstance(root, str):
-            return self._send_json({"ok": False, "error": "Field 'root' (string) is required."}, status=400)
+        if path == "/scan/stream":
+            with HEAVY_JOBS.slot():
+                return self._scan_stream(opts)
 
-        root_p = Path(root).expanduser().resolve()
-        if not root_p.exists():
-            return self._send_json({"ok": False, "error": f"Root does not exist: {root_p}"}, status=400)
-
-        # v1.2: Define default output if not set -> in ComfyDash root
-        if isinstance(output, str) and output.strip():
-            out_p = Path(output).expanduser().resolve()
-        else:
-            out_p = (Path(__file__).resolve().parent / "catalog.json").resolve()
-
-        # Try Python import first, fallback to CLI
+        # Files that fail are reported per item ("error") by the scanner; an exception here is fatal
+        stats: dict = {}
         try:
-            try:
-                catalog = call_scanner_via_import(root_p, out_p)
-            except Exception:
-                catalog = call_scanner_via_cli(root_p, out_p)
+            with HEAVY_JOBS.slot():
+                t0 = time.perf_counter()
+                summary = run_scan(opts, stats)
+                elapsed = time.perf_counter() - t0
         except Exception as e:
             import traceback; traceback.print_exc()
             return self._send_json({"ok": False, "error": str(e)}, status=500)
 
-        # v1.2: Always overwrite output file (best effort)
-        try:
-            write_file(out_p, catalog)
-        except Exception as e:
-            return self._send_json({"ok": True, "warning": f"Could not write output: {e}", "data": catalog}, status=200)
+        extra = {"metrics": scan_metrics(stats, elapsed)} if opts["metrics"] else {}
+        if "version" in summary:
+            extra.update({"version": summary["version"], "epoch": summary["epoch"]})
+
+        if not opts["data"]:
+            # Client keeps its copy up to date via GET /catalog/changes
+            if summary.get("errors"):
+                extra["errors"] = summary["errors"]
+            return self._send_json({"ok": True, "count": summary["count"], "output": summary["output"], **extra})
+        # The scanner has already written the output -> send that file instead of serializing the catalog again
+        return self._send_json_file(opts["output"], {"ok": True, **extra})
 
-        return self._send_json({"ok": True, "data": catalog}, status=200)
+
+class MiniServer(ThreadingHTTPServer):
+    # One thread per request; don't keep the process alive for hanging clients
+    daemon_threads = True
 
 
 def try_bind(host: str, port: int):
-    return HTTPServer((host, port), Handler)
+    return MiniServer((host, port), Handler)
 
 
 def pick_free_port(host: str, desired: int, strict: bool):
@@ -361,11 +2875,16 @@ def pick_free_port(host: str, desired: int, strict: bool):
 
 
 def main(argv=None):
-    global SELECTED_HOST, SELECTED_PORT
+    global SELECTED_HOST, SELECTED_PORT, WATCHER
     argv = argv or sys.argv[1:]
 
     host, port = DEFAULT_HOST, DEFAULT_PORT
     strict = False
+    max_heavy_jobs = DEFAULT_MAX_HEAVY_JOBS
+    watch_root = None
+    watch_interval = 2.0
+    resume_sweep = True
+    hash_max_mbps = None
 
     i = 0
     while i < len(argv):
@@ -386,16 +2905,100 @@ def main(argv=None):
             strict = True
             i += 1
             continue
+        if a == "--catalog" and i + 1 < len(argv):
+            set_catalog_path(Path(argv[i + 1]).expanduser().resolve())
+            i += 2
+            continue
+        if a == "--workflows" and i + 1 < len(argv):
+            WORKFLOWS.dirs.append(Path(argv[i + 1]).expanduser().resolve())
+            i += 2
+            continue
+        if a == "--watch" and i + 1 < len(argv):
+            watch_root = Path(argv[i + 1]).expanduser().resolve()
+            i += 2
+            continue
+        if a == "--watch-interval" and i + 1 < len(argv):
+            try:
+                watch_interval = float(argv[i + 1])
+            except ValueError:
+                print(f"Invalid --watch-interval value: {argv[i + 1]}", file=sys.stderr)
+                sys.exit(2)
+            i += 2
+            continue
+        if a == "--civitai-api" and i + 1 < len(argv):
+            try:
+                CIVITAI.configure(argv[i + 1])
+            except ValueError as e:
+                print(str(e), file=sys.stderr)
+                sys.exit(2)
+            i += 2
+            continue
+        if a in ("--civitai-cache-ttl", "--civitai-negative-ttl") and i + 1 < len(argv):
+            try:
+                ttl = float(argv[i + 1])
+            except ValueError:
+                print(f"Invalid {a} value: {argv[i + 1]}", file=sys.stderr)
+                sys.exit(2)
+            if a == "--civitai-cache-ttl":
+                CIVITAI_CACHE.ttl = ttl
+            else:
+                CIVITAI_CACHE.negative_ttl = ttl
+            i += 2
+            continue
+        if a == "--civitai-offline":
+            CIVITAI_CACHE.offline = True
+            i += 1
+            continue
+        if a == "--hash-max-mbps" and i + 1 < len(argv):
+            try:
+                hash_max_mbps = float(argv[i + 1])
+            except ValueError:
+                print(f"Invalid --hash-max-mbps value: {argv[i + 1]}", file=sys.stderr)
+                sys.exit(2)
+            i += 2
+            continue
+        if a == "--no-resume-sweep":
+            resume_sweep = False
+            i += 1
+            continue
+        if a == "--max-heavy-jobs" and i + 1 < len(argv):
+            try:
+                max_heavy_jobs = int(argv[i + 1])
+            except ValueError:
+                print(f"Invalid --max-heavy-jobs value: {argv[i + 1]}", file=sys.stderr)
+                sys.exit(2)
+            i += 2
+            continue
         i += 1
 
+    HEAVY_JOBS.configure(max_heavy_jobs)
+    if hash_max_mbps is not None:
+        HASH_SWEEP.default_mb_per_s = hash_max_mbps
+
     httpd, chosen_port = pick_free_port(host, port, strict)
     SELECTED_HOST, SELECTED_PORT = host, chosen_port
 
     print(
         f"ComfyDash mini server listening on http://{host}:{chosen_port}\n"
-        f"(Auto-port {'ON' if not strict else 'OFF'}; desired={port}, selected={chosen_port})"
+        f"(Auto-port {'ON' if not strict else 'OFF'}; desired={port}, selected={chosen_port}; "
+        f"max heavy jobs={HEAVY_JOBS.limit})"
     )
 
+    if watch_root is not None:
+        if not watch_root.exists():
+            print(f"Watch root does not exist: {watch_root}", file=sys.stderr)
+            sys.exit(2)
+        WATCHER = CatalogWatcher(CATALOG, watch_root, interval=watch_interval)
+        WATCHER.start()
+
+    pending = HASH_SWEEP.pending() if resume_sweep else None
+    if pending is not None:
+        # an explicit --hash-max-mbps wins over the cap the sweep was started with
+        mb_per_s = hash_max_mbps if hash_max_mbps is not None else pending.get("max_mb_per_s", 0.0)
+        job, _ = submit_hash_sweep(pending.get("workers", 1), mb_per_s)
+        print(f"Resuming hash sweep after {pending.get('resume_after') or 'start'} "
+              f"({pending.get('files_done', 0)}/{pending.get('files_total', '?')} files done), job {job.id}")
+
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
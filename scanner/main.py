@@ -2,30 +2,844 @@
 # -*- coding: utf-8 -*-
 """
 ComfyDash Scanner v1.1.1 — FAST HASH
-- Deutlich schneller bei großen Dateien (Checkpoints), da kein Voll-Hash mehr.
-- ID wird aus (Dateiname | Größe | mtime_ns) + kleinen Content-Samples erzeugt (BLAKE2s).
-- API kompatibel zu v1.1: scan(root, output=None) + CLI (--stdout).
+- ID aus (Dateiname | Größe | mtime_ns) + kleinen Content-Samples (BLAKE2s), kein Voll-Hash.
+- API: scan(root) liefert wie v1.1 den vollständigen Katalog. Mit output schreibt scan(root, output)
+  den Katalog dorthin und liefert nur noch den Katalog-Kopf (alles außer "items").
+  CLI wie bisher (--stdout).
+- scan(..., incremental=True, workers=N, stats={}, on_item=callback) ist auch der Einstieg des
+  Servers (/scan, /scan/stream, Jobs, Watcher).
+- Neben dem Katalog liegt der Tag-Index catalog.tags.json (TagIndex).
+- Benchmarks und Prüfskripte: benchmarks/ (bench_scan.py, bench_fingerprint.py, ...).
 """
 from __future__ import annotations
 
 import argparse
+import codecs
+import gzip
 import hashlib
+import heapq
+import io
 import json
 import os
+import pickletools
+import queue
+import re
+import shutil
 import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from types import SimpleNamespace
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, Iterator, List, Optional
 
 MODEL_SUBFOLDERS = {
     "checkpoint": ["models/checkpoints"],
     "lora": ["models/loras", "models/lora"],
     "embedding": ["models/embeddings", "models/embedding"],
+    "vae": ["models/vae"],
+    "controlnet": ["models/controlnet"],
+    "upscale_model": ["models/upscale_models"],
+    "clip": ["models/clip", "models/text_encoders"],
+    "unet": ["models/unet", "models/diffusion_models"],
 }
 
 CHECKPOINT_EXT = {".ckpt", ".safetensors", ".pt", ".bin"}
 LORA_EXT       = {".safetensors"}
 EMBED_EXT      = {".pt", ".bin", ".safetensors"}
+KIND_EXT = {
+    "checkpoint": CHECKPOINT_EXT,
+    "lora": LORA_EXT,
+    "embedding": EMBED_EXT,
+    "vae": {".safetensors", ".pt", ".ckpt", ".bin", ".sft"},
+    "controlnet": {".safetensors", ".pth", ".pt", ".bin", ".ckpt"},
+    "upscale_model": {".pth", ".pt", ".safetensors", ".bin"},
+    "clip": {".safetensors", ".bin", ".pt", ".gguf"},
+    "unet": {".safetensors", ".sft", ".gguf", ".pt", ".bin"},
+}
+
+# extra_model_paths.yaml (ComfyUI): Ordnername -> Katalog-Typ; andere Keys (configs, custom_nodes, ...) ignoriert
+EXTRA_PATHS_FILE = "extra_model_paths.yaml"
+COMFY_FOLDER_KINDS = {
+    "checkpoints": "checkpoint",
+    "loras": "lora",
+    "embeddings": "embedding",
+    "vae": "vae",
+    "controlnet": "controlnet",
+    "t2i_adapter": "controlnet",
+    "upscale_models": "upscale_model",
+    "clip": "clip",
+    "text_encoders": "clip",
+    "unet": "unet",
+    "diffusion_models": "unet",
+}
+
+
+SAMPLE_SIZE = 64 * 1024           # Head/Tail-Sample für fast_id
+HEADER_LIMIT = 10_000_000         # max. safetensors-Header (Sicherheitsgrenze)
+TAG_INDEX_TOP = 50                # häufigste Tags pro LoRA im Tag-Index
+HASH_CHUNK = 4 * 1024 * 1024      # Lesepuffer pro Hash-Thread (über Dateien hinweg wiederverwendet)
+# Phasen-Timer in den stats von iter_items()/scan() (Sekunden)
+PHASES = ("walk_s", "stat_s", "sample_s", "parse_s", "sort_s", "write_s")
+
+
+def _id_digest(name: str, st: os.stat_result, head: bytes, tail: bytes) -> str:
+    basis = f"{name}|{st.st_size}|{int(st.st_mtime_ns)}".encode("utf-8")
+    h = hashlib.blake2s(digest_size=16)
+    h.update(basis)
+    if head:
+        h.update(head)
+    if tail:
+        h.update(tail)
+    return h.hexdigest()
+
+
+def _read_tail(f, size: int) -> bytes:
+    if size <= 2 * SAMPLE_SIZE:
+        return b""
+    try:
+        f.seek(-SAMPLE_SIZE, os.SEEK_END)
+        return f.read(SAMPLE_SIZE)
+    except OSError:
+        return b""
+
+
+def _read_safetensors_header(f, head: bytes) -> Optional[bytes]:
+    """Raw header JSON of an open safetensors file; reuses the already read head sample."""
+    if len(head) < 8:
+        return None
+    header_len = struct.unpack('<Q', head[:8])[0]
+    # Limit to 10MB for safety
+    if header_len > HEADER_LIMIT:
+        return None
+    end = 8 + header_len
+    if end <= len(head):
+        return head[8:end]
+    f.seek(len(head))
+    rest = f.read(end - len(head))
+    return head[8:] + rest
+
+
+_JSON_DECODER = json.JSONDecoder()
+_METADATA_FIRST = '{"__metadata__":'   # so schreibt der safetensors-Writer
+# Skelett eines Tensor-Eintrags ohne alles außer Klammern und Anführungszeichen:
+# "key":{"dtype":"F16","shape":[...],"data_offsets":[...]}
+_TENSOR_SKELETON = b'""{""""""[]""[]}'
+_NOT_SKELETON = bytes(b for b in range(256) if b not in b'{}[]"')
+
+
+class _HeaderTable:
+    """Top level of a decoded safetensors header: the __metadata__ value and the tensor keys.
+
+    ``entry(key)`` decodes one tensor entry. From the fast path (_scan_tensor_table) only
+    the entries that are asked for are decoded; otherwise they come from json.loads.
+    """
+
+    def __init__(self, metadata: Any, keys: List[str], header: Optional[Dict[str, Any]] = None,
+                 text: str = "", start: int = 0):
+        self.metadata = metadata
+        self.keys = keys
+        self._header = header
+        self._text = text
+        self._start = start
+
+    def entry(self, key: str) -> Any:
+        if self._header is not None:
+            return self._header.get(key)
+        pos = self._text.find('"%s":{' % key, self._start)
+        return _JSON_DECODER.raw_decode(self._text, pos + len(key) + 3)[0] if pos >= 0 else None
+
+
+def _scan_tensor_table(raw: bytes, text: str) -> Optional[_HeaderTable]:
+    """Fast path for headers as the safetensors writer lays them out (compact, __metadata__
+    first or absent): __metadata__ is decoded with raw_decode at its offset, the tensor table
+    is not decoded at all. Its bracket/quote skeleton must be exactly one flat
+    {"dtype","shape","data_offsets"} object per entry, with no escapes; that pins every
+    key to the top level. Entry boundaries, trailing data, duplicate keys are checked as
+    json.loads would; the numbers inside an entry are not. None -> use json.loads."""
+    metadata: Any = {}
+    pos = 1
+    if text.startswith(_METADATA_FIRST):
+        try:
+            metadata, pos = _JSON_DECODER.raw_decode(text, len(_METADATA_FIRST))
+        except (ValueError, RecursionError):
+            return None
+    elif not text.startswith("{"):
+        return None
+    body = raw[pos if raw.isascii() else len(text[:pos].encode("utf-8")):]
+    if b"\\" in body:
+        return None
+    n = body.count(b"{")
+    if (body.translate(None, _NOT_SKELETON) != _TENSOR_SKELETON * n + b"}"
+            or not body.rstrip().endswith(b"}") or body.count(b'},"') != max(n - 1, 0)):
+        return None
+    pieces = text[pos:].split('":{')
+    if len(pieces) != n + 1 or not (pieces[0].startswith(',"') if n else pieces[0].lstrip().startswith("}")):
+        return None
+    keys = [piece.rpartition('"')[2] for piece in pieces[:-1]]
+    if len(set(keys)) != n or "__metadata__" in keys:
+        return None  # doppelte Keys: json.loads nimmt den letzten
+    return _HeaderTable(metadata, keys, text=text, start=pos)
+
+
+def _decode_header(raw: bytes, text: str) -> Optional[_HeaderTable]:
+    """Top level of a safetensors header; None unless the text is exactly one JSON object
+    (what json.loads accepts)."""
+    table = _scan_tensor_table(raw, text)
+    if table is not None:
+        return table
+    try:
+        header = json.loads(text)
+    except (ValueError, RecursionError):
+        return None
+    if not isinstance(header, dict):
+        return None
+    return _HeaderTable(header.get("__metadata__", {}), [k for k in header if k != "__metadata__"], header)
+
+
+class _SafetensorsHeader:
+    """Header of an open safetensors file, decoded once.
+
+    Starts from the already read head sample (file position must be right
+    behind it) and reads only the rest of the header. __metadata__ and the
+    tensor keys come from _decode_header(); the tensor table is only decoded
+    when its layout is unusual. ``nread`` counts the extra bytes, ``decode_s``
+    the time spent decoding/parsing (not reading).
+    """
+
+    def __init__(self, f, head: bytes):
+        self.f = f
+        self.raw = b""
+        self.text = ""
+        self.nread = 0
+        self.decode_s = 0.0
+        self.ok = len(head) >= 8
+        self.end = 0
+        self._table: Optional[_HeaderTable] = None
+        self._decoded = False
+        if not self.ok:
+            return
+        header_len = struct.unpack('<Q', head[:8])[0]
+        if header_len > HEADER_LIMIT:
+            self.ok = False
+            return
+        self.end = 8 + header_len
+        raw = head[8:self.end]
+        if self.end > len(head):
+            rest = f.read(self.end - len(head))
+            self.nread = len(rest)
+            if len(rest) < self.end - len(head):
+                self.ok = False  # Datei endet im Header
+                return
+            raw += rest
+        t0 = time.perf_counter()
+        self.raw = raw
+        self.text = raw.decode("utf-8")
+        self.decode_s += time.perf_counter() - t0
+
+    def table(self) -> Optional[_HeaderTable]:
+        """Decoded top level; None if the header is invalid."""
+        if self.ok and not self._decoded:
+            self._decoded = True
+            t0 = time.perf_counter()
+            self._table = _decode_header(self.raw, self.text)
+            self.decode_s += time.perf_counter() - t0
+        return self._table
+
+    def metadata(self) -> Optional[Dict[str, Any]]:
+        """__metadata__ as json.loads(header).get('__metadata__', {}) returns it, except that a
+        non-object value counts as empty. None if the header is unreadable or invalid JSON."""
+        table = self.table()
+        if table is None:
+            return None
+        return table.metadata if isinstance(table.metadata, dict) else {}
+
+    def architecture(self) -> Optional[str]:
+        """fingerprint_architecture() over the decoded header."""
+        table = self.table()
+        if table is None:
+            return None
+        t0 = time.perf_counter()
+        fp = _Fingerprint()
+        fp.add_table(table)
+        self.decode_s += time.perf_counter() - t0
+        return fp.result()
+
+    def shapes(self) -> List[tuple]:
+        """Shapes of all tensor entries (for embedding_layout; decodes every entry)."""
+        table = self.table()
+        out = []
+        for key in table.keys if table is not None else ():
+            value = table.entry(key)
+            shape = value.get("shape") if isinstance(value, dict) else None
+            out.append(tuple(shape) if isinstance(shape, list) else ())
+        return out
+
+
+def _read_safetensors_metadata(f, head: bytes) -> tuple[Optional[Dict[str, Any]], int, float]:
+    """(metadata, extra bytes read, decode seconds) of an open safetensors file."""
+    hdr = _SafetensorsHeader(f, head)
+    return hdr.metadata(), hdr.nread, hdr.decode_s
+
+
+# ---- Architektur-Fingerprint aus Tensor-Keys/-Shapes ----
+# Signatur-Index: exakter Tensor-Key -> Regeln (arch, gewicht, (dim, wert) | None).
+# Eine Regel mit Shape-Bedingung greift nur, wenn shape[dim] == wert ist.
+# Abgedeckt: ldm/ComfyUI-Checkpoints, kohya- und diffusers-LoRAs, Embeddings.
+ARCH_SIGNATURES: Dict[str, List[tuple]] = {
+    # Checkpoints
+    "conditioner.embedders.1.model.transformer.resblocks.0.attn.in_proj_weight": [("sdxl", 4, None)],
+    "conditioner.embedders.0.model.transformer.resblocks.0.attn.in_proj_weight": [("sdxl", 4, None)],  # Refiner
+    "model.diffusion_model.label_emb.0.0.weight": [("sdxl", 2, None)],
+    "cond_stage_model.transformer.text_model.embeddings.token_embedding.weight": [("sd15", 4, None)],
+    "cond_stage_model.transformer.embeddings.token_embedding.weight": [("sd15", 4, None)],
+    "cond_stage_model.model.transformer.resblocks.0.attn.in_proj_weight": [("sd20", 4, None)],
+    "model.diffusion_model.input_blocks.1.1.transformer_blocks.0.attn2.to_k.weight": [
+        ("sd15", 4, (1, 768)), ("sd20", 4, (1, 1024))],
+    "model.diffusion_model.input_blocks.4.1.transformer_blocks.0.attn2.to_k.weight": [
+        ("sd15", 2, (1, 768)), ("sd20", 2, (1, 1024)), ("sdxl", 4, (1, 2048))],
+    "double_blocks.0.img_attn.qkv.weight": [("flux", 4, None)],
+    "model.diffusion_model.double_blocks.0.img_attn.qkv.weight": [("flux", 4, None)],
+    "single_blocks.0.linear1.weight": [("flux", 4, None)],
+    "model.diffusion_model.single_blocks.0.linear1.weight": [("flux", 4, None)],
+    "clip_txt_mapper.weight": [("cascade", 4, None)],           # Stage C
+    "effnet_mapper.0.weight": [("cascade", 4, None)],           # Stage B
+    "model.diffusion_model.clip_txt_mapper.weight": [("cascade", 4, None)],
+    # LoRAs (kohya)
+    "lora_te1_text_model_encoder_layers_0_mlp_fc1.lora_down.weight": [("sdxl", 4, None)],
+    "lora_te2_text_model_encoder_layers_0_mlp_fc1.lora_down.weight": [("sdxl", 4, None)],
+    "lora_te_text_model_encoder_layers_0_mlp_fc1.lora_down.weight": [("sd15", 4, (1, 768)), ("sd20", 4, (1, 1024))],
+    "lora_unet_down_blocks_0_attentions_0_transformer_blocks_0_attn2_to_k.lora_down.weight": [
+        ("sd15", 4, (1, 768)), ("sd20", 4, (1, 1024))],
+    "lora_unet_input_blocks_4_1_transformer_blocks_0_attn2_to_k.lora_down.weight": [("sdxl", 4, (1, 2048))],
+    "lora_unet_double_blocks_0_img_attn_qkv.lora_down.weight": [("flux", 4, None)],
+    "lora_unet_single_blocks_0_linear1.lora_down.weight": [("flux", 4, None)],
+    # LoRAs (diffusers/PEFT, ComfyUI)
+    "unet.down_blocks.1.attentions.0.transformer_blocks.0.attn2.to_k.lora_A.weight": [
+        ("sd15", 4, (1, 768)), ("sd20", 4, (1, 1024)), ("sdxl", 4, (1, 2048))],
+    "transformer.single_transformer_blocks.0.attn.to_q.lora_A.weight": [("flux", 4, None)],
+    "diffusion_model.double_blocks.0.img_attn.qkv.lora_A.weight": [("flux", 4, None)],
+    # Embeddings
+    "clip_g": [("sdxl", 4, (1, 1280))],
+    "emb_params": [("sd15", 4, (1, 768)), ("sd20", 4, (1, 1024))],
+}
+FINGERPRINT_MIN_SCORE = 4     # eine eindeutige Signatur genügt ...
+FINGERPRINT_EARLY_SCORE = 8   # ... ab zwei übereinstimmenden wird nicht weiter gelesen
+
+
+class _Fingerprint:
+    """Scores architectures for the tensor keys of a header.
+
+    The top-level tensor keys are intersected with the signature index (one hash
+    lookup per tensor); shapes come from the decoded entries of the matching keys.
+    """
+
+    def __init__(self):
+        self.scores: Dict[str, int] = {}
+
+    def add_table(self, table: _HeaderTable):
+        """Score the top-level tensor keys of a decoded safetensors header; only the
+        entries of matching keys are decoded for their shapes."""
+        for key in ARCH_SIGNATURES.keys() & set(table.keys):
+            value = table.entry(key)
+            if isinstance(value, dict):
+                shape = value.get("shape")
+                self._score(ARCH_SIGNATURES[key], shape if isinstance(shape, list) else [])
+
+    def _score(self, rules: List[tuple], dims):
+        for arch, weight, cond in rules:
+            if cond is not None and (len(dims) <= cond[0] or dims[cond[0]] != cond[1]):
+                continue
+            self.scores[arch] = self.scores.get(arch, 0) + weight
+
+    def add(self, key: str, shape: tuple):
+        """Score one tensor whose key and shape are already known (PyTorch files)."""
+        rules = ARCH_SIGNATURES.get(key)
+        if rules:
+            self._score(rules, shape)
+
+    def decided(self) -> bool:
+        return max(self.scores.values(), default=0) >= FINGERPRINT_EARLY_SCORE
+
+    def result(self) -> Optional[str]:
+        ranked = sorted(self.scores.items(), key=lambda kv: kv[1], reverse=True)
+        if not ranked or ranked[0][1] < FINGERPRINT_MIN_SCORE:
+            return None
+        if len(ranked) > 1 and ranked[1][1] == ranked[0][1]:
+            return None  # widersprüchlich -> Metadaten/Dateiname entscheiden
+        return ranked[0][0]
+
+
+def fingerprint_architecture(header_json: bytes | str) -> Optional[str]:
+    """Architecture (sd15/sd20/sdxl/flux/cascade) from the tensor keys and shapes of a
+    safetensors header, or None if no signature matches. Pony/Illustrious share the
+    SDXL layout and are reported as sdxl."""
+    try:
+        if isinstance(header_json, bytes):
+            raw, text = header_json, header_json.decode("utf-8")
+        else:
+            raw, text = header_json.encode("utf-8"), header_json
+    except (UnicodeDecodeError, UnicodeEncodeError):
+        return None
+    table = _decode_header(raw, text)
+    if table is None:
+        return None
+    fp = _Fingerprint()
+    fp.add_table(table)
+    return fp.result()
+
+
+_TENSOR_RE = re.compile(rb'"dtype"\s*:\s*"([A-Za-z0-9_]+)"\s*,\s*"shape"\s*:\s*\[([0-9,\s]*)\]')
+
+
+def tensor_summary(header_json: bytes) -> Optional[Dict[str, Any]]:
+    """Cheap summary of the tensor table: {tensors, params, dtypes: {dtype: count}}.
+    Scans the raw header with a regex instead of building the full JSON tree."""
+    count = header_json.count(b'"data_offsets"')
+    entries = _TENSOR_RE.findall(header_json)
+    if len(entries) != count:
+        # Ungewöhnliche Key-Reihenfolge -> exakter (langsamerer) Weg
+        try:
+            header = json.loads(header_json.decode("utf-8"))
+            entries = [(str(v.get("dtype", "")).encode(), ",".join(str(d) for d in v.get("shape", [])).encode())
+                       for k, v in header.items() if k != "__metadata__" and isinstance(v, dict)]
+        except Exception:
+            return None
+    dtypes: Dict[str, int] = {}
+    params = 0
+    for dtype, shape in entries:
+        name = dtype.decode("ascii", "replace")
+        dtypes[name] = dtypes.get(name, 0) + 1
+        n = 1
+        for dim in shape.split(b","):
+            if dim.strip():
+                n *= int(dim)
+        params += n
+    return {"tensors": len(entries), "params": params, "dtypes": dtypes}
+
+
+# ---- PyTorch-Dateien (.pt/.pth/.bin/.ckpt) ohne Unpickling ----
+# torch.save() schreibt ein Zip-Archiv (<name>/data.pkl + Storages unter <name>/data/N), ältere
+# Versionen mehrere Pickles hintereinander. Gelesen wird nur der Pickle-Strom der Objektstruktur
+# (die Storages nie), und der wird nicht ausgeführt: pickletools.genops liefert die Opcodes,
+# _PickleWalker baut daraus nur Daten, Globals bleiben Namen und werden weder importiert noch aufgerufen.
+TORCH_EXT = {".pt", ".pth", ".bin", ".ckpt"}
+PICKLE_LIMIT = 16 * 1024 * 1024   # max. Pickle-Strom pro Datei (Sicherheitsgrenze)
+PICKLE_MAX_OPS = 4_000_000        # max. Opcodes pro Datei (Sicherheitsgrenze)
+TORCH_READ_CHUNK = 16 * 1024      # Lesefenster für Zip-Verzeichnis und Pickle außerhalb der Samples
+EMBEDDING_MAX_TENSORS = 8         # mehr Tensoren -> kein Embedding-Layout
+_ZIP_LOCAL = b"PK\x03\x04"
+_ZIP_CENTRAL = b"PK\x01\x02"
+_ZIP_EOCD = b"PK\x05\x06"
+_ZIP64_LOCATOR = b"PK\x06\x07"
+_ZIP64_EOCD = b"PK\x06\x06"
+_TORCH_LEGACY_HEAD = b"\x80\x02\x8a\x0a"       # PROTO 2, LONG1 (10 Bytes): torchs Magic Number
+_TORCH_LEGACY_MAGIC = 0x1950a86a20f9469cfc6c
+_TORCH_REBUILD_TENSOR = {("torch._utils", "_rebuild_tensor"), ("torch._utils", "_rebuild_tensor_v2"),
+                         ("torch._utils", "_rebuild_tensor_v3"), ("torch._utils", "_rebuild_qtensor")}
+_TORCH_REBUILD_PARAMETER = {("torch._utils", "_rebuild_parameter"),
+                            ("torch._utils", "_rebuild_parameter_with_state")}
+_PICKLE_DICTS = {("collections", "OrderedDict"), ("builtins", "dict"), ("__builtin__", "dict")}
+_TORCH_DTYPES = {
+    "HalfStorage": "F16", "FloatStorage": "F32", "DoubleStorage": "F64", "BFloat16Storage": "BF16",
+    "LongStorage": "I64", "IntStorage": "I32", "ShortStorage": "I16", "CharStorage": "I8",
+    "ByteStorage": "U8", "BoolStorage": "BOOL",
+    "float16": "F16", "float32": "F32", "float64": "F64", "bfloat16": "BF16", "int64": "I64",
+    "int32": "I32", "int16": "I16", "int8": "I8", "uint8": "U8", "bool": "BOOL",
+}
+_PICKLE_PUSH_ARG = {"INT", "BININT", "BININT1", "BININT2", "LONG", "LONG1", "LONG4", "FLOAT", "BINFLOAT",
+                    "STRING", "BINSTRING", "SHORT_BINSTRING", "UNICODE", "SHORT_BINUNICODE", "BINUNICODE",
+                    "BINUNICODE8", "BINBYTES", "SHORT_BINBYTES", "BINBYTES8", "BYTEARRAY8"}
+_OPAQUE = object()    # alles, was der Walker nicht nachbaut (Objekte fremder Klassen, Aufrufe, ...)
+
+
+class _Ref:
+    """A pickled global: module and name only, nothing is imported."""
+    __slots__ = ("module", "name")
+
+    def __init__(self, module: str, name: str):
+        self.module, self.name = module, name
+
+
+class _Storage:
+    __slots__ = ("dtype",)
+
+    def __init__(self, dtype: Optional[str]):
+        self.dtype = dtype
+
+
+class _Tensor:
+    __slots__ = ("shape", "dtype", "named")
+
+    def __init__(self, shape: tuple, dtype: Optional[str]):
+        self.shape, self.dtype, self.named = shape, dtype, False
+
+
+class _PickleWalker:
+    """Follows a pickle opcode stream (pickletools.genops) without unpickling it.
+
+    Only plain data is rebuilt (dict, list, tuple, str, bytes, numbers); torch's tensor
+    rebuild calls become _Tensor(shape, dtype), any other call or object an opaque
+    placeholder. A tensor pushed right above a str (dict key) is reported to
+    ``on_tensor(name, tensor)``; a true return value ends the walk.
+    """
+
+    def __init__(self, on_tensor):
+        self.on_tensor = on_tensor
+        self.ops = 0
+        self.done = False
+
+    def load(self, source) -> Any:
+        """Value of the next pickle in ``source`` (read up to its STOP opcode)."""
+        stack: List[Any] = []
+        metastack: List[List[Any]] = []
+        memo: Dict[int, Any] = {}
+
+        def pop_mark() -> List[Any]:
+            nonlocal stack
+            items = stack
+            stack = metastack.pop()
+            return items
+
+        for op, arg, _pos in pickletools.genops(source):
+            self.ops += 1
+            if self.ops > PICKLE_MAX_OPS:
+                raise ValueError("pickle stream too long")
+            name = op.name
+            if name in _PICKLE_PUSH_ARG:
+                stack.append(arg)
+            elif name in ("BINPUT", "LONG_BINPUT", "PUT"):
+                memo[arg] = stack[-1]
+            elif name == "MEMOIZE":
+                memo[len(memo)] = stack[-1]
+            elif name in ("BINGET", "LONG_BINGET", "GET"):
+                stack.append(memo[arg])
+            elif name == "MARK":
+                metastack.append(stack)
+                stack = []
+            elif name == "EMPTY_DICT":
+                stack.append({})
+            elif name in ("EMPTY_LIST", "EMPTY_SET"):
+                stack.append([])
+            elif name == "EMPTY_TUPLE":
+                stack.append(())
+            elif name in ("TUPLE1", "TUPLE2", "TUPLE3"):
+                n = int(name[-1])
+                if len(stack) < n:
+                    raise ValueError("pickle stack underflow")
+                stack[-n:] = [tuple(stack[-n:])]
+            elif name in ("TUPLE", "FROZENSET"):
+                items = pop_mark()
+                stack.append(tuple(items))
+            elif name == "LIST":
+                items = pop_mark()
+                stack.append(items)
+            elif name == "DICT":
+                items = pop_mark()
+                d: Dict[Any, Any] = {}
+                self._set_items(d, items)
+                stack.append(d)
+            elif name == "APPEND":
+                value = stack.pop()
+                if isinstance(stack[-1], list):
+                    stack[-1].append(value)
+            elif name in ("APPENDS", "ADDITEMS"):
+                items = pop_mark()
+                if isinstance(stack[-1], list):
+                    stack[-1].extend(items)
+            elif name == "SETITEM":
+                value = stack.pop()
+                key = stack.pop()
+                self._set_items(stack[-1], (key, value))
+            elif name == "SETITEMS":
+                items = pop_mark()
+                self._set_items(stack[-1], items)
+            elif name == "NONE":
+                stack.append(None)
+            elif name in ("NEWTRUE", "NEWFALSE"):
+                stack.append(name == "NEWTRUE")
+            elif name == "GLOBAL":
+                module, _, attr = arg.partition(" ")
+                stack.append(_Ref(module, attr))
+            elif name == "STACK_GLOBAL":
+                attr = stack.pop()
+                module = stack.pop()
+                stack.append(_Ref(module, attr) if isinstance(module, str) and isinstance(attr, str) else _OPAQUE)
+            elif name == "REDUCE":
+                args = stack.pop()
+                stack[-1] = self._call(stack[-1], args)
+                value = stack[-1]
+                if isinstance(value, _Tensor) and not value.named and len(stack) > 1 and isinstance(stack[-2], str):
+                    value.named = True
+                    if self.on_tensor(stack[-2], value):
+                        self.done = True
+                        return None
+            elif name == "BINPERSID":
+                stack[-1] = self._persistent(stack[-1])
+            elif name == "BUILD":
+                stack.pop()
+            elif name == "NEWOBJ":
+                del stack[-2:]
+                stack.append(_OPAQUE)
+            elif name == "NEWOBJ_EX":
+                del stack[-3:]
+                stack.append(_OPAQUE)
+            elif name in ("OBJ", "INST"):
+                pop_mark()
+                stack.append(_OPAQUE)
+            elif name in ("PERSID", "EXT1", "EXT2", "EXT4", "NEXT_BUFFER"):
+                stack.append(_OPAQUE)
+            elif name == "POP":
+                if stack:
+                    stack.pop()
+                else:
+                    pop_mark()
+            elif name == "POP_MARK":
+                pop_mark()
+            elif name == "DUP":
+                stack.append(stack[-1])
+            elif name == "STOP":
+                return stack[-1] if stack else None
+            elif name not in ("PROTO", "FRAME", "READONLY_BUFFER"):
+                raise ValueError(f"unsupported pickle opcode {name}")
+        raise ValueError("pickle stream ended without STOP")
+
+    @staticmethod
+    def _set_items(target: Any, items) -> None:
+        if not isinstance(target, dict):
+            return
+        for i in range(0, len(items) - 1, 2):
+            try:
+                target[items[i]] = items[i + 1]
+            except TypeError:  # nicht hashbarer Key
+                pass
+
+    @staticmethod
+    def _call(func: Any, args: Any) -> Any:
+        if not isinstance(func, _Ref) or not isinstance(args, tuple):
+            return _OPAQUE
+        key = (func.module, func.name)
+        if key in _TORCH_REBUILD_TENSOR and len(args) >= 3 and isinstance(args[2], tuple) \
+                and all(isinstance(d, int) for d in args[2]):
+            dtype = args[0].dtype if isinstance(args[0], _Storage) else None
+            if key == ("torch._utils", "_rebuild_tensor_v3") and len(args) > 6 and isinstance(args[6], _Ref):
+                dtype = _TORCH_DTYPES.get(args[6].name, args[6].name)
+            return _Tensor(args[2], dtype)
+        if key in _TORCH_REBUILD_PARAMETER and args:
+            return args[0]
+        if key in _PICKLE_DICTS:
+            return {}
+        return _OPAQUE
+
+    @staticmethod
+    def _persistent(pid: Any) -> Any:
+        # ('storage', torch.HalfStorage, key, location, numel[, view_metadata])
+        if isinstance(pid, tuple) and len(pid) >= 2 and pid[0] == "storage" and isinstance(pid[1], _Ref):
+            return _Storage(_TORCH_DTYPES.get(pid[1].name, pid[1].name))
+        return _OPAQUE
+
+
+class _TorchFile:
+    """Random access to an open file for the zip/pickle structures: served from the head and
+    tail samples where they reach, everything else read in small windows (``nread``)."""
+
+    def __init__(self, f, head: bytes, tail: bytes, size: int):
+        self.f = f
+        self.size = size
+        self.nread = 0
+        self._windows = [(0, head), (size - len(tail), tail)]
+
+    def read_at(self, offset: int, n: int) -> bytes:
+        if offset < 0 or n < 0:
+            raise ValueError("invalid offset")
+        for start, buf in self._windows:
+            if start <= offset and offset + n <= start + len(buf):
+                return buf[offset - start:offset - start + n]
+        self.f.seek(offset)
+        buf = self.f.read(max(n, TORCH_READ_CHUNK))
+        self.nread += len(buf)
+        self._windows[2:] = [(offset, buf)]
+        return buf[:n]
+
+    def zip_member(self, suffix: bytes) -> Optional[tuple[int, int]]:
+        """(data offset, size) of the first stored top-level member whose name ends with
+        ``suffix``, looked up in the central directory; None if there is none."""
+        end_len = min(self.size, SAMPLE_SIZE)
+        end = self.read_at(self.size - end_len, end_len)
+        i = end.rfind(_ZIP_EOCD)
+        if i == -1 and end_len < self.size:  # langer Archiv-Kommentar
+            end_len = min(self.size, 22 + 0xFFFF)
+            end = self.read_at(self.size - end_len, end_len)
+            i = end.rfind(_ZIP_EOCD)
+        if i == -1 or i + 22 > len(end):
+            return None
+        entries, cd_size, cd_offset = struct.unpack("<HII", end[i + 10:i + 20])
+        if entries == 0xFFFF or 0xFFFFFFFF in (cd_size, cd_offset):
+            locator = self.read_at(self.size - end_len + i - 20, 20)
+            if len(locator) < 20 or locator[:4] != _ZIP64_LOCATOR:
+                return None
+            record = self.read_at(struct.unpack("<Q", locator[8:16])[0], 56)
+            if len(record) < 56 or record[:4] != _ZIP64_EOCD:
+                return None
+            entries, cd_size, cd_offset = struct.unpack("<QQQ", record[32:56])
+        pos, cd_end = cd_offset, min(cd_offset + cd_size, self.size)
+        while pos + 46 <= cd_end:
+            entry = self.read_at(pos, 46)
+            if entry[:4] != _ZIP_CENTRAL:
+                return None
+            method, = struct.unpack("<H", entry[10:12])
+            csize, usize, name_len, extra_len, comment_len = struct.unpack("<IIHHH", entry[20:34])
+            local, = struct.unpack("<I", entry[42:46])
+            name = self.read_at(pos + 46, name_len)
+            if name.endswith(suffix) and name.count(b"/") <= 1:
+                if 0xFFFFFFFF in (csize, usize, local):
+                    usize, csize, local = self._zip64_extra(self.read_at(pos + 46 + name_len, extra_len),
+                                                            usize, csize, local)
+                if method != 0:  # torch schreibt unkomprimiert
+                    return None
+                header = self.read_at(local, 30)
+                if len(header) < 30 or header[:4] != _ZIP_LOCAL:
+                    return None
+                n, m = struct.unpack("<HH", header[26:30])
+                return local + 30 + n + m, csize
+            pos += 46 + name_len + extra_len + comment_len
+        return None
+
+    @staticmethod
+    def _zip64_extra(extra: bytes, usize: int, csize: int, local: int) -> tuple[int, int, int]:
+        pos = 0
+        while pos + 4 <= len(extra):
+            tag, length = struct.unpack("<HH", extra[pos:pos + 4])
+            if tag == 0x0001:
+                values = iter(struct.unpack("<%dQ" % (length // 8), extra[pos + 4:pos + 4 + length // 8 * 8]))
+                if usize == 0xFFFFFFFF:
+                    usize = next(values)
+                if csize == 0xFFFFFFFF:
+                    csize = next(values)
+                if local == 0xFFFFFFFF:
+                    local = next(values)
+                break
+            pos += 4 + length
+        return usize, csize, local
+
+
+class _PickleStream(io.RawIOBase):
+    """Bytes [start, end) of a _TorchFile as a raw stream; open() buffers it for
+    pickletools.genops, so its many small reads stay in C."""
+
+    def __init__(self, tf: _TorchFile, start: int, end: int):
+        super().__init__()
+        self.tf, self.pos, self.end = tf, start, end
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        data = self.tf.read_at(self.pos, min(len(b), self.end - self.pos))
+        b[:len(data)] = data
+        self.pos += len(data)
+        return len(data)
+
+    @classmethod
+    def open(cls, tf: _TorchFile, start: int, end: int) -> SimpleNamespace:
+        # Nur read/readline: ohne tell() fragt genops keine Position pro Opcode ab
+        buffered = io.BufferedReader(cls(tf, start, end), TORCH_READ_CHUNK)
+        return SimpleNamespace(read=buffered.read, readline=buffered.readline)
+
+
+class _TorchTensors:
+    """Tensors of a PyTorch file as _PickleWalker reports them: counts, dtypes and parameters,
+    the architecture fingerprint and the first ``keep`` (name, shape) pairs. With ``early``
+    the walk stops as soon as the fingerprint is decided."""
+
+    def __init__(self, keep: int = 0, early: bool = False):
+        self.keep = keep
+        self.early = early
+        self.tensors: List[tuple[str, tuple]] = []
+        self.count = 0
+        self.params = 0
+        self.dtypes: Dict[str, int] = {}
+        self.fp = _Fingerprint()
+        self.format: Optional[str] = None
+        self.nread = 0
+
+    def __call__(self, name: str, tensor: _Tensor) -> bool:
+        self.count += 1
+        dtype = tensor.dtype or "?"
+        self.dtypes[dtype] = self.dtypes.get(dtype, 0) + 1
+        n = 1
+        for d in tensor.shape:
+            n *= d
+        self.params += n
+        if len(self.tensors) < self.keep:
+            self.tensors.append((name, tensor.shape))
+        self.fp.add(name, tensor.shape)
+        return self.early and self.fp.decided()
+
+    def read(self, f, head: bytes, tail: bytes, size: int) -> bool:
+        """Walk the object pickle of an open file (zip archive or legacy format); False if
+        it is neither. Raises on malformed data."""
+        tf = _TorchFile(f, head, tail, size)
+        walker = _PickleWalker(self)
+        try:
+            if head.startswith(_ZIP_LOCAL):
+                member = tf.zip_member(b"data.pkl")
+                if member is None or member[1] > PICKLE_LIMIT:
+                    return False
+                self.format = "zip"
+                walker.load(_PickleStream.open(tf, member[0], member[0] + member[1]))
+            elif head.startswith(_TORCH_LEGACY_HEAD):
+                # Magic Number, Protokoll-Version, sys_info, dann das eigentliche Objekt
+                stream = _PickleStream.open(tf, 0, min(size, PICKLE_LIMIT))
+                if walker.load(stream) != _TORCH_LEGACY_MAGIC:
+                    return False
+                walker.load(stream)
+                walker.load(stream)
+                self.format = "legacy"
+                walker.load(stream)
+            else:
+                return False
+            return True
+        finally:
+            self.nread = tf.nread
+
+
+# Vektor-Dimension(en) eines Embeddings -> Basis-Modell
+_EMBEDDING_DIMS = {frozenset({768}): "sd15", frozenset({1024}): "sd20",
+                   frozenset({1280}): "sdxl", frozenset({768, 1280}): "sdxl"}
+
+
+def embedding_layout(shapes: List[tuple]) -> Optional[tuple[int, Optional[str]]]:
+    """(vectors, base) if the tensor shapes look like a textual inversion embedding: A1111
+    ({"string_to_param": {"*": [n, dim]}}, safetensors "emb_params"), diffusers ({"<token>": [dim]})
+    or SDXL ({"clip_l": [n, 768], "clip_g": [n, 1280]}); base from the vector dimension."""
+    if not shapes or len(shapes) > EMBEDDING_MAX_TENSORS or any(len(s) not in (1, 2) for s in shapes):
+        return None
+    matrices = [s for s in shapes if len(s) == 2]
+    vectors = matrices[0][0] if matrices else len(shapes)
+    dims = frozenset(s[-1] for s in shapes)
+    return vectors, _EMBEDDING_DIMS.get(dims)
+
+
+def read_torch_summary(path: Path) -> Optional[Dict[str, Any]]:
+    """tensor_summary() of a PyTorch file (.pt/.pth/.bin/.ckpt) plus "format" (zip/legacy) and
+    "architecture"; reads the pickled structure without unpickling it (never the tensor data).
+    None if the file is not a readable PyTorch archive."""
+    tensors = _TorchTensors()
+    try:
+        with path.open('rb') as f:
+            head = f.read(SAMPLE_SIZE)
+            size = os.fstat(f.fileno()).st_size
+            if not tensors.read(f, head, _read_tail(f, size), size):
+                return None
+    except Exception:
+        return None
+    return {"format": tensors.format, "tensors": tensors.count, "params": tensors.params,
+            "dtypes": tensors.dtypes, "architecture": tensors.fp.result()}
 
 
 def fast_id(path: Path) -> str:
@@ -33,27 +847,16 @@ def fast_id(path: Path) -> str:
     Vermeidet das Durchlesen von Multi-GB-Dateien.
     """
     st = path.stat()
-    basis = f"{path.name}|{st.st_size}|{int(st.st_mtime_ns)}".encode("utf-8")
-    h = hashlib.blake2s(digest_size=16)
-    h.update(basis)
+    head = tail = b""
     # bis zu 64 KiB vom Anfang + Ende (falls vorhanden)
     try:
         with path.open("rb") as f:
-            head = f.read(65536)
-            if head:
-                h.update(head)
-            if st.st_size > 131072:
-                try:
-                    f.seek(-65536, os.SEEK_END)
-                    tail = f.read(65536)
-                    if tail:
-                        h.update(tail)
-                except OSError:
-                    pass
+            head = f.read(SAMPLE_SIZE)
+            tail = _read_tail(f, st.st_size)
     except Exception:
         # Sampling optional – Basis reicht
         pass
-    return h.hexdigest()
+    return _id_digest(path.name, st, head, tail)
 
 
 def guess_base_model(name: str) -> str:
@@ -98,21 +901,19 @@ def read_safetensors_metadata(path: Path) -> Optional[Dict[str, Any]]:
     try:
         with path.open('rb') as f:
             # First 8 bytes = header length (little-endian uint64)
-            header_len_bytes = f.read(8)
-            if len(header_len_bytes) < 8:
-                return None
-            header_len = struct.unpack('<Q', header_len_bytes)[0]
-            
-            # Read header JSON (limit to 10MB for safety)
-            if header_len > 10_000_000:
-                return None
-            header_json = f.read(header_len)
-            header = json.loads(header_json.decode('utf-8'))
-            
-            # Metadata is in __metadata__ key
-            return header.get('__metadata__', {})
+            return _read_safetensors_metadata(f, f.read(SAMPLE_SIZE))[0]
+    except Exception:
+        return None
+
+
+def read_safetensors_summary(path: Path) -> Optional[Dict[str, Any]]:
+    """tensor_summary() of a safetensors file (reads the complete header)."""
+    try:
+        with path.open('rb') as f:
+            header_json = _read_safetensors_header(f, f.read(SAMPLE_SIZE))
     except Exception:
         return None
+    return tensor_summary(header_json) if header_json is not None else None
 
 
 def extract_trigger_from_comment(comment: str) -> Optional[str]:
@@ -130,26 +931,42 @@ def extract_trigger_from_comment(comment: str) -> Optional[str]:
     return None
 
 
-def extract_top_tags(tag_frequency: str, top_n: int = 15) -> Optional[str]:
-    """Extract top N tags from ss_tag_frequency JSON string."""
+def tag_frequency_counts(tag_frequency: str) -> Optional[Dict[str, int]]:
+    """ss_tag_frequency JSON string -> {tag: count} summed over all datasets (None if unreadable)."""
     try:
         tag_data = json.loads(tag_frequency)
-        # Flatten all tag frequencies from all categories
-        all_tags = {}
+        all_tags: Dict[str, int] = {}
         for category_tags in tag_data.values():
-            if isinstance(category_tags, dict):
-                for tag, count in category_tags.items():
-                    all_tags[tag] = all_tags.get(tag, 0) + count
-        
-        # Sort by frequency and take top N (excluding the trigger word itself)
-        sorted_tags = sorted(all_tags.items(), key=lambda x: x[1], reverse=True)
-        top_tags = [tag for tag, _ in sorted_tags[:top_n]]
-        
-        return ', '.join(top_tags) if top_tags else None
+            if not isinstance(category_tags, dict):
+                continue
+            if not all_tags:
+                # meist nur ein Datensatz -> Kopie statt Merge Tag für Tag
+                all_tags = dict(category_tags)
+                continue
+            get = all_tags.get
+            for tag, count in category_tags.items():
+                all_tags[tag] = get(tag, 0) + count
+        return all_tags
     except Exception:
         return None
 
 
+def most_frequent_tags(counts: Dict[str, int], top_n: int) -> List[tuple[str, int]]:
+    """The top_n (tag, count) pairs, most frequent first; ties keep their order (like a stable sort).
+    The top k of the result are the same as most_frequent_tags(counts, k)."""
+    return [(tag, counts[tag]) for tag in heapq.nlargest(top_n, counts, key=counts.__getitem__)]
+
+
+def extract_top_tags(tag_frequency: str, top_n: int = 15) -> Optional[str]:
+    """Extract top N tags from ss_tag_frequency JSON string."""
+    counts = tag_frequency_counts(tag_frequency)
+    try:
+        top_tags = [tag for tag, _ in most_frequent_tags(counts, top_n)] if counts else []
+    except TypeError:  # Zähler sind keine Zahlen
+        return None
+    return ', '.join(top_tags) if top_tags else None
+
+
 def extract_civitai_url(metadata: Dict[str, Any]) -> Optional[str]:
     """Try to extract CivitAI URL from metadata."""
     # Common fields where URLs might be stored
@@ -189,84 +1006,600 @@ def extract_base_from_metadata(metadata: Dict[str, Any]) -> Optional[str]:
     return None
 
 
-def collect_items(root: Path) -> List[Dict[str, Any]]:
-    items: List[Dict[str, Any]] = []
+def load_previous_items(path: str | Path | None) -> Optional[List[Dict[str, Any]]]:
+    """Items of an earlier catalog@1 file, or None if it is missing/unreadable."""
+    if not path:
+        return None
+    try:
+        return list(iter_catalog_items(path))
+    except (OSError, ValueError, EOFError):
+        return None
+
+
+def load_previous_index(path: str | Path | None) -> Optional[Dict[str, tuple]]:
+    """Compact form of load_previous_items() for incremental scans:
+    {path: (type, size, mtime_ns, item JSON as stored in the file)} — a string per item instead
+    of a dict tree, and the old catalog is read item by item. None if it is missing/unreadable."""
+    if not path:
+        return None
+    index: Dict[str, tuple] = {}
+    try:
+        for it, raw in _iter_catalog_raw(path):
+            if isinstance(it, dict) and "path" in it:
+                index[it["path"]] = (*_reuse_key(it), raw)
+    except (OSError, ValueError, EOFError):
+        return None
+    return index
+
+
+def _walk_files(folder: Path, stats: Optional[Dict[str, Any]] = None):
+    """(path, stat) for every file below folder — one stat per file, like rglob("*") + is_file.
+    Time spent in stat() is added to stats["stat_s"]."""
+    try:
+        with os.scandir(folder) as it:
+            entries = list(it)
+    except PermissionError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_files(Path(entry.path), stats)
+            elif entry.is_file():
+                t0 = time.perf_counter()
+                st = entry.stat()
+                if stats is not None:
+                    stats["stat_s"] = stats.get("stat_s", 0.0) + time.perf_counter() - t0
+                yield Path(entry.path), st
+        except OSError:
+            continue
+
+
+_YAML_BOOL = {"true": True, "yes": True, "on": True, "false": False, "no": False, "off": False}
+
+
+def _parse_simple_yaml(text: str) -> Dict[str, Any]:
+    """The YAML subset of extra_model_paths.yaml, read the way PyYAML's safe_load reads it:
+    nested mappings, plain/quoted scalars (true/false/yes/no/on/off -> bool, null/~/empty -> None),
+    "|"/">" block scalars with "-"/"+" chomping, and comments. Lists, flow collections,
+    anchors and multi-line plain scalars are not supported (ComfyUI's examples don't use them)."""
+    def scalar(value: str, quoted_only: bool = False) -> Any:
+        value = value.strip()
+        if value[:1] in ("'", '"') and value.find(value[0], 1) > 0:
+            return value[1:value.find(value[0], 1)]
+        value = re.sub(r"(^|\s)#.*$", "", value).strip()
+        if quoted_only:
+            return value
+        if value.lower() in _YAML_BOOL and value in (value.lower(), value.capitalize(), value.upper()):
+            return _YAML_BOOL[value.lower()]
+        if value in ("", "~", "null", "Null", "NULL"):
+            return None
+        return value
+
+    def indent_of(line: str) -> int:
+        return len(line) - len(line.lstrip(" "))
+
+    def is_content(line: str) -> bool:
+        stripped = line.strip()
+        return bool(stripped) and not stripped.startswith("#")
+
+    lines = text.splitlines()
+    root: Dict[str, Any] = {}
+    stack: List[tuple[int, Dict[str, Any]]] = [(-1, root)]
+    i = 0
+    while i < len(lines):
+        line = lines[i].rstrip()
+        i += 1
+        if not is_content(line) or ":" not in line:
+            continue
+        indent = indent_of(line)
+        while indent <= stack[-1][0]:
+            stack.pop()
+        key, _, value = line.strip().partition(":")
+        key, value = scalar(key, quoted_only=True), value.strip()
+        parent = stack[-1][1]
+        header = re.sub(r"\s+#.*$", "", value)
+        if header[:1] in ("|", ">"):
+            block = []
+            while i < len(lines) and (not lines[i].strip() or indent_of(lines[i]) > indent):
+                block.append(lines[i].rstrip())
+                i += 1
+            body = [ln for ln in block if ln.strip()]
+            cut = min((indent_of(ln) for ln in body), default=0)
+            block = [ln[cut:] for ln in block]
+            trailing = 0
+            while block and not block[-1]:
+                block.pop()
+                trailing += 1
+            if header[0] == "|":
+                content = "\n".join(block)
+            else:  # folded: single newlines become spaces, blank lines stay newlines
+                content = re.sub(r"(?<!\n)\n(?!\n)", " ", "\n".join(block))
+            if "-" in header or not content:
+                parent[key] = content
+            elif "+" in header:
+                parent[key] = content + "\n" * (1 + trailing)
+            else:
+                parent[key] = content + "\n"
+            continue
+        if scalar(value) is None:
+            j = i
+            while j < len(lines) and not is_content(lines[j]):
+                j += 1
+            if j < len(lines) and indent_of(lines[j]) > indent:
+                child: Dict[str, Any] = {}
+                parent[key] = child
+                stack.append((indent, child))
+                continue
+        parent[key] = scalar(value)
+    return root
+
+
+def load_extra_model_paths(config: str | Path) -> List[tuple[str, Path, List[tuple[str, Path]]]]:
+    """(section, base_path, [(kind, folder)]) for every section of an extra_model_paths.yaml.
+    Relative paths are resolved like ComfyUI does (base_path relative to the YAML file)."""
+    config = Path(config).expanduser()
+    text = config.read_text(encoding="utf-8")
+    try:
+        import yaml  # ComfyUI bringt PyYAML mit; ohne reicht der Mini-Parser
+    except ImportError:
+        data = _parse_simple_yaml(text)
+    else:
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"invalid YAML: {e}") from e
+    if not isinstance(data, dict):
+        data = {}
+
+    def as_path(value: str, base: Path) -> Path:
+        p = Path(os.path.expandvars(value)).expanduser()
+        return p if p.is_absolute() else base / p
+
+    sections = []
+    for name, section in data.items():
+        if not isinstance(section, dict):
+            continue
+        base = as_path(str(section.get("base_path") or "."), config.parent)
+        folders = []
+        for key, value in section.items():
+            kind = COMFY_FOLDER_KINDS.get(str(key))
+            if kind is None or value is None:
+                continue
+            for line in str(value).splitlines():
+                if line.strip():
+                    folders.append((kind, as_path(line.strip(), base)))
+        sections.append((str(name), base, folders))
+    return sections
+
+
+def model_sources(root: Path, extra_paths: str | Path | bool | None = None) -> List[tuple[str, Path, List[tuple[str, Path]]]]:
+    """(label, base, [(kind, folder)]) for the ComfyUI root ("root") and every section of its
+    extra_model_paths.yaml. ``extra_paths``: path of the YAML; None = <root>/extra_model_paths.yaml
+    if present; False = ignore. Only existing folders, each listed once (first occurrence wins)."""
+    root = Path(root)
+    sources = [("root", root, [(kind, root / rel) for kind, rels in MODEL_SUBFOLDERS.items() for rel in rels])]
+    if extra_paths is None:
+        extra_paths = root / EXTRA_PATHS_FILE
+        if not extra_paths.exists():
+            extra_paths = False
+    if extra_paths:
+        try:
+            sources += load_extra_model_paths(extra_paths)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            print(f"⚠️  Could not read {extra_paths}: {e}", file=sys.stderr)
+
+    seen = set()
+    result = []
+    for label, base, folders in sources:
+        existing = []
+        for kind, folder in folders:
+            folder = folder.resolve()
+            if folder in seen or not folder.is_dir():
+                continue
+            seen.add(folder)
+            existing.append((kind, folder))
+        if existing or label == "root":
+            result.append((label, base.resolve(), existing))
+    return result
 
-    def add_item(kind: str, path: Path):
-        name = path.stem
-        base = guess_base_model(name)
-        st = path.stat()
-        
-        # Basic item data
+
+def model_folders(root: Path, extra_paths: str | Path | bool | None = None) -> List[tuple[str, Path]]:
+    """(kind, folder) for every existing MODEL_SUBFOLDERS entry below root and every
+    folder of its extra_model_paths.yaml (see model_sources)."""
+    return [(kind, folder) for _, _, folders in model_sources(root, extra_paths) for kind, folder in folders]
+
+
+def accepts(kind: str, path: Path) -> bool:
+    """Does a file with this extension belong in the catalog for this kind?"""
+    return path.suffix.lower() in KIND_EXT.get(kind, ())
+
+
+def iter_model_files(root: Path, stats: Optional[Dict[str, Any]] = None,
+                     extra_paths: str | Path | bool | None = None):
+    """(kind, path, stat) for all model files below the model folders of root (incl. extra paths)."""
+    seen = set()
+    for kind, folder in model_folders(root, extra_paths):
+        for p, st in _walk_files(folder, stats):
+            if accepts(kind, p) and p not in seen:
+                seen.add(p)
+                yield kind, p, st
+
+
+def _build_item(kind: str, path: Path, st: os.stat_result) -> tuple[Dict[str, Any], int, float, float,
+                                                                  Optional[List[tuple[str, int]]]]:
+    """build_item() plus bytes read, seconds spent reading (sampling + header) and parsing, and
+    the LoRA's TAG_INDEX_TOP most frequent (tag, count) pairs (for the TagIndex; None if none)."""
+    name = path.stem
+    head = tail = b""
+    metadata = arch = None
+    header_read = 0
+    decode_s = 0.0
+    suffix = path.suffix.lower()
+    is_safetensors = suffix == '.safetensors'
+    read_error = None
+    top_tags = None
+    layout = None
+    t0 = time.perf_counter()
+    try:
+        with path.open("rb") as f:
+            head = f.read(SAMPLE_SIZE)
+            if is_safetensors:
+                try:
+                    hdr = _SafetensorsHeader(f, head)
+                    metadata = hdr.metadata()
+                    arch = hdr.architecture()
+                    header_read, decode_s = hdr.nread, hdr.decode_s
+                    if kind == "embedding" and hdr.table() is not None:
+                        layout = embedding_layout(hdr.shapes())
+                except Exception:
+                    metadata = arch = None
+            tail = _read_tail(f, st.st_size)
+            if suffix in TORCH_EXT:
+                # Pickle-Struktur statt Unpickling; Checkpoints nur bis der Fingerprint entschieden ist
+                tensors = _TorchTensors(EMBEDDING_MAX_TENSORS if kind == "embedding" else 0, early=True)
+                t2 = time.perf_counter()
+                try:
+                    if tensors.read(f, head, tail, st.st_size):
+                        arch = tensors.fp.result()
+                        if kind == "embedding" and tensors.count <= EMBEDDING_MAX_TENSORS:
+                            layout = embedding_layout([shape for _, shape in tensors.tensors])
+                except Exception:
+                    arch = layout = None
+                header_read += tensors.nread
+                decode_s += time.perf_counter() - t2
+    except OSError as e:
+        # Sampling optional – Basis reicht, der Fehler landet im Item
+        read_error = _error_text(e)
+    except Exception:
+        pass
+    nbytes = len(head) + len(tail) + header_read
+    t1 = time.perf_counter()
+
+    # Basic item data
+    item = {
+        "id": _id_digest(path.name, st, head, tail),
+        "type": kind,
+        "name": name,
+        "path": str(path),
+        "size": st.st_size,
+        "base": guess_base_model(name),
+        "mtime": int(st.st_mtime),
+        "mtime_ns": st.st_mtime_ns,
+    }
+    if read_error:
+        item["error"] = read_error
+
+    # Extract metadata from safetensors files
+    if metadata:
+        # Extract base model from metadata (overrides filename guess)
+        meta_base = extract_base_from_metadata(metadata)
+        if meta_base:
+            item['base'] = meta_base
+
+        # Extract CivitAI URL
+        civitai_url = extract_civitai_url(metadata)
+        if civitai_url:
+            item['civitai_url'] = civitai_url
+
+        # For LoRAs: extract trigger and tags
+        if kind == 'lora':
+            # Trigger from ss_training_comment
+            training_comment = metadata.get('ss_training_comment', '')
+            if training_comment:
+                trigger = extract_trigger_from_comment(training_comment)
+                if trigger:
+                    item['trigger'] = trigger
+
+            # Top tags from ss_tag_frequency
+            tag_frequency = metadata.get('ss_tag_frequency', '')
+            if tag_frequency:
+                tag_counts = tag_frequency_counts(tag_frequency)
+                try:
+                    top_tags = most_frequent_tags(tag_counts, max(15, TAG_INDEX_TOP)) if tag_counts else None
+                except TypeError:  # Zähler sind keine Zahlen
+                    top_tags = None
+                if top_tags:
+                    item['tags'] = ', '.join(tag for tag, _ in top_tags[:15])
+
+    # Tensor-Fingerprint schlägt Metadaten und Dateinamen; Pony/Illustrious (SDXL-Layout) bleiben erhalten
+    if layout:
+        # Embedding: Anzahl Vektoren; die Vektor-Dimension ersetzt den Dateinamen, wenn keine Signatur greift
+        item['vectors'] = layout[0]
+        arch = arch or layout[1]
+    if arch and not (arch == "sdxl" and item['base'] == "pony"):
+        item['base'] = arch
+
+    return item, nbytes, t1 - t0 - decode_s, time.perf_counter() - t1 + decode_s, top_tags
+
+
+def build_item(kind: str, path: Path, st: os.stat_result,
+               tag_index: Optional["TagIndex"] = None) -> Dict[str, Any]:
+    """Catalog entry for one file. Opens the file once for ID samples and safetensors header.
+    Doesn't raise: problems with the file end up in the entry's "error" field. A LoRA's tag
+    counts also go into ``tag_index``, if given."""
+    item, _, _, _, top_tags = _build_item_safe(kind, path, st)
+    if tag_index is not None and item["type"] == "lora" and "error" not in item:
+        tag_index.add_tags(item["id"], top_tags or [])
+    return item
+
+
+def _error_text(e: BaseException) -> str:
+    return f"{type(e).__name__}: {e}"
+
+
+def _build_item_safe(kind: str, path: Path, st: os.stat_result):
+    """_build_item(), but a file that makes it fail still gets a (basic) entry with "error"
+    instead of aborting the whole scan."""
+    try:
+        return _build_item(kind, path, st)
+    except Exception as e:
         item = {
-            "id": fast_id(path),
+            "id": _id_digest(path.name, st, b"", b""),
             "type": kind,
-            "name": name,
+            "name": path.stem,
             "path": str(path),
             "size": st.st_size,
-            "base": base,
+            "base": guess_base_model(path.stem),
             "mtime": int(st.st_mtime),
+            "mtime_ns": st.st_mtime_ns,
+            "error": _error_text(e),
         }
-        
-        # Extract metadata from safetensors files
-        if path.suffix.lower() == '.safetensors':
-            metadata = read_safetensors_metadata(path)
-            if metadata:
-                # Extract base model from metadata (overrides filename guess)
-                meta_base = extract_base_from_metadata(metadata)
-                if meta_base:
-                    item['base'] = meta_base
-                
-                # Extract CivitAI URL
-                civitai_url = extract_civitai_url(metadata)
-                if civitai_url:
-                    item['civitai_url'] = civitai_url
-                
-                # For LoRAs: extract trigger and tags
-                if kind == 'lora':
-                    # Trigger from ss_training_comment
-                    training_comment = metadata.get('ss_training_comment', '')
-                    if training_comment:
-                        trigger = extract_trigger_from_comment(training_comment)
-                        if trigger:
-                            item['trigger'] = trigger
-                    
-                    # Top tags from ss_tag_frequency
-                    tag_frequency = metadata.get('ss_tag_frequency', '')
-                    if tag_frequency:
-                        top_tags = extract_top_tags(tag_frequency, top_n=15)
-                        if top_tags:
-                            item['tags'] = top_tags
-        
-        items.append(item)
-
-    for kind, rels in MODEL_SUBFOLDERS.items():
-        for rel in rels:
-            folder = (root / rel).resolve()
-            if not folder.exists():
-                continue
-            # schneller als rglob("*") + is_file Checks
-            for p in folder.rglob("*"):
-                if not p.is_file():
+        return item, 0, 0.0, 0.0, None
+
+
+def _reuse_key(it: Dict[str, Any]) -> tuple:
+    """(type, size, mtime_ns) an incremental scan compares; entries with "error" never match,
+    so the file is read again."""
+    return it.get("type"), (None if "error" in it else it.get("size")), it.get("mtime_ns")
+
+
+_STAT_KEYS = ("reused", "updated", "added", "removed", "files_seen", "bytes_sampled", "errors") + PHASES[:4]
+
+
+def _iter_device(entries: List[tuple[str, str, Path]], prev_by_path: Dict[str, tuple],
+                 stats: Dict[str, Any], workers: int,
+                 tag_index: Optional["TagIndex"] = None) -> Iterator[tuple[str, Dict[str, Any]]]:
+    """(label, item) for the folders of one device, in walk order (see iter_items)."""
+    def finish(built):
+        item, nbytes, sample_s, parse_s, top_tags = built
+        stats["bytes_sampled"] += nbytes
+        stats["sample_s"] += sample_s
+        stats["parse_s"] += parse_s
+        if "error" in item:
+            stats["errors"] += 1
+        if tag_index is not None and item["type"] == "lora" and "error" not in item:
+            tag_index.add_tags(item["id"], top_tags or [])
+        return item
+
+    def files():
+        seen = set()
+        for label, kind, folder in entries:
+            for p, st in _walk_files(folder, stats):
+                if accepts(kind, p) and p not in seen:
+                    seen.add(p)
+                    yield label, kind, p, st
+
+    def walk():
+        # Time spent in the directory walk itself (without stat, which _walk_files books separately)
+        it = files()
+        while True:
+            t0 = time.perf_counter()
+            stat_before = stats["stat_s"]
+            try:
+                entry = next(it)
+            except StopIteration:
+                stats["walk_s"] += time.perf_counter() - t0 - (stats["stat_s"] - stat_before)
+                return
+            stats["walk_s"] += time.perf_counter() - t0 - (stats["stat_s"] - stat_before)
+            yield entry
+
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    pending: deque = deque()  # (label, item or future), in walk order; bounded for back-pressure
+    max_pending = workers * 4
+    try:
+        for label, kind, path, st in walk():
+            stats["files_seen"] += 1
+            old = prev_by_path.pop(str(path), None)
+            if old is not None:
+                if old[:3] == (kind, st.st_size, st.st_mtime_ns) and old[3] is None:
+                    # unverändert, wird nur für den Tag-Index neu gelesen (previous_state)
+                    stats["reused"] += 1
+                    old = None
+                elif old[:3] == (kind, st.st_size, st.st_mtime_ns):
+                    stats["reused"] += 1
+                    item = old[3] if isinstance(old[3], dict) else json.loads(old[3])
+                    if pool is None:
+                        yield label, item
+                        continue
+                    pending.append((label, item))
+                else:
+                    stats["updated"] += 1
+                    old = None
+            else:
+                stats["added"] += 1
+
+            if old is None:
+                if pool is None:
+                    yield label, finish(_build_item_safe(kind, path, st))
                     continue
-                ext = p.suffix.lower()
-                if kind == "checkpoint" and ext in CHECKPOINT_EXT:
-                    add_item("checkpoint", p)
-                elif kind == "lora" and ext in LORA_EXT:
-                    add_item("lora", p)
-                elif kind == "embedding" and ext in EMBED_EXT:
-                    add_item("embedding", p)
+                pending.append((label, pool.submit(_build_item_safe, kind, path, st)))
+            # Emit everything that is already done at the front of the queue (reused entries included,
+            # so a mostly unchanged library does not pile up here)
+            while pending and (len(pending) > max_pending or not isinstance(pending[0][1], Future)
+                               or pending[0][1].done()):
+                label, head = pending.popleft()
+                yield label, (finish(head.result()) if isinstance(head, Future) else head)
+        while pending:
+            label, head = pending.popleft()
+            yield label, (finish(head.result()) if isinstance(head, Future) else head)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _iter_devices(groups: List[List[tuple[str, str, Path]]], prev_by_path: Dict[str, tuple],
+                  stats: Dict[str, Any], workers: int,
+                  tag_index: Optional["TagIndex"] = None) -> Iterator[tuple[str, Dict[str, Any]]]:
+    """_iter_device() for several devices at once: one thread per device, merged via a bounded queue.
+    Every thread counts into its own stats dict; they are summed into ``stats`` as items arrive."""
+    done = object()
+    results: queue.Queue = queue.Queue(maxsize=max(64, workers * 8 * len(groups)))
+    stop = threading.Event()
+    base = {key: stats[key] for key in _STAT_KEYS}
+    parts: List[Dict[str, Any]] = [dict.fromkeys(_STAT_KEYS, 0) for _ in groups]
+
+    def put(obj) -> bool:
+        while not stop.is_set():
+            try:
+                results.put(obj, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
 
+    def run(entries, part):
+        try:
+            for out in _iter_device(entries, prev_by_path, part, workers, tag_index):
+                if not put(out):
+                    return
+        except BaseException as e:  # an den Aufrufer weiterreichen
+            put(e)
+        finally:
+            put(done)
+
+    threads = [threading.Thread(target=run, args=(entries, part), name=f"scan-device-{i}", daemon=True)
+               for i, (entries, part) in enumerate(zip(groups, parts))]
+    for t in threads:
+        t.start()
+    try:
+        running = len(threads)
+        while running:
+            out = results.get()
+            if out is done:
+                running -= 1
+                continue
+            if isinstance(out, BaseException):
+                raise out
+            for key in _STAT_KEYS:
+                stats[key] = base[key] + sum(part[key] for part in parts)
+            yield out
+        for key in _STAT_KEYS:
+            stats[key] = base[key] + sum(part[key] for part in parts)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(timeout=5)
+
+
+def iter_items(root: Path, previous: Optional[List[Dict[str, Any]] | Dict[str, tuple]] = None,
+               stats: Optional[Dict[str, Any]] = None, workers: int = 1,
+               extra_paths: str | Path | bool | None = None,
+               tag_index: Optional["TagIndex"] = None) -> Iterator[Dict[str, Any]]:
+    """Yield catalog items as they are produced (unsorted).
+
+    Covers the model folders of root and of its extra_model_paths.yaml (see
+    model_sources). Folders on different devices are walked concurrently, one
+    thread per device, so disks don't seek against each other; within a
+    device items come in walk order. ``workers`` > 1 fans the per-file reads
+    of each device out to a thread pool.
+
+    With ``previous`` (items of an earlier catalog, or its load_previous_index();
+    the index is consumed), entries whose size and mtime_ns are unchanged are
+    carried forward as-is instead of being sampled and parsed again. A file
+    that can't be read or parsed is yielded with an "error" field (and read
+    again next time). ``stats`` is updated while iterating: reused/updated/
+    added/removed, files_seen, bytes_sampled and errors (for progress reporting), the
+    phase timers walk_s, stat_s, sample_s and parse_s (seconds; summed over
+    all threads) and ``roots``: {label: {path, files, bytes, types}}.
+    Every item (and the tag counts of every LoRA read) also goes into
+    ``tag_index``, if given.
+    """
+    if isinstance(previous, dict):
+        prev_by_path = previous
+    else:
+        prev_by_path = {it["path"]: (*_reuse_key(it), it)
+                        for it in previous or [] if isinstance(it, dict) and "path" in it}
+    if stats is None:
+        stats = {}
+    for key in _STAT_KEYS[:7]:
+        stats.setdefault(key, 0)
+    for key in PHASES:
+        stats.setdefault(key, 0.0)
+
+    sources = model_sources(root, extra_paths)
+    roots = stats.setdefault("roots", {})
+    by_device: Dict[int, List[tuple[str, str, Path]]] = {}
+    for label, base, folders in sources:
+        roots.setdefault(label, {"path": str(base), "files": 0, "bytes": 0, "types": {}})
+        for kind, folder in folders:
+            try:
+                dev = folder.stat().st_dev
+            except OSError:
+                continue
+            by_device.setdefault(dev, []).append((label, kind, folder))
+
+    groups = list(by_device.values())
+    if len(groups) > 1:
+        produced = _iter_devices(groups, prev_by_path, stats, workers, tag_index)
+    else:
+        produced = _iter_device(groups[0] if groups else [], prev_by_path, stats, workers, tag_index)
+    for label, item in produced:
+        r = roots[label]
+        r["files"] += 1
+        r["bytes"] += item.get("size", 0)
+        r["types"][item["type"]] = r["types"].get(item["type"], 0) + 1
+        if tag_index is not None:
+            tag_index.add_item(item)
+        yield item
+
+    # Everything not seen again has been deleted (or moved)
+    stats["removed"] += len(prev_by_path)
+
+
+def sort_items(items: List[Dict[str, Any]], stats: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    t0 = time.perf_counter()
     items.sort(key=lambda x: (x["type"], x["name"].lower()))
+    if stats is not None:
+        stats["sort_s"] = stats.get("sort_s", 0.0) + time.perf_counter() - t0
     return items
 
 
-def scan(root: str | Path, output: str | Path | None = None) -> Dict[str, Any]:
-    root = Path(root).expanduser()
-    if not root.exists():
-        raise FileNotFoundError(f"ComfyUI root does not exist: {root}")
+def collect_items(root: Path, previous: Optional[List[Dict[str, Any]] | Dict[str, tuple]] = None,
+                  counts: Optional[Dict[str, int]] = None, workers: int = 1,
+                  extra_paths: str | Path | bool | None = None) -> List[Dict[str, Any]]:
+    """Walk the model folders and build sorted catalog items (see iter_items).
+
+    The result order is the same for sequential and parallel scans.
+    """
+    return sort_items(list(iter_items(root, previous, counts, workers=workers, extra_paths=extra_paths)), counts)
 
-    items = collect_items(root)
+
+def make_catalog(root: Path, items: List[Dict[str, Any]],
+                 counts: Optional[Dict[str, int]] = None,
+                 roots: Optional[Dict[str, Dict[str, Any]]] = None, errors: int = 0) -> Dict[str, Any]:
+    """Wrap sorted items into a comfydash/catalog@1 document. ``roots`` (per-root stats of
+    iter_items) is added when models come from more than one root, ``errors`` (number of items
+    with an "error" field) when there are any."""
     catalog: Dict[str, Any] = {
         "schema": "comfydash/catalog@1",
         "generated_at": datetime.now(timezone.utc).isoformat(),
@@ -274,12 +1607,579 @@ def scan(root: str | Path, output: str | Path | None = None) -> Dict[str, Any]:
         "count": len(items),
         "items": items,
     }
+    if counts is not None:
+        catalog["incremental"] = {k: counts.get(k, 0) for k in ("reused", "updated", "added", "removed")}
+    if roots and len(roots) > 1:
+        catalog["roots"] = [{"label": label, **data} for label, data in roots.items()]
+    if errors:
+        catalog["errors"] = errors
+    return catalog
+
+
+def read_catalog(path: str | Path) -> Dict[str, Any]:
+    """Load a catalog file (or another JSON file written by write_catalog); "*.gz" is
+    gzip-compressed compact JSON."""
+    path = Path(path).expanduser()
+    if path.suffix.lower() == ".gz":
+        return json.loads(gzip.decompress(path.read_bytes()))
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+_CATALOG_SCHEMA = re.compile(r'"schema"\s*:\s*"comfydash/catalog@1"')
+_ITEMS_KEY = re.compile(r'"items"\s*:\s*\[')
+READ_CHUNK = 1024 * 1024          # blockweises Lesen großer Kataloge
+
+
+def iter_catalog_items(path: str | Path) -> Iterator[Dict[str, Any]]:
+    """Items of a catalog file (plain or "*.gz"), decoded one at a time from a
+    chunked read, so the file is never held in memory as a whole.
+    Raises ValueError if it is not a comfydash/catalog@1 document."""
+    for item, _raw in _iter_catalog_raw(path):
+        yield item
+
+
+def _iter_catalog_raw(path: str | Path) -> Iterator[tuple[Dict[str, Any], str]]:
+    """(item, its JSON text as stored in the file) — see iter_catalog_items()."""
+    path = Path(path).expanduser()
+    opener = gzip.open if path.suffix.lower() == ".gz" else open
+    with opener(path, "rb") as f:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        buf, eof = "", False
+
+        def fill():
+            nonlocal buf, eof
+            chunk = f.read(READ_CHUNK)
+            eof = not chunk
+            buf += decoder.decode(chunk, final=eof)
+
+        # Header bis '"items": [' — Schlüssel stehen vor den Items (make_catalog)
+        m = _ITEMS_KEY.search(buf)
+        while m is None:
+            if eof:
+                raise ValueError("not a comfydash/catalog@1 document")
+            fill()
+            m = _ITEMS_KEY.search(buf)
+        if not _CATALOG_SCHEMA.search(buf, 0, m.start()):
+            raise ValueError("not a comfydash/catalog@1 document")
+        pos = m.end()
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                if eof:
+                    raise ValueError("truncated catalog")
+                buf, pos = "", 0
+                fill()
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = _JSON_DECODER.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise
+                buf, pos = buf[pos:], 0
+                fill()
+                continue
+            yield item, buf[pos:end]
+            pos = end
+            if pos > READ_CHUNK:
+                buf, pos = buf[pos:], 0
+
+
+_UMASK = os.umask(0o022)     # umask lässt sich nur durch Setzen lesen ...
+os.umask(_UMASK)             # ... daher sofort zurücksetzen (einmal beim Laden des Moduls)
+
+
+def _temp_file(out: Path) -> tuple[io.BufferedWriter, Path]:
+    """(open file, path) of a new temp file next to ``out``. Unique per call (mkstemp), so two
+    writers of the same output never rename each other's temp file away."""
+    fd, name = tempfile.mkstemp(dir=out.parent, prefix=out.name + ".", suffix=".tmp")
+    try:
+        # mkstemp legt 0600 an; die Ausgabe soll die Rechte wie bisher behalten
+        mode = out.stat().st_mode & 0o777
+    except OSError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(name, mode)
+    return os.fdopen(fd, "wb"), Path(name)
+
+
+def _discard(tmp: Path):
+    try:
+        tmp.unlink()
+    except OSError:
+        pass
+
 
-    if output:
+def _write_atomic(out: Path, raw: bytes) -> Path:
+    """Write ``raw`` to ``out`` via its own temp file + rename; readers never see half a file."""
+    f, tmp = _temp_file(out)
+    try:
+        with f:
+            f.write(raw)
+        os.replace(tmp, out)
+    except BaseException:
+        _discard(tmp)
+        raise
+    return out
+
+
+class CatalogWriter:
+    """Streams a catalog@1 file to disk while the items are still being produced.
+
+    add() serializes each item right away — already in its final layout
+    (indent=2, or compact for "*.gz") — into an anonymous spill file next to
+    the output and keeps only a (type, lower-case name, offset, length) tuple
+    in memory. finish() sorts those tuples like sort_items(), copies the items
+    in that order between header and footer into a temp file and renames it
+    over the output. The result is the same document write_catalog() writes.
+    """
+
+    def __init__(self, output: str | Path):
+        self.path = Path(output).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compact = self.path.suffix.lower() == ".gz"
+        self.write_s = 0.0
+        self._spill = tempfile.TemporaryFile(dir=self.path.parent, prefix=".catalog-", suffix=".spill")
+        self._rows: List[tuple] = []
+        self._offset = 0
+
+    def __enter__(self) -> "CatalogWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._spill.close()
+
+    def add(self, item: Dict[str, Any]):
+        t0 = time.perf_counter()
+        if self.compact:
+            text = json.dumps(item, ensure_ascii=False, separators=(",", ":"))
+        else:
+            # Einrückung wie im Gesamtdokument (Ebene 2); JSON-Strings enthalten keine rohen "\n"
+            text = json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+        raw = text.encode("utf-8")
+        self._spill.write(raw)
+        # Gleiche Namen behalten über den Offset die Reihenfolge von add() (wie der stabile sort_items)
+        self._rows.append((item["type"], item["name"].lower(), self._offset, len(raw)))
+        self._offset += len(raw)
+        self.write_s += time.perf_counter() - t0
+
+    def finish(self, root: Path, counts: Optional[Dict[str, int]] = None,
+               roots: Optional[Dict[str, Dict[str, Any]]] = None,
+               stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Write the catalog and return its header (make_catalog() without "items").
+        ``stats`` receives sort_s and write_s (serialization in add() included)."""
+        t0 = time.perf_counter()
+        self._rows.sort()
+        sort_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        catalog = make_catalog(root, [], counts, roots, (stats or {}).get("errors", 0))
+        catalog["count"] = len(self._rows)
+        if self.compact:
+            text = json.dumps(catalog, ensure_ascii=False, separators=(",", ":"))
+            marker, sep, close = '"items":[]', ",", "]"
+        else:
+            text = json.dumps(catalog, ensure_ascii=False, indent=2)
+            marker, sep, close = '"items": []', ",\n    ", "\n  ]" if self._rows else "]"
+        # Der Key kann nur auf Objektebene so vorkommen (Anführungszeichen in Strings sind escaped)
+        head, tail = text.split(marker, 1)
+        head += marker[:-1] + ("" if self.compact or not self._rows else "\n    ")
+
+        raw_out, tmp = _temp_file(self.path)
+        try:
+            with raw_out:
+                out = gzip.GzipFile(fileobj=raw_out, mode="wb", compresslevel=6) if self.compact else raw_out
+                parts = [head.encode("utf-8")]
+                size = 0
+                joiner = sep.encode("utf-8")
+                for i, (_type, _name, offset, length) in enumerate(self._rows):
+                    if i:
+                        parts.append(joiner)
+                    self._spill.seek(offset)
+                    parts.append(self._spill.read(length))
+                    size += length
+                    if size >= READ_CHUNK:
+                        out.write(b"".join(parts))
+                        parts, size = [], 0
+                parts.append((close + tail).encode("utf-8"))
+                out.write(b"".join(parts))
+                if out is not raw_out:
+                    out.close()
+            os.replace(tmp, self.path)
+        except BaseException:
+            _discard(tmp)
+            raise
+        finally:
+            self.close()
+        self.write_s += time.perf_counter() - t0
+        if stats is not None:
+            stats["sort_s"] = stats.get("sort_s", 0.0) + sort_s
+            stats["write_s"] = stats.get("write_s", 0.0) + self.write_s
+        del catalog["items"]
+        return catalog
+
+
+def write_catalog(output: str | Path, catalog: Dict[str, Any]) -> Path:
+    """Write a catalog atomically (temp file + rename).
+
+    "*.gz" outputs are stored as gzip-compressed compact JSON, everything else
+    as the readable indent=2 JSON of catalog@1.
+    """
+    out = Path(output).expanduser()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if out.suffix.lower() == ".gz":
+        raw = json.dumps(catalog, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return _write_atomic(out, gzip.compress(raw, compresslevel=6))
+    return _write_atomic(out, json.dumps(catalog, ensure_ascii=False, indent=2).encode("utf-8"))
+
+
+# ---------------- Tag-Index -----------------
+
+def tag_index_path(output: str | Path) -> Path:
+    """Tag index file that belongs to a catalog: catalog.json -> catalog.tags.json (.gz stays .gz)."""
+    out = Path(output).expanduser()
+    name = out.name
+    for suffix in (".json.gz", ".json"):
+        if name.lower().endswith(suffix):
+            return out.with_name(name[:-len(suffix)] + ".tags" + suffix)
+    return out.with_name(name + ".tags.json")
+
+
+def load_tag_index(path: str | Path | None) -> Optional[Dict[str, Any]]:
+    """A tag-index@1 document, or None if it is missing/unreadable."""
+    if not path:
+        return None
+    try:
+        data = read_catalog(path)
+    except (OSError, ValueError, EOFError):
+        return None
+    if isinstance(data, dict) and data.get("schema") == "comfydash/tag-index@1":
+        return data
+    return None
+
+
+class TagIndex:
+    """Inverted index over the LoRAs of one catalog, written next to it (tag_index_path).
+
+    Document (comfydash/tag-index@1, compact JSON)::
+
+        {"ids": [item id, ...],                          # every LoRA read, tags or not
+         "tags": {tag: [pos, count, pos, count, ...]},   # most frequent first
+         "triggers": {trigger: [pos, ...]}}
+
+    ``pos`` indexes "ids". Tags and triggers are stripped and lower-cased. Per
+    LoRA the TAG_INDEX_TOP most frequent ss_tag_frequency tags are kept.
+    add_tags() is called for every LoRA that was read (any thread) with its
+    top (tag, count) pairs, add_item() for every catalog item. Postings of
+    items an incremental scan carried forward unchanged (same id) come from
+    ``previous``, the old document (see previous_state()), read from ``source``.
+    """
+
+    def __init__(self, previous: Optional[Dict[str, Any]] = None, top_n: int = TAG_INDEX_TOP,
+                 source: Optional[Path] = None):
+        self.previous = previous
+        self.source = source
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._tags: Dict[str, List[tuple[str, int]]] = {}  # id -> [(tag, count)], frisch gelesen
+        self._triggers: Dict[str, List[str]] = {}  # trigger -> ids
+        self._live: set = set()
+
+    def add_tags(self, item_id: str, top_tags: List[tuple[str, int]]):
+        """The LoRA's most frequent (tag, count) pairs, e.g. most_frequent_tags(tag_frequency_counts(...), top_n)."""
+        merged: Dict[str, int] = {}
+        for tag, count in top_tags[:self.top_n]:
+            key = str(tag).strip().lower()
+            if key and isinstance(count, (int, float)) and count > 0:
+                merged[key] = merged.get(key, 0) + int(count)
+        with self._lock:
+            self._tags[item_id] = list(merged.items())
+
+    def add_item(self, item: Dict[str, Any]):
+        if "id" not in item:
+            return
+        with self._lock:
+            self._live.add(item["id"])
+            trigger = str(item.get("trigger") or "").strip().lower()
+            if trigger:
+                self._triggers.setdefault(trigger, []).append(item["id"])
+
+    def build(self) -> Dict[str, Any]:
+        fresh = {item_id: top for item_id, top in self._tags.items() if item_id in self._live}
+        prev = self.previous or {}
+        old_ids, old_tags = prev.get("ids"), prev.get("tags")
+        if not isinstance(old_ids, list) or not isinstance(old_tags, dict):
+            old_ids, old_tags = [], {}
+        carry = {i: item_id for i, item_id in enumerate(old_ids) if item_id in self._live and item_id not in fresh}
+
+        if not fresh and old_ids and len(carry) == len(old_ids) and old_ids == sorted(old_ids):
+            # nothing read again and nothing gone (typical incremental scan): postings stay as they are
+            return self._document(old_ids, old_tags, {id_: p for p, id_ in enumerate(old_ids)})
+
+        # ids sorted -> a full and an incremental scan of the same files give the same document
+        ids = sorted(set(fresh) | set(carry.values())
+                     | {item_id for item_ids in self._triggers.values() for item_id in item_ids})
+        pos = {item_id: p for p, item_id in enumerate(ids)}
+        moved = {i: pos[item_id] for i, item_id in carry.items()}
+
+        postings: Dict[str, List[tuple[int, int]]] = {}  # tag -> [(-count, pos)]
+        for item_id, top in fresh.items():
+            p = pos[item_id]
+            for tag, count in top:
+                postings.setdefault(tag, []).append((-count, p))
+        if moved:
+            for tag, flat in old_tags.items():
+                for i in range(0, len(flat) - 1, 2):
+                    p = moved.get(flat[i])
+                    if p is not None:
+                        postings.setdefault(tag, []).append((-flat[i + 1], p))
+
+        tags: Dict[str, List[int]] = {}
+        for tag in sorted(postings):
+            entries = postings[tag]
+            entries.sort()
+            flat = [0] * (2 * len(entries))
+            flat[0::2] = [p for _, p in entries]
+            flat[1::2] = [-c for c, _ in entries]
+            tags[tag] = flat
+        return self._document(ids, tags, pos)
+
+    def _document(self, ids: List[str], tags: Dict[str, List[int]], pos: Dict[str, int]) -> Dict[str, Any]:
+        triggers = {trigger: sorted(pos[item_id] for item_id in item_ids)
+                    for trigger, item_ids in sorted(self._triggers.items())}
+        return {
+            "schema": "comfydash/tag-index@1",
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "count": len(ids),
+            "ids": ids,
+            "tags": tags,
+            "triggers": triggers,
+        }
+
+    def write(self, output: str | Path, stats: Optional[Dict[str, Any]] = None) -> Path:
+        """Write the index atomically; "*.gz" is gzip-compressed. Given the ``stats`` of an
+        incremental scan that found nothing updated, added or removed and read no LoRA
+        again, the index it was loaded from stays as it is if that is ``output``."""
         out = Path(output).expanduser()
+        if (stats is not None and self.previous is not None and self.source == out and not self._tags
+                and not any(stats.get(k) for k in ("updated", "added", "removed"))):
+            return out
         out.parent.mkdir(parents=True, exist_ok=True)
-        out.write_text(json.dumps(catalog, ensure_ascii=False, indent=2), encoding="utf-8")
-    return catalog
+        raw = json.dumps(self.build(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return _write_atomic(out, gzip.compress(raw, compresslevel=6) if out.suffix.lower() == ".gz" else raw)
+
+
+def previous_state(output: str | Path, incremental: bool,
+                   previous: str | Path | None = None) -> tuple[Optional[Dict[str, tuple]], TagIndex]:
+    """Starting point of a scan into ``output``: load_previous_index() of the old catalog
+    (``previous``, default ``output``; only if ``incremental``) and the TagIndex to fill.
+    LoRAs the old tag index doesn't cover (no index yet, or written by an older version)
+    keep their entry without the item (None): they are read again and get indexed, but
+    still count as reused, not as added."""
+    if not incremental:
+        return None, TagIndex()
+    source = previous or output
+    prev_items = load_previous_index(source)
+    tag_path = tag_index_path(source)
+    old = load_tag_index(tag_path)
+    if prev_items:
+        covered = set(old.get("ids") or []) if old else set()
+        for path, entry in list(prev_items.items()):
+            if entry[0] == "lora" and entry[1] is not None:  # size None: "error", read again anyway
+                item_id = (entry[3] if isinstance(entry[3], dict) else json.loads(entry[3])).get("id")
+                if item_id not in covered:
+                    prev_items[path] = (*entry[:3], None)
+    return prev_items, TagIndex(old, source=tag_path)
+
+
+def scan(root: str | Path, output: str | Path | None = None, incremental: bool = False,
+         previous: str | Path | None = None, workers: int = 1,
+         stats: Optional[Dict[str, Any]] = None,
+         extra_paths: str | Path | bool | None = None,
+         on_item: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Scan a ComfyUI root. ``incremental`` reuses the catalog at ``previous``
+    (defaults to ``output``) for files whose size and mtime_ns are unchanged;
+    ``workers`` is the number of threads reading files (per device). ``stats``
+    receives the counters and phase timers of iter_items() plus sort_s and
+    write_s. ``extra_paths``: extra_model_paths.yaml to include (default:
+    the one in root, if any; False = none). ``on_item(item)`` is called for
+    every item as soon as it is built (the server streams them from there).
+
+    With ``output`` the items are streamed into the file as they are built
+    (CatalogWriter), the TagIndex is written next to it (tag_index_path) and
+    only the catalog header — everything but "items" — is returned; without,
+    the complete catalog is built in memory."""
+    root = Path(root).expanduser()
+    if not root.exists():
+        raise FileNotFoundError(f"ComfyUI root does not exist: {root}")
+
+    counts: Dict[str, Any] = stats if stats is not None else {}
+    workers = max(1, int(workers))
+    if not output:
+        prev_items = load_previous_index(previous) if incremental else None
+        items = []
+        for item in iter_items(root, prev_items, counts, workers=workers, extra_paths=extra_paths):
+            items.append(item)
+            if on_item is not None:
+                on_item(item)
+        return make_catalog(root, sort_items(items, counts), counts if incremental else None, counts.get("roots"),
+                            counts.get("errors", 0))
+
+    prev_items, tags = previous_state(output, incremental, previous)
+    with CatalogWriter(output) as writer:
+        for item in iter_items(root, prev_items, counts, workers=workers, extra_paths=extra_paths,
+                               tag_index=tags):
+            writer.add(item)
+            if on_item is not None:
+                on_item(item)
+        header = writer.finish(root, counts if incremental else None, counts.get("roots"), counts)
+    tags.write(tag_index_path(output), counts if incremental else None)
+    return header
+
+
+# ---------------- Duplikate -----------------
+
+def _content_sample(path: Path, size: int) -> Optional[str]:
+    """Digest of head + tail sample (content only, no name/mtime). Covers the whole file up to SAMPLE_SIZE."""
+    try:
+        with path.open("rb") as f:
+            head = f.read(SAMPLE_SIZE)
+            tail = _read_tail(f, size)
+    except OSError:
+        return None
+    h = hashlib.blake2s(digest_size=16)
+    h.update(head)
+    h.update(tail)
+    return h.hexdigest()
+
+
+_HASH_BUFFERS = threading.local()
+
+
+def sha256_file(path: Path, progress=None, throttle=None) -> str:
+    """Full SHA-256 (uppercase hex, like the CivitAI/AutoV2 hashes of the server).
+    ``progress(nbytes)`` is called after every chunk, ``throttle.consume(nbytes)`` may
+    sleep to cap the read rate (the server's IOThrottle)."""
+    h = hashlib.sha256()
+    buf = getattr(_HASH_BUFFERS, "buf", None)
+    if buf is None:
+        # Ein Puffer pro Thread, per readinto gefüllt: kein neues bytes-Objekt pro Block
+        buf = _HASH_BUFFERS.buf = memoryview(bytearray(HASH_CHUNK))
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(buf[:n])
+            if throttle is not None:
+                throttle.consume(n)
+            if progress is not None:
+                progress(n)
+    return h.hexdigest().upper()
+
+
+def _regroup(groups: List[List[tuple]], key_fn, workers: int) -> tuple[List[List[tuple]], int]:
+    """Split every group by key_fn(path, size) (run in parallel); keep sub-groups with >= 2 files.
+    Returns (groups, files whose key could not be computed)."""
+    files = [f for g in groups for f in g]
+    if workers > 1 and len(files) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            keys = list(pool.map(lambda f: key_fn(f[0], f[1]), files))
+    else:
+        keys = [key_fn(p, size) for p, size in files]
+    buckets: Dict[tuple, List[tuple]] = {}
+    failed = 0
+    for (p, size), key in zip(files, keys):
+        if key is None:
+            failed += 1
+            continue
+        buckets.setdefault((size, key), []).append((p, size, key))
+    out = [[(p, size) for p, size, _ in b] for b in buckets.values() if len(b) >= 2]
+    return out, failed
+
+
+def find_duplicates(root: str | Path, workers: int = 1, hasher=None,
+                    stats: Optional[Dict[str, Any]] = None,
+                    extra_paths: str | Path | bool | None = None) -> Dict[str, Any]:
+    """Content-identical model files below root, found in tiers:
+    1. same size, 2. same head/tail sample, 3. same full SHA-256 (only for the remaining candidates).
+
+    ``hasher(path) -> hex`` replaces the full hash (e.g. a persistent hash cache).
+    Hard links to the same file count once. Returns clusters sorted by reclaimable bytes.
+    """
+    root = Path(root).expanduser()
+    if not root.exists():
+        raise FileNotFoundError(f"ComfyUI root does not exist: {root}")
+    counts: Dict[str, Any] = stats if stats is not None else {}
+    hasher = hasher or sha256_file
+    workers = max(1, int(workers))
+    t0 = time.perf_counter()
+
+    # Stufe 1: Größe (nur stat, kein Lesen)
+    by_size: Dict[int, List[tuple]] = {}
+    inodes = set()
+    files = 0
+    for _kind, p, st in iter_model_files(root, extra_paths=extra_paths):
+        inode = (st.st_dev, st.st_ino)
+        if st.st_size == 0 or (st.st_ino and inode in inodes):
+            continue
+        inodes.add(inode)
+        files += 1
+        by_size.setdefault(st.st_size, []).append((p, st.st_size))
+    groups = [g for g in by_size.values() if len(g) >= 2]
+    counts.update({"files": files, "size_candidates": sum(len(g) for g in groups)})
+
+    # Stufe 2: Head/Tail-Sample (max. 128 KiB pro Datei)
+    groups, failed = _regroup(groups, _content_sample, workers)
+    counts["sample_candidates"] = sum(len(g) for g in groups)
+
+    # Stufe 3: Voll-Hash nur für verbliebene Kandidaten (kleine Dateien deckt das Sample schon ab)
+    small = [g for g in groups if g[0][1] <= SAMPLE_SIZE]
+    large = [g for g in groups if g[0][1] > SAMPLE_SIZE]
+
+    def full_hash(p: Path, _size: int) -> Optional[str]:
+        try:
+            return hasher(p)
+        except OSError:
+            return None
+
+    counts.update({
+        "full_hashed": sum(len(g) for g in large),
+        "bytes_hashed": sum(size for g in large for _, size in g),
+    })
+    large, failed_hash = _regroup(large, full_hash, workers)
+    counts["unreadable"] = failed + failed_hash
+
+    clusters = []
+    for group in small + large:
+        size = group[0][1]
+        clusters.append({
+            "size": size,
+            "files": sorted(str(p) for p, _ in group),
+            "reclaimable": size * (len(group) - 1),
+        })
+    clusters.sort(key=lambda c: (-c["reclaimable"], c["files"][0]))
+    counts["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    return {
+        "comfyui_root": str(root.resolve()),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "clusters": clusters,
+        "duplicate_files": sum(len(c["files"]) - 1 for c in clusters),
+        "reclaimable_bytes": sum(c["reclaimable"] for c in clusters),
+        "stats": counts,
+    }
+
+
+def _format_size(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
 
 
 # ---------------- CLI -----------------
@@ -287,21 +2187,54 @@ def scan(root: str | Path, output: str | Path | None = None) -> Dict[str, Any]:
 def parse_args(argv=None):
     ap = argparse.ArgumentParser(description="ComfyDash Scanner v1.1.1 (FAST)")
     ap.add_argument("--root", required=True, help="ComfyUI root (contains models/…)")
-    ap.add_argument("--output", help="Write catalog to this path (optional)")
+    ap.add_argument("--output", help="Write catalog to this path (optional; *.json.gz = gzip-compressed)")
     ap.add_argument("--stdout", action="store_true", help="Print catalog JSON to stdout")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Reuse unchanged entries from the previous catalog (--output or <root>/catalog.json)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Threads reading files in parallel (helps on NAS/SMB/HDD arrays, default 1)")
+    ap.add_argument("--extra-model-paths", metavar="YAML",
+                    help="ComfyUI extra_model_paths.yaml to include (default: <root>/extra_model_paths.yaml if present)")
+    ap.add_argument("--no-extra-paths", action="store_true", help="Ignore extra_model_paths.yaml")
+    ap.add_argument("--duplicates", action="store_true",
+                    help="Report content-identical model files instead of writing a catalog (--stdout = JSON)")
     return ap.parse_args(argv)
 
 
 def main(argv=None):
     args = parse_args(argv)
-    cat = scan(args.root, args.output)
-    if args.stdout:
+    extra_paths = False if args.no_extra_paths else args.extra_model_paths
+    if args.duplicates:
+        report = find_duplicates(args.root, workers=args.workers, extra_paths=extra_paths)
+        if args.stdout:
+            print(json.dumps(report, ensure_ascii=False))
+            return
+        for c in report["clusters"]:
+            print(f"{_format_size(c['size'])} x {len(c['files'])}  (reclaimable {_format_size(c['reclaimable'])})")
+            for f in c["files"]:
+                print(f"    {f}")
+        st = report["stats"]
+        print(f"🔁 {len(report['clusters'])} duplicate groups, {_format_size(report['reclaimable_bytes'])} reclaimable "
+              f"({st['files']} files, {st['full_hashed']} fully hashed, {st['elapsed_s']} s)")
+        return
+    default_out = Path(args.root) / "catalog.json"
+    previous = args.output or default_out
+    if args.stdout and not args.output:
+        cat = scan(args.root, None, incremental=args.incremental, previous=previous,
+                   workers=args.workers, extra_paths=extra_paths)
         print(json.dumps(cat, ensure_ascii=False))
-    else:
-        if not args.output:
-            default_out = Path(args.root) / "catalog.json"
-            default_out.write_text(json.dumps(cat, ensure_ascii=False, indent=2), encoding="utf-8")
-            print(f"✅ Wrote catalog: {default_out}  ({len(cat['items'])} items)")
+        return
+    output = args.output or default_out
+    cat = scan(args.root, output, incremental=args.incremental, previous=previous,
+               workers=args.workers, extra_paths=extra_paths)
+    if args.stdout:
+        # Katalog steht schon in der Datei -> unverändert durchreichen statt neu zu serialisieren
+        opener = gzip.open if Path(output).suffix.lower() == ".gz" else open
+        with opener(Path(output).expanduser(), "rb") as f:
+            shutil.copyfileobj(f, sys.stdout.buffer, READ_CHUNK)
+        sys.stdout.buffer.write(b"\n")
+    elif not args.output:
+        print(f"✅ Wrote catalog: {default_out}  ({cat['count']} items)")
 
 
 if __name__ == "__main__":